@@ -0,0 +1,16 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+import sys
+
+from scan import SCANNER_VERSION
+from scanner.request_budget import main
+
+if __name__ == "__main__":
+    sys.exit(main(SCANNER_VERSION))
@@ -16,6 +16,7 @@ from scanner.cli import parse_config
 from scanner.config import ScannerConfig
 from scanner.orchestrator import run_scan
 from scanner.output import format_size
+from scanner.planner import run_plan
 
 
 def check_laughing_lamp_available():
@@ -38,6 +39,7 @@ def scan_azdevops(
     skip_feeds=False,
     skip_committer_stats=False,
     skip_builds=False,
+    **options,
 ):
     # Check if laughing-lamp is available when identity resolution is requested
     if resolve_identities and not check_laughing_lamp_available():
@@ -58,13 +60,18 @@ def scan_azdevops(
         skip_feeds=skip_feeds,
         skip_committer_stats=skip_committer_stats,
         skip_builds=skip_builds,
+        **options,
     )
     return run_scan(config=config, scanner_version=SCANNER_VERSION)
 
 
 def main():
     config = parse_config()
-    
+
+    if config.plan:
+        run_plan(config=config, scanner_version=SCANNER_VERSION)
+        return
+
     # Check if laughing-lamp is available when identity resolution is requested
     if config.resolve_identities and not check_laughing_lamp_available():
         print("\n" + "=" * 70)
@@ -7,7 +7,6 @@
 # Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
 ####
 
-import base64
 from datetime import datetime
 import logging
 
@@ -22,7 +21,8 @@ from scanner.services import (
     TasksService,
 )
 from scanner.services.http_ops import HttpOps
-from scanner.services.runtime import RuntimeIndexes, ScanRuntimeState, ordered_dedupe
+from scanner.services.runtime import ScanRuntimeState, build_runtime_indexes
+from scanner.services.token_pool import BASIC, BEARER, Credential, basic_token
 
 
 class AzureDevOpsManager:
@@ -34,19 +34,31 @@ class AzureDevOpsManager:
         default_build_settings_expectations={},
         branch_limit=5,
         exception_strings=False,
+        additional_pat_tokens=(),
+        bearer_tokens=(),
+        org_project_ids=(),
+        **http_options,
     ):
         self.organization = organization
-        self.token = base64.b64encode(f":{pat_token}".encode()).decode()
+        self.token = basic_token(pat_token)
         self.default_build_settings_expectations = default_build_settings_expectations or {}
         self.exceptions = exception_strings if exception_strings else [f"/dev.azure.com/{organization}/"]
         self.scan_start_time = datetime.now()
         self.scan_finish_time = None
         self.projects = {}
+        # Set on shard workers: every wellformed project of the organization, scanned here or not.
+        self.org_project_ids = list(org_project_ids or [])
         self.repo_scan = {"top": branch_limit}
 
         self.logger = logging.getLogger("gunicorn.error")
         self.runtime_state = ScanRuntimeState()
-        self.http_ops = HttpOps(token=self.token, runtime_state=self.runtime_state, logger=self.logger)
+        # Each extra PAT or service principal token brings its own rate-limit budget.
+        credentials = [Credential(self.token, BASIC, "pat-1")]
+        credentials += [Credential(basic_token(pat), BASIC, f"pat-{i}") for i, pat in enumerate(additional_pat_tokens or [], 2)]
+        credentials += [Credential(token, BEARER, f"bearer-{i}") for i, token in enumerate(bearer_tokens or [], 1)]
+        self.http_ops = HttpOps(
+            token=self.token, runtime_state=self.runtime_state, logger=self.logger, credentials=credentials, **http_options
+        )
 
         self.projects_service = ProjectsService(manager=self, http_ops=self.http_ops, logger=self.logger)
         self.pipelines_service = PipelinesService(manager=self, http_ops=self.http_ops, runtime_state=self.runtime_state)
@@ -71,60 +83,13 @@ class AzureDevOpsManager:
         else:
             url = f"https://dev.azure.com/{self.organization}/_apis/serviceendpoint/{endpoint_id}/executionhistory?api-version=7.1"
         try:
-            data = self.http_ops.fetch_data(url)
-            if isinstance(data, dict) and "value" in data:
-                return data["value"]
-            elif isinstance(data, list):
-                return data
-            else:
-                return []
+            return self.http_ops.fetch_all(url, top_param="top")
         except Exception as err:
             self.logger.warning(f"Failed to fetch execution history for endpoint {endpoint_id}: {err}")
             return []
 
     def _build_runtime_indexes(self, definitions=None, builds=None):
-        idx = RuntimeIndexes()
-        for project_id, project_data in self.projects.items():
-            if not isinstance(project_data, dict):
-                continue
-            if project_data.get("state", "").lower() == "wellformed":
-                idx.wellformed_project_ids.append(project_id)
-            project_name = project_data.get("name")
-            if project_name:
-                idx.project_id_by_project_name[project_name] = project_id
-
-        definitions = definitions or []
-        builds = builds or []
-        for definition in definitions:
-            if not isinstance(definition, dict):
-                continue
-            k_key = definition.get("k_key")
-            if not k_key or "_" not in k_key:
-                continue
-            project_id = definition.get("k_project", {}).get("id") or k_key.split("_", 1)[0]
-            idx.definitions_by_project_id.setdefault(project_id, []).append(definition)
-            idx.definition_keys_by_project_id.setdefault(project_id, []).append(k_key)
-            repo_id = definition.get("repository", {}).get("id")
-            if repo_id:
-                idx.definitions_by_repo_id.setdefault(repo_id, []).append(definition)
-
-        for build in builds:
-            if not isinstance(build, dict):
-                continue
-            k_key = build.get("k_key")
-            if k_key and "_" in k_key:
-                project_id = build.get("k_project", {}).get("id") or k_key.split("_", 1)[0]
-                definition_id = build.get("definition", {}).get("id")
-                if definition_id is not None:
-                    def_key = f"{project_id}_{definition_id}"
-                    idx.builds_by_definition_key.setdefault(def_key, []).append(build)
-            repo_id = build.get("repository", {}).get("id")
-            if repo_id:
-                idx.builds_by_repo_id.setdefault(repo_id, []).append(build)
-
-        for project_id, keys in list(idx.definition_keys_by_project_id.items()):
-            idx.definition_keys_by_project_id[project_id] = ordered_dedupe(keys)
-
+        idx = build_runtime_indexes(self.projects, definitions, builds)
         self.runtime_state.indexes = idx
         return idx
 
@@ -137,9 +102,27 @@ class AzureDevOpsManager:
             if isinstance(project_data, dict) and project_data.get("state", "").lower() == "wellformed"
         ]
 
+    @property
+    def deadline(self):
+        return self.http_ops.deadline
+
+    def retry_deferred_fetches(self):
+        """Work off the fetches deferred during the main pass; returns the retry ledger summary."""
+        self.http_ops.retry_ledger.drain(deadline=self.http_ops.deadline)
+        return self.http_ops.retry_ledger.summary()
+
     def log_perf_summary(self):
         self.http_ops.log_perf_summary()
 
+    def close(self):
+        self.http_ops.close()
+
+    def metrics_snapshot(self):
+        return self.http_ops.metrics_snapshot()
+
+    def metrics_openmetrics(self):
+        return self.http_ops.metrics_openmetrics()
+
     def get_feed_packages(self, feed_id, project_id=None):
         return self.artifacts_service.get_feed_packages(feed_id, project_id=project_id)
 
@@ -198,9 +181,9 @@ class AzureDevOpsManager:
     def get_build_definition_metrics(self, build_definition_id):
         return self.pipelines_service.get_build_definition_metrics(build_definition_id)
 
-    def get_builds_per_definition_per_project(self, manager_pipeline={"preview":{"api_version": "api-version=7.1", "api_endpoint": "_apis/pipelines"}, "builds":{"api_version": "api-version=7.1", "api_endpoint": "_apis/build/builds"}, "build_definitions":{"api_version": "api-version=7.1", "api_endpoint": "_apis/build/definitions"}}, top_branches_to_scan=0, skip_builds=False):
+    def get_builds_per_definition_per_project(self, manager_pipeline={"preview":{"api_version": "api-version=7.1", "api_endpoint": "_apis/pipelines"}, "builds":{"api_version": "api-version=7.1", "api_endpoint": "_apis/build/builds"}, "build_definitions":{"api_version": "api-version=7.1", "api_endpoint": "_apis/build/definitions"}}, top_branches_to_scan=0, skip_builds=False, progress=None):
         return self.pipelines_service.get_builds_per_definition_per_project(
-            manager_pipeline=manager_pipeline, top_branches_to_scan=top_branches_to_scan, skip_builds=skip_builds
+            manager_pipeline=manager_pipeline, top_branches_to_scan=top_branches_to_scan, skip_builds=skip_builds, progress=progress
         )
 
     def get_build_definition_authorised_resources(self, build_definitions, manager_pipeline={"preview":{"api_version": "api-version=7.1", "api_endpoint": "_apis/pipelines"}, "builds":{"api_version": "api-version=7.1", "api_endpoint": "_apis/build/builds"}, "build_definitions":{"api_version": "api-version=7.1", "resources_api_version": "api-version=7.2-preview.1", "api_endpoint": "_apis/build/definitions"}}):
@@ -0,0 +1,204 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Optional asyncio transport for the HTTP layer (requires aiohttp).
+
+The transport owns one event loop running in a background thread. Blocking
+callers (the service thread pools) submit requests to that loop and wait on
+the result, so the `HttpOps` API is unchanged, while `get_many` lets a single
+caller keep hundreds of requests in flight without a thread per request.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import requests
+
+from scanner.compression import Decompressor
+from scanner.http_client import BufferedResponse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def async_transport_available():
+    return aiohttp is not None
+
+
+class AsyncTransport:
+    """Session-like transport that multiplexes requests on one event loop.
+
+    Exposes `get`/`post` with the same keyword signature as `requests.Session`
+    and mirrors the retry policy of `requests_session_with_retries`, except that
+    backoff and rate-limit waits are `asyncio.sleep` calls and never block a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        max_in_flight=256,
+        total=6,
+        backoff_factor=1,
+        status_forcelist=(500, 502, 503, 504),
+        limiter=None,
+        on_pool_event=None,
+        max_throttle_retries=6,
+    ):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for the async transport")
+        self.max_in_flight = max_in_flight
+        self.limiter = limiter
+        self.on_pool_event = on_pool_event
+        self.total = total
+        self.max_throttle_retries = max_throttle_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = set(status_forcelist)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ado-async-transport", daemon=True)
+        self._thread.start()
+        self._session = self._run(self._open())
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _open(self):
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        trace_configs = [self._pool_trace_config()] if self.on_pool_event is not None else []
+        # Bodies are decompressed in `_read` so the compressed size can be counted.
+        return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs, auto_decompress=False)
+
+    @staticmethod
+    async def _read(resp):
+        """Read and decode the body as it arrives; returns `(content, wire_bytes)`."""
+        decompressor = Decompressor(resp.headers.get("Content-Encoding"))
+        parts = []
+        received = 0
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            received += len(chunk)
+            parts.append(decompressor.decompress(chunk))
+        parts.append(decompressor.flush())
+        return b"".join(parts), received
+
+    def _pool_trace_config(self):
+        on_event = self.on_pool_event
+        trace_config = aiohttp.TraceConfig()
+
+        async def _request_start(session, ctx, params):
+            ctx.host = params.url.host
+
+        async def _connection_created(session, ctx, params):
+            on_event(ctx.host, "checkout")
+            on_event(ctx.host, "new_connection")
+
+        async def _connection_reused(session, ctx, params):
+            on_event(ctx.host, "checkout")
+
+        trace_config.on_request_start.append(_request_start)
+        trace_config.on_connection_create_end.append(_connection_created)
+        trace_config.on_connection_reuseconn.append(_connection_reused)
+        return trace_config
+
+    def _backoff(self, attempt):
+        # Same curve as urllib3 Retry: no wait on the first retry, then factor * 2^(n-1).
+        if attempt <= 1:
+            return 0
+        return min(self.backoff_factor * (2 ** (attempt - 1)), 120)
+
+    @staticmethod
+    def _client_timeout(timeout):
+        """aiohttp timeout for a requests-style `timeout` (seconds or `(connect, read)`)."""
+        if timeout is None:
+            return None
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+    async def _request(self, method, url, headers=None, data=None, timeout=None):
+        attempt = 0
+        throttle_attempt = 0
+        started = time.monotonic()
+        while True:
+            if self.limiter is not None:
+                await self.limiter.acquire_async(url, headers)
+            try:
+                async with self._session.request(
+                    method, url, headers=headers, data=data, timeout=self._client_timeout(timeout)
+                ) as resp:
+                    content, received = await self._read(resp)
+                    response = BufferedResponse(
+                        resp.status, resp.headers, content, str(resp.url), resp.reason, resp.charset, received
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if attempt >= self.total:
+                    if isinstance(err, asyncio.TimeoutError):
+                        raise requests.exceptions.Timeout(f"{method} {url} timed out") from err
+                    raise requests.exceptions.ConnectionError(str(err)) from err
+                attempt += 1
+                logger.debug(f"Retrying {method} {url} after connection error ({attempt}/{self.total}): {err}")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if self.limiter is not None:
+                pause = self.limiter.observe(url, response.status_code, response.headers, headers)
+                if pause and throttle_attempt < self.max_throttle_retries:
+                    # The limiter already blocks the host for `pause`; the next
+                    # acquire waits it out without holding a thread.
+                    throttle_attempt += 1
+                    continue
+
+            if response.status_code in self.status_forcelist and attempt < self.total:
+                attempt += 1
+                logger.debug(f"Retrying {method} {url} after HTTP {response.status_code} ({attempt}/{self.total})")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            response.retries = attempt + throttle_attempt
+            response.elapsed = timedelta(seconds=time.monotonic() - started)
+            return response
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        return self._run(self._request("GET", url, headers=headers, timeout=timeout))
+
+    def post(self, url, headers=None, data=None, timeout=None, **kwargs):
+        return self._run(self._request("POST", url, headers=headers, data=data, timeout=timeout))
+
+    def get_many(self, urls, headers=None, timeout=None):
+        """Issue all GETs concurrently; returns responses (or exceptions) in order.
+
+        `headers` and `timeout` are either one value for every request or a
+        list with one value per URL.
+        """
+        per_url = headers if isinstance(headers, list) else [headers] * len(urls)
+        timeouts = timeout if isinstance(timeout, list) else [timeout] * len(urls)
+
+        async def _gather():
+            return await asyncio.gather(
+                *(
+                    self._request("GET", url, headers=url_headers, timeout=url_timeout)
+                    for url, url_headers, url_timeout in zip(urls, per_url, timeouts)
+                ),
+                return_exceptions=True,
+            )
+
+        return self._run(_gather())
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
@@ -0,0 +1,211 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Scan several organizations concurrently in one process.
+
+The manifest (YAML or JSON) lists the organizations; every entry takes the
+`ScannerConfig` fields, plus `pat_env` to read the PAT from an environment
+variable instead of the manifest. `defaults` apply to every entry:
+
+    defaults:
+      top_branches_to_scan: 2
+      skip_feeds: true
+    organizations:
+      - organization: contoso
+        pat_env: CONTOSO_PAT
+      - organization: fabrikam
+        pat_env: FABRIKAM_PAT
+        projects: [payments, web]
+
+Each organization keeps its own sessions, rate limiter, token pool and
+worker autotuning, and writes its results to `<results-dir>/<organization>/`
+as a single scan would. The request scheduler is shared, so `--max-in-flight`
+bounds the requests in flight across all organizations together. Pattern
+files are loaded once for the whole batch. `batch_<job-id>_summary.json`
+records how long each organization took and how it ended.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from datetime import datetime
+
+import yaml
+
+from scanner.config import ScannerConfig
+from scanner.orchestrator import run_scan, setup_logging
+from scanner.services.request_scheduler import (
+    DEFAULT_CLASS_LIMITS,
+    DEFAULT_MAX_IN_FLIGHT,
+    RequestScheduler,
+    parse_class_limits,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLEL_ORGS = 4
+DEFAULT_BATCH_MAX_IN_FLIGHT = 64
+CONFIG_FIELDS = {field.name for field in fields(ScannerConfig)}
+
+
+def load_manifest(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        manifest = yaml.safe_load(handle) if path.endswith((".yml", ".yaml")) else json.load(handle)
+    if isinstance(manifest, list):
+        manifest = {"organizations": manifest}
+    if not isinstance(manifest, dict) or not manifest.get("organizations"):
+        raise ValueError(f"{path} lists no organizations")
+    return manifest
+
+
+def build_org_configs(manifest, job_id, results_dir):
+    """One `ScannerConfig` per manifest entry, with `defaults` applied."""
+    defaults = manifest.get("defaults") or {}
+    configs = []
+    seen = set()
+    for entry in manifest["organizations"]:
+        entry = {**defaults, **entry}
+        organization = entry.get("organization")
+        if not organization:
+            raise ValueError(f"Manifest entry without an organization: {entry}")
+        if organization in seen:
+            raise ValueError(f"Organization '{organization}' is listed twice")
+        seen.add(organization)
+        pat_env = entry.pop("pat_env", None)
+        unknown = set(entry) - CONFIG_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown settings for {organization}: {', '.join(sorted(unknown))}")
+        pat_token = entry.get("pat_token") or (os.environ.get(pat_env) if pat_env else None) or os.environ.get("AZURE_DEVOPS_PAT")
+        if not pat_token and not entry.get("replay_dir"):
+            raise ValueError(f"No PAT for {organization}: set pat_token or pat_env, or AZURE_DEVOPS_PAT")
+        safe_name = re.sub(r"[^a-zA-Z0-9_-]", "_", organization)
+        entry.setdefault("job_id", f"{job_id}-{safe_name}")
+        entry.setdefault("results_dir", os.path.join(results_dir, safe_name))
+        entry["pat_token"] = pat_token or "replay"
+        configs.append(ScannerConfig(**entry))
+    return configs
+
+
+def request_totals(output_path):
+    metrics_path = output_path[: -len(".json")] + "_http_metrics.json"
+    try:
+        with open(metrics_path) as handle:
+            counters = json.load(handle)["counters"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return counters.get("get_total", 0) + counters.get("post_total", 0)
+
+
+def scan_organization(config, scanner_version, scheduler):
+    """Scan one organization of the batch; failures are reported, not raised."""
+    os.makedirs(config.results_dir, exist_ok=True)
+    started = time.monotonic()
+    entry = {"organization": config.organization, "job_id": config.job_id}
+    try:
+        _, output_path = run_scan(config, scanner_version, scheduler=scheduler, configure_logging=False)
+    except Exception as err:
+        logger.error(f"Scan of {config.organization} failed: {err}", exc_info=True)
+        entry.update({"status": "failed", "error": f"{type(err).__name__}: {err}"})
+    else:
+        entry.update({"status": "ok", "output": output_path, "requests": request_totals(output_path)})
+    entry["seconds"] = round(time.monotonic() - started, 3)
+    logger.info(f"{config.organization}: {entry['status']} in {entry['seconds']:.1f}s")
+    return entry
+
+
+def shared_class_limits(max_in_flight, overrides=None):
+    """Per-class limits for a shared scheduler: the single-scan defaults scaled to `max_in_flight`."""
+    scale = max_in_flight / DEFAULT_MAX_IN_FLIGHT if max_in_flight else 1
+    limits = {name: max(1, round(limit * scale)) for name, limit in DEFAULT_CLASS_LIMITS.items()}
+    return {**limits, **(overrides or {})}
+
+
+def run_batch(configs, scanner_version, job_id, results_dir, parallel=DEFAULT_PARALLEL_ORGS, max_in_flight=DEFAULT_BATCH_MAX_IN_FLIGHT, class_limits=None):
+    """Scan `configs` at most `parallel` at a time; returns the batch summary, also written next to the results."""
+    scheduler = RequestScheduler(max_in_flight, shared_class_limits(max_in_flight, class_limits))
+    start_date = datetime.now().isoformat()
+    started = time.monotonic()
+    logger.info(f"Scanning {len(configs)} organizations, {parallel} at a time")
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="batch-org") as pool:
+        organizations = list(pool.map(lambda config: scan_organization(config, scanner_version, scheduler), configs))
+    seconds = time.monotonic() - started
+    summary = {
+        "batch_job_id": job_id,
+        "scanner_version": scanner_version,
+        "scan_start": start_date,
+        "scan_end": datetime.now().isoformat(),
+        "seconds": round(seconds, 3),
+        "parallel": parallel,
+        "organizations": organizations,
+        "failed": [entry["organization"] for entry in organizations if entry["status"] != "ok"],
+        # Sum of the per-organization times over the batch wall time: the speedup from overlapping them.
+        "overlap": round(sum(entry["seconds"] for entry in organizations) / seconds, 2) if seconds else 0.0,
+        "scheduler": scheduler.snapshot(),
+    }
+    safe_job_id = re.sub(r"[^a-zA-Z0-9_-]", "_", job_id)
+    summary_path = os.path.join(os.path.abspath(results_dir), f"batch_{safe_job_id}_summary.json")
+    with open(summary_path, "w") as handle:
+        json.dump(summary, handle, indent=2)
+    logger.info(f"Batch finished in {seconds:.1f}s, {len(summary['failed'])} failed. Summary: {summary_path}")
+    return summary, summary_path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scan several Azure DevOps organizations in one process.")
+    parser.add_argument("manifest", help="YAML or JSON manifest of the organizations to scan")
+    parser.add_argument("-j", "--job-id", required=True, help="Batch job ID; each organization's job ID is <job-id>-<organization>")
+    parser.add_argument("-r", "--results-dir", default=None, help="Directory for the batch summary and one sub-directory per organization (default: current working directory)")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=DEFAULT_PARALLEL_ORGS,
+        help=f"Organizations scanned at the same time (default: {DEFAULT_PARALLEL_ORGS})",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_BATCH_MAX_IN_FLIGHT,
+        help=f"Requests in flight at once across all organizations; 0 disables the shared limit (default: {DEFAULT_BATCH_MAX_IN_FLIGHT})",
+    )
+    parser.add_argument(
+        "--class-limit",
+        action="append",
+        default=None,
+        help="Shared in-flight limit per priority class as CLASS=N (critical, normal, bulk); repeatable (defaults: the single-scan limits scaled to --max-in-flight)",
+    )
+    return parser
+
+
+def main(scanner_version, argv=None):
+    args = build_parser().parse_args(argv)
+    results_dir = args.results_dir or os.getcwd()
+    os.makedirs(results_dir, exist_ok=True)
+    setup_logging(job_id=f"batch_{args.job_id}", results_dir=results_dir)
+    try:
+        configs = build_org_configs(load_manifest(args.manifest), args.job_id, results_dir)
+        class_limits = parse_class_limits(args.class_limit)
+    except (OSError, ValueError, yaml.YAMLError) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 2
+    summary, _ = run_batch(
+        configs,
+        scanner_version,
+        job_id=args.job_id,
+        results_dir=results_dir,
+        parallel=args.parallel,
+        max_in_flight=args.max_in_flight,
+        class_limits=class_limits,
+    )
+    return 1 if summary["failed"] else 0
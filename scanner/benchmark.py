@@ -0,0 +1,142 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Load benchmark: run full scans against the local mock Azure DevOps server.
+
+For every organization size the runner starts a `MockAdoServer`, runs
+`run_scan` against it through `--api-base-url` and records wall time,
+requests seen by the server, request rate, peak RSS, response bytes before
+and after compression and the scanner's own per-family latency summary.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import fields
+
+from scanner.config import ScannerConfig
+from scanner.http_client import TRANSPORTS
+from scanner.mock_ado import FaultSpec, MockAdoServer, MockOrgSpec
+from scanner.orchestrator import run_scan
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux; it is the peak of the whole process, so
+    # sizes are run in ascending order.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_one(projects, scanner_version, org_options=None, faults=None, scan_options=None, results_dir=None, compress=True):
+    spec = MockOrgSpec(projects=projects, **(org_options or {}))
+    results_dir = results_dir or tempfile.mkdtemp(prefix=f"ado-bench-{projects}-")
+    with MockAdoServer(spec, faults, compress=compress) as server:
+        config = ScannerConfig(
+            organization=spec.organization,
+            job_id=f"bench-{projects}",
+            pat_token="mock",
+            results_dir=results_dir,
+            api_base_url=server.url,
+            **(scan_options or {}),
+        )
+        started = time.monotonic()
+        _, output_path = run_scan(config=config, scanner_version=scanner_version)
+        seconds = time.monotonic() - started
+        server_stats = server.stats()
+    metrics_path = output_path[: -len(".json")] + "_http_metrics.json"
+    with open(metrics_path) as f:
+        metrics = json.load(f)
+    return {
+        "projects": projects,
+        "seconds": round(seconds, 3),
+        "requests": server_stats["requests_total"],
+        "requests_per_second": round(server_stats["requests_total"] / seconds, 1) if seconds else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "body_mb": round(server_stats["body_bytes"] / 2**20, 2),
+        "wire_mb": round(server_stats["wire_bytes"] / 2**20, 2),
+        "server": server_stats,
+        "latency_by_family": {family: summary["latency_seconds"] for family, summary in metrics["families"].items()},
+        "counters": metrics["counters"],
+        "results_dir": results_dir,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark run_scan against the local mock Azure DevOps server.")
+    parser.add_argument("--projects", type=int, nargs="+", default=[10, 100, 1000], help="Organization sizes to scan (default: 10 100 1000)")
+    parser.add_argument("--definitions", type=int, default=MockOrgSpec.definitions_per_project, help="Build definitions per project")
+    parser.add_argument("--builds", type=int, default=MockOrgSpec.builds_per_definition, help="Builds per definition")
+    parser.add_argument("--repos", type=int, default=MockOrgSpec.repos_per_project, help="Repositories per project")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every mock response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random extra latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--failing-family", action="append", default=[], help="Endpoint family that always answers 503 (repeatable)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429")
+    parser.add_argument("--identity-rps", type=float, default=0.0, help="Requests per second the mock allows each credential before 429")
+    parser.add_argument("--tokens", type=int, default=1, help="Credentials the scanner spreads requests across")
+    parser.add_argument("--no-compression", action="store_true", help="Mock server never gzips response bodies")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="sync", help="Scanner HTTP transport")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Scanner rate limit per host (default: 0, disabled)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Fixed scanner worker count (default: autotuned)")
+    parser.add_argument("-rb", "--top-branches-to-scan", type=int, default=0, help="Branches to preview per definition")
+    parser.add_argument("--output", default=None, help="Write the benchmark report as JSON to this file")
+    return parser
+
+
+def main(scanner_version, argv=None):
+    args = build_parser().parse_args(argv)
+    faults = FaultSpec(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        failing_families=tuple(args.failing_family),
+        identity_rps=args.identity_rps,
+    )
+    org_options = {
+        "definitions_per_project": args.definitions,
+        "builds_per_definition": args.builds,
+        "repos_per_project": args.repos,
+    }
+    scan_options = {
+        "transport": args.transport,
+        "rate_limit": args.rate_limit,
+        "top_branches_to_scan": args.top_branches_to_scan,
+        "concurrency": args.concurrency,
+        "additional_pat_tokens": [f"mock-{i}" for i in range(2, args.tokens + 1)],
+    }
+    runs = [
+        run_one(projects, scanner_version, org_options, faults, scan_options, compress=not args.no_compression)
+        for projects in sorted(args.projects)
+    ]
+    report = {
+        "faults": {field.name: getattr(faults, field.name) for field in fields(faults)},
+        "org": org_options,
+        "scan": scan_options,
+        "compression": not args.no_compression,
+        "runs": runs,
+    }
+    print(f"{'projects':>9} {'seconds':>9} {'requests':>9} {'req/s':>8} {'peak MB':>8} {'body MB':>8} {'wire MB':>8}", file=sys.stderr)
+    for run in runs:
+        print(
+            f"{run['projects']:>9} {run['seconds']:>9.2f} {run['requests']:>9} {run['requests_per_second']:>8.1f} {run['peak_rss_mb']:>8.1f} {run['body_mb']:>8.2f} {run['wire_mb']:>8.2f}",
+            file=sys.stderr,
+        )
+    if args.output:
+        with open(os.path.abspath(args.output), "w") as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,238 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Record/replay cassettes for the HTTP layer.
+
+A cassette directory holds:
+
+- `bodies.bin`: response bodies, zlib-compressed and appended back to back.
+- `index.jsonl`: one line per exchange with method, URL, payload hash, status,
+  response headers, timing, decoded and on-the-wire body sizes and the
+  offset/length of the body in `bodies.bin`.
+- `requests.har`: a HAR 1.2 request log written when recording finishes.
+
+Request headers are never stored, so the PAT does not end up on disk. Bodies
+are stored decoded; replayed responses report the recorded wire size. Replay
+serves exchanges by method, URL and payload hash; when the same request was
+recorded several times the recordings are served in order and the last one
+is repeated. Query parameters computed from the clock (the start of the
+commit window) are left out of the match, since a replay runs later than the
+recording.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from scanner.compression import wire_bytes
+from scanner.http_client import BufferedResponse
+
+INDEX_FILE = "index.jsonl"
+BODIES_FILE = "bodies.bin"
+HAR_FILE = "requests.har"
+# Query parameters derived from the time of the scan rather than from what it asks for.
+TIME_QUERY_PARAMS = frozenset(("searchCriteria.fromDate", "searchCriteria.toDate"))
+
+
+class MissingExchangeError(requests.exceptions.ConnectionError):
+    """The cassette has no recording for a request."""
+
+
+def payload_hash(data):
+    if data is None:
+        return ""
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def _match_url(url):
+    """`url` with the values of `TIME_QUERY_PARAMS` blanked out."""
+    base, separator, query = url.partition("?")
+    if not separator:
+        return url
+    segments = [
+        f"{segment.split('=', 1)[0]}=" if segment.split("=", 1)[0] in TIME_QUERY_PARAMS else segment
+        for segment in query.split("&")
+    ]
+    return f"{base}?{'&'.join(segments)}"
+
+
+def exchange_key(method, url, payload_digest=""):
+    return f"{method.upper()} {_match_url(url)} {payload_digest}"
+
+
+class CassetteRecorder:
+    """Session-like wrapper that forwards to `session` and records every exchange."""
+
+    def __init__(self, session, directory):
+        self.session = session
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8")
+        self._bodies = open(os.path.join(self.directory, BODIES_FILE), "ab")
+        self._offset = self._bodies.tell()
+        if hasattr(session, "get_many"):
+            self.get_many = self._get_many
+
+    def _record(self, method, url, data, response, started, seconds):
+        body = response.content or b""
+        compressed = zlib.compress(body)
+        entry = {
+            "method": method,
+            "url": url,
+            "payload_sha256": payload_hash(data),
+            "status": response.status_code,
+            "reason": getattr(response, "reason", "") or "",
+            "headers": dict(response.headers),
+            "started": started,
+            "seconds": round(seconds, 6),
+            "size": len(body),
+            "wire_size": wire_bytes(response),
+        }
+        with self._lock:
+            entry["offset"] = self._offset
+            entry["length"] = len(compressed)
+            self._bodies.write(compressed)
+            self._offset += len(compressed)
+            self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _call(self, method, url, send, data=None):
+        started = datetime.now(timezone.utc).isoformat()
+        start = time.monotonic()
+        response = send()
+        self._record(method, url, data, response, started, time.monotonic() - start)
+        return response
+
+    def get(self, url, headers=None, **kwargs):
+        return self._call("GET", url, lambda: self.session.get(url=url, headers=headers, **kwargs))
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        return self._call("POST", url, lambda: self.session.post(url=url, headers=headers, data=data, **kwargs), data)
+
+    def _get_many(self, urls, headers=None, timeout=None):
+        started = datetime.now(timezone.utc).isoformat()
+        responses = self.session.get_many(urls, headers=headers, timeout=timeout)
+        for url, response in zip(urls, responses):
+            if not isinstance(response, Exception):
+                self._record("GET", url, None, response, started, response.elapsed.total_seconds())
+        return responses
+
+    def close(self):
+        with self._lock:
+            self._index.close()
+            self._bodies.close()
+        export_har(self.directory)
+        self.session.close()
+
+
+class CassettePlayer:
+    """Session-like transport that serves recorded exchanges without network access."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"No cassette found in {self.directory}")
+        self._entries = defaultdict(list)
+        for entry in read_index(self.directory):
+            self._entries[exchange_key(entry["method"], entry["url"], entry["payload_sha256"])].append(entry)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        self._bodies = open(os.path.join(self.directory, BODIES_FILE), "rb")
+
+    def _play(self, method, url, data=None):
+        key = exchange_key(method, url, payload_hash(data))
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise MissingExchangeError(f"No recorded response for {method} {url}")
+            entry = entries[min(self._served[key], len(entries) - 1)]
+            self._served[key] += 1
+            self._bodies.seek(entry["offset"])
+            body = zlib.decompress(self._bodies.read(entry["length"]))
+        return BufferedResponse(
+            entry["status"], entry["headers"], body, url, entry.get("reason"), wire_bytes=entry.get("wire_size")
+        )
+
+    def get(self, url, headers=None, **kwargs):
+        return self._play("GET", url)
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        return self._play("POST", url, data)
+
+    def close(self):
+        with self._lock:
+            self._bodies.close()
+
+
+def read_index(directory):
+    with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def export_har(directory, path=None):
+    """Write the cassette's request log as HAR 1.2 (bodies are left out, sizes kept)."""
+    path = path or os.path.join(directory, HAR_FILE)
+    entries = []
+    for entry in read_index(directory):
+        headers = entry.get("headers", {})
+        content_type = next((value for name, value in headers.items() if name.lower() == "content-type"), "")
+        request = {
+            "method": entry["method"],
+            "url": entry["url"],
+            "httpVersion": "HTTP/1.1",
+            "headers": [],
+            "cookies": [],
+            "queryString": [{"name": name, "value": value} for name, value in parse_qsl(urlsplit(entry["url"]).query)],
+            "headersSize": -1,
+            "bodySize": -1,
+        }
+        if entry.get("payload_sha256"):
+            request["comment"] = f"payload sha256 {entry['payload_sha256']}"
+        entries.append(
+            {
+                "startedDateTime": entry.get("started"),
+                "time": round(entry.get("seconds", 0) * 1000, 3),
+                "request": request,
+                "response": {
+                    "status": entry["status"],
+                    "statusText": entry.get("reason", ""),
+                    "httpVersion": "HTTP/1.1",
+                    "headers": [{"name": name, "value": str(value)} for name, value in headers.items()],
+                    "cookies": [],
+                    "content": {
+                        "size": entry.get("size", 0),
+                        "compression": entry.get("size", 0) - entry.get("wire_size", entry.get("size", 0)),
+                        "mimeType": content_type,
+                    },
+                    "redirectURL": "",
+                    "headersSize": -1,
+                    "bodySize": entry.get("wire_size", -1),
+                },
+                "cache": {},
+                "timings": {"send": 0, "wait": round(entry.get("seconds", 0) * 1000, 3), "receive": 0},
+            }
+        )
+    har = {"log": {"version": "1.2", "creator": {"name": "ado-scanner", "version": "1"}, "entries": entries}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(har, f)
+    return path
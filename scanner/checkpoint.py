@@ -0,0 +1,221 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Scan checkpoints, so `--resume JOB_ID` can pick up where a scan stopped.
+
+Checkpoints live in `<results_dir>/checkpoints/<job_id>/`:
+
+- `checkpoint.json`: the config fingerprint and the stages completed so far;
+- `<stage>.ckpt`: the outputs of a completed stage, a zlib-compressed pickle;
+- `<stage>.progress`: per-project results of a stage that has not finished
+  yet, as length-prefixed compressed records appended one project at a time.
+  A record cut short by a crash is ignored on load.
+
+The fingerprint covers the options that change what a scan collects
+(organization, project filter, branches, skip flags, scanner version), so a
+checkpoint is never resumed with settings that would have produced different
+data. Tokens and HTTP tuning options are not part of it.
+
+Checkpoint files are only ever read back by the scanner that wrote them;
+they are pickles and must not be taken from anywhere else.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "checkpoint.json"
+FORMAT_VERSION = 1
+COMPRESSION_LEVEL = 1
+_RECORD_HEADER = struct.Struct(">I")
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def checkpoint_dir(results_dir, job_id):
+    return Path(results_dir) / "checkpoints" / job_id
+
+
+def config_fingerprint(config, scanner_version):
+    """Hash of the options that decide what a scan collects."""
+    settings = {
+        "format": FORMAT_VERSION,
+        "scanner_version": scanner_version,
+        "organization": config.organization,
+        "projects": sorted(config.projects or []),
+        "top_branches_to_scan": config.top_branches_to_scan,
+        "skip_builds": getattr(config, "skip_builds", False),
+        "skip_feeds": getattr(config, "skip_feeds", False),
+        "skip_committer_stats": getattr(config, "skip_committer_stats", False),
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _dump(value):
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+
+def _load(data):
+    return pickle.loads(zlib.decompress(data))
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp, path)
+
+
+class ProgressLog:
+    """Per-key results of one stage, appended as each key (project) completes."""
+
+    def __init__(self, path, writable=lambda: True):
+        self.path = path
+        self.writable = writable
+        self._records = {}
+        self._lock = Lock()
+        self._read()
+
+    def _read(self):
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(data):
+            (length,) = _RECORD_HEADER.unpack_from(data, offset)
+            record = data[offset + _RECORD_HEADER.size : offset + _RECORD_HEADER.size + length]
+            if len(record) < length:
+                break
+            try:
+                key, value = _load(record)
+            except Exception:
+                break
+            self._records[key] = value
+            offset += _RECORD_HEADER.size + length
+        if offset < len(data):
+            logger.warning(f"Ignoring a partly written record at the end of {self.path.name}")
+            with open(self.path, "r+b") as handle:
+                handle.truncate(offset)
+        if self._records:
+            logger.info(f"Resuming {self.path.stem}: {len(self._records)} projects already done")
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, key):
+        """The stored result for `key`, or None when it has not completed."""
+        with self._lock:
+            return self._records.get(key)
+
+    def put(self, key, value):
+        if not self.writable():
+            return
+        record = _dump((key, value))
+        with self._lock:
+            self._records[key] = value
+            with open(self.path, "ab") as handle:
+                handle.write(_RECORD_HEADER.pack(len(record)) + record)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+
+class CheckpointStore:
+    """Completed stage outputs and per-project progress for one scan job.
+
+    `writable()` is consulted before anything is written; the orchestrator
+    uses it to stop checkpointing once the scan deadline has truncated
+    something, so a resumed scan collects those parts again.
+    """
+
+    def __init__(self, directory, fingerprint, resume=False, writable=lambda: True):
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        self.writable = writable
+        self.completed = []
+        self._progress = {}
+        self._lock = Lock()
+        if resume:
+            self._open()
+        else:
+            if self.directory.exists():
+                shutil.rmtree(self.directory)
+            self.directory.mkdir(parents=True)
+            self._write_manifest()
+
+    def _open(self):
+        manifest_path = self.directory / MANIFEST
+        if not manifest_path.exists():
+            raise CheckpointError(f"No checkpoint to resume in {self.directory}")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("fingerprint") != self.fingerprint:
+            raise CheckpointError(
+                "The checkpoint was written with different scan settings (organization, projects, branches, "
+                "skip flags or scanner version); rerun with the original settings or start a new job"
+            )
+        self.completed = [name for name in manifest.get("completed", []) if (self.directory / f"{name}.ckpt").exists()]
+        logger.info(f"Resuming from checkpoint: {len(self.completed)} stages already completed")
+
+    def _write_manifest(self):
+        manifest = {
+            "fingerprint": self.fingerprint,
+            "updated": datetime.now().isoformat(),
+            "completed": list(self.completed),
+        }
+        _write_atomic(self.directory / MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def has(self, stage):
+        return stage in self.completed
+
+    def load(self, stage):
+        return _load((self.directory / f"{stage}.ckpt").read_bytes())
+
+    def save(self, stage, outputs):
+        if not self.writable():
+            return False
+        _write_atomic(self.directory / f"{stage}.ckpt", _dump(outputs))
+        with self._lock:
+            if stage not in self.completed:
+                self.completed.append(stage)
+            self._write_manifest()
+            self._progress.pop(stage, None)
+        # The stage checkpoint supersedes its per-project progress.
+        progress_path = self.directory / f"{stage}.progress"
+        if progress_path.exists():
+            progress_path.unlink()
+        return True
+
+    def progress(self, stage):
+        """The `ProgressLog` of a stage that records its per-project results."""
+        with self._lock:
+            if stage not in self._progress:
+                self._progress[stage] = ProgressLog(self.directory / f"{stage}.progress", writable=self.writable)
+            return self._progress[stage]
+
+    def remove(self):
+        """Delete the checkpoint once the scan result has been written, and `checkpoints/` if it is left empty."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        try:
+            self.directory.parent.rmdir()
+        except OSError:
+            # Other jobs (or shards) still have checkpoints there.
+            pass
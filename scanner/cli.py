@@ -12,18 +12,42 @@ import os
 import sys
 
 from scanner.config import ScannerConfig
+from scanner.connection_pools import parse_pool_sizes
+from scanner.http_client import TRANSPORTS
+from scanner.services.deadline import parse_duration, parse_read_timeouts
+from scanner.services.request_scheduler import parse_class_limits
+from scanner.services.paginator import parse_page_sizes
 
 
 def build_parser():
     parser = argparse.ArgumentParser(description="Run Azure DevOps scan.")
     parser.add_argument("-o", "--organization", required=True, help="Azure DevOps organization name")
-    parser.add_argument("-j", "--job-id", required=True, help="Job ID for this scan")
+    job = parser.add_mutually_exclusive_group(required=True)
+    job.add_argument("-j", "--job-id", help="Job ID for this scan")
+    job.add_argument(
+        "--resume",
+        metavar="JOB_ID",
+        default=None,
+        help="Resume an interrupted scan from the checkpoint it left in the results directory; the other scan settings must match",
+    )
     parser.add_argument(
         "-p",
         "--pat-token",
         required=False,
         help="Azure DevOps Personal Access Token (can also be set via AZURE_DEVOPS_PAT environment variable)",
     )
+    parser.add_argument(
+        "--additional-pat-token",
+        action="append",
+        default=None,
+        help="Another PAT to spread requests across; each identity has its own rate-limit budget. Repeatable (also AZURE_DEVOPS_ADDITIONAL_PATS, comma separated)",
+    )
+    parser.add_argument(
+        "--bearer-token",
+        action="append",
+        default=None,
+        help="Microsoft Entra access token (service principal or managed identity) to spread requests across. Repeatable",
+    )
     parser.add_argument(
         "-r", "--results-dir", default=None, help="Directory to save scan results (default: current working directory)"
     )
@@ -59,6 +83,131 @@ def build_parser():
         default=False,
         help="Skip build and build pipeline data collection (only resources and permissions)",
     )
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default="sync",
+        help="HTTP transport: 'sync' (requests), 'async' (single asyncio event loop, requires aiohttp package) or 'http2' (HTTP/2 multiplexing over one connection per host, requires httpx[http2]) (default: sync)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=100.0,
+        help="Initial and maximum requests per second per host; lowered automatically when Azure DevOps reports rate limiting. 0 disables (default: 100)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        action="append",
+        default=None,
+        help="Connections kept per host. Repeat as HOST=N to override a single host, e.g. --pool-size 32 --pool-size dev.azure.com=64 (default: 32)",
+    )
+    parser.add_argument(
+        "--session-per-thread",
+        action="store_true",
+        default=False,
+        help="Use a separate HTTP session (and connection pools) for each worker thread",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent conditional-request (ETag) cache; repeat scans revalidate unchanged responses instead of downloading them",
+    )
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="Maximum size of the response cache in MB (default: 512)")
+    parser.add_argument("--cache-ttl-hours", type=float, default=168, help="Discard cached responses older than this many hours (default: 168)")
+    parser.add_argument(
+        "--page-size",
+        action="append",
+        default=None,
+        help="Page size for an endpoint family as FAMILY=N, e.g. --page-size builds=500. Repeatable; 0 uses the server default",
+    )
+    parser.add_argument(
+        "--prefetch-pages",
+        action="store_true",
+        default=False,
+        help="Request the next page of a list while the current page is being processed",
+    )
+    parser.add_argument("--max-retries", type=int, default=6, help="Retries for connection errors and 5xx responses, with jittered backoff (default: 6)")
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=5,
+        help="Consecutive failures after which requests of an endpoint family are shed until its circuit breaker resets. 0 disables (default: 5)",
+    )
+    parser.add_argument(
+        "--breaker-reset-seconds",
+        type=float,
+        default=30.0,
+        help="Seconds an open circuit breaker sheds requests before letting a probe through (default: 30)",
+    )
+    parser.add_argument("--connect-timeout", type=float, default=10.0, help="Seconds to establish a connection (default: 10)")
+    parser.add_argument("--read-timeout", type=float, default=60.0, help="Seconds to wait for response data (default: 60)")
+    parser.add_argument(
+        "--read-timeout-for",
+        action="append",
+        default=None,
+        help="Read timeout for an endpoint family as FAMILY=SECONDS, e.g. --read-timeout-for build_logs=300. Repeatable (defaults: build_logs=120, previews=120, feeds=90)",
+    )
+    parser.add_argument(
+        "--max-scan-minutes",
+        type=float,
+        default=None,
+        help="Scan deadline in minutes: requests are cut short to fit it and, once it passes, remaining optional steps are skipped and the result is marked truncated",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=parse_duration,
+        default=None,
+        metavar="DURATION",
+        help="Time budget such as 45m or 1h30m (a bare number is minutes). Work is ranked by value: protected resources, checks and permissions run to the end, while the latest builds, previews of further branches and commits stop starting new work after 50%%, 35%% and 25%% of the budget. Sampled or truncated sections are marked in the result",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=32,
+        help="Requests in flight at once; when they are all taken, list calls that unblock further work go before bulk leaf calls. 0 disables (default: 32)",
+    )
+    parser.add_argument(
+        "--class-limit",
+        action="append",
+        default=None,
+        help="In-flight limit for a priority class as CLASS=N (critical, normal, bulk). Repeatable (defaults: critical=32, normal=24, bulk=8)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Fixed number of worker threads per fan-out (projects, definitions, builds, previews). Default: tuned automatically, starting at 4",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=16,
+        help="Upper bound for the automatically tuned worker count (default: 16)",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        default=False,
+        help="Dry run: make only the list calls (and a few sample calls), estimate requests per endpoint family, wall time and memory for these settings, write plan_<job-id>.json and exit without scanning",
+    )
+    parser.add_argument(
+        "--api-base-url",
+        default=None,
+        help="Send Azure DevOps requests to this base URL instead, e.g. the bundled mock server (python benchmark.py)",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record",
+        metavar="DIR",
+        default=None,
+        help="Record every HTTP request/response into a cassette in DIR (also writes a HAR request log)",
+    )
+    cassette.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Replay a cassette recorded with --record instead of calling Azure DevOps; no PAT is needed",
+    )
     return parser
 
 
@@ -74,14 +223,27 @@ def resolve_pat_token(cli_pat_token):
 
 
 def parse_config(argv=None):
-    parser = build_parser()
-    args = parser.parse_args(argv)
-    pat_token = resolve_pat_token(args.pat_token)
+    return config_from_args(build_parser().parse_args(argv))
+
+
+def config_from_args(args):
+    """The `ScannerConfig` for arguments parsed with `build_parser` (or a parser extending it)."""
+    if args.replay:
+        # Replay never reaches Azure DevOps, so any token will do.
+        pat_token = args.pat_token or os.environ.get("AZURE_DEVOPS_PAT") or "replay"
+    else:
+        pat_token = resolve_pat_token(args.pat_token)
     projects = [p.strip() for p in args.projects.split(",")] if args.projects else []
+    additional_pat_tokens = args.additional_pat_token or [
+        pat.strip() for pat in os.environ.get("AZURE_DEVOPS_ADDITIONAL_PATS", "").split(",") if pat.strip()
+    ]
+    pool_maxsize, pool_maxsize_by_host = parse_pool_sizes(args.pool_size)
     return ScannerConfig(
         organization=args.organization,
-        job_id=args.job_id,
+        job_id=args.resume or args.job_id,
         pat_token=pat_token,
+        additional_pat_tokens=additional_pat_tokens,
+        bearer_tokens=args.bearer_token or [],
         results_dir=args.results_dir,
         projects=projects,
         top_branches_to_scan=args.top_branches_to_scan,
@@ -89,4 +251,31 @@ def parse_config(argv=None):
         skip_feeds=args.skip_feeds,
         skip_committer_stats=args.skip_committer_stats,
         skip_builds=args.skip_builds,
+        transport=args.transport,
+        rate_limit=args.rate_limit,
+        pool_maxsize=pool_maxsize,
+        pool_maxsize_by_host=pool_maxsize_by_host,
+        session_per_thread=args.session_per_thread,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        cache_ttl_hours=args.cache_ttl_hours,
+        page_sizes=parse_page_sizes(args.page_size),
+        prefetch_pages=args.prefetch_pages,
+        record_dir=args.record,
+        replay_dir=args.replay,
+        api_base_url=args.api_base_url,
+        max_retries=args.max_retries,
+        breaker_threshold=args.breaker_threshold,
+        breaker_reset_seconds=args.breaker_reset_seconds,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        read_timeouts=parse_read_timeouts(args.read_timeout_for),
+        max_scan_minutes=args.max_scan_minutes,
+        time_budget_minutes=args.time_budget / 60 if args.time_budget else None,
+        max_in_flight=args.max_in_flight,
+        class_limits=parse_class_limits(args.class_limit),
+        concurrency=args.concurrency,
+        max_concurrency=args.max_concurrency,
+        resume=bool(args.resume),
+        plan=args.plan,
     )
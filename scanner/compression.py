@@ -0,0 +1,115 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Content-Encoding negotiation and streaming decompression.
+
+Every request advertises `ACCEPT_ENCODING`: gzip and deflate always, brotli
+when the optional `brotli` (or `brotlicffi`) package is installed, which is
+also what urllib3 needs to decode it. `Decompressor` undoes a
+`Content-Encoding` chunk by chunk for transports that read the raw body
+themselves, and `wire_bytes` reports how many body bytes crossed the network
+for a response, compressed or not.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+SUPPORTED_ENCODINGS = ("gzip", "deflate", "br") if brotli is not None else ("gzip", "deflate")
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS)
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits):
+        self._first = True
+        self._wbits = wbits
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data):
+        if not self._first:
+            return self._obj.decompress(data)
+        self._first = False
+        try:
+            return self._obj.decompress(data)
+        except zlib.error:
+            if self._wbits != zlib.MAX_WBITS:
+                raise
+            # Some servers send raw deflate without the zlib header.
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._obj.decompress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._obj.process(data) if hasattr(self._obj, "process") else self._obj.decompress(data)
+
+    def flush(self):
+        return b""
+
+
+def _decoder(encoding):
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+class Decompressor:
+    """Streaming decoder for a `Content-Encoding` header value.
+
+    Multiple codings (`gzip, br`) are undone in reverse order; `identity` and
+    an empty header pass the data through.
+    """
+
+    def __init__(self, content_encoding):
+        codings = [coding.strip().lower() for coding in (content_encoding or "").split(",")]
+        self._decoders = [_decoder(coding) for coding in reversed(codings) if coding and coding != "identity"]
+
+    def decompress(self, data):
+        for decoder in self._decoders:
+            data = decoder.decompress(data)
+        return data
+
+    def flush(self):
+        data = b""
+        for decoder in self._decoders:
+            # Output flushed from an outer coding still has to pass the inner ones.
+            data = (decoder.decompress(data) if data else b"") + decoder.flush()
+        return data
+
+
+def wire_bytes(response):
+    """Body bytes received for `response` before decompression."""
+    counted = getattr(response, "wire_bytes", None)
+    if isinstance(counted, int):
+        return counted
+    tell = getattr(getattr(response, "raw", None), "tell", None)
+    if callable(tell):
+        try:
+            read = tell()
+        except Exception:
+            read = None
+        if isinstance(read, int) and read > 0:
+            return read
+    return len(getattr(response, "content", b"") or b"")
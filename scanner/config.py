@@ -16,6 +16,8 @@ class ScannerConfig:
     organization: str
     job_id: str
     pat_token: str
+    additional_pat_tokens: List[str] = field(default_factory=list)  # More PATs, each with its own rate-limit budget
+    bearer_tokens: List[str] = field(default_factory=list)  # Service principal / managed identity access tokens
     results_dir: Optional[str] = None
     projects: List[str] = field(default_factory=list)
     top_branches_to_scan: int = 5
@@ -26,3 +28,32 @@ class ScannerConfig:
     skip_feeds: bool = False  # Skip artifact feeds scanning
     skip_committer_stats: bool = False  # Skip committer stats calculation
     skip_builds: bool = False  # Skip builds scanning
+    # HTTP layer settings
+    transport: str = "sync"  # "sync" (requests), "async" (aiohttp event loop) or "http2" (httpx HTTP/2)
+    rate_limit: float = 100.0  # Initial/max requests per second per host, 0 disables the limiter
+    pool_maxsize: int = 32  # Connections kept per host
+    pool_maxsize_by_host: dict = field(default_factory=dict)  # Per-host overrides, e.g. {"dev.azure.com": 64}
+    session_per_thread: bool = False  # One HTTP session per worker thread
+    cache_dir: Optional[str] = None  # Conditional-request (ETag) cache directory, disabled when unset
+    cache_max_mb: int = 512  # Evict least recently used cache entries above this size
+    cache_ttl_hours: float = 168  # Discard cache entries older than this
+    page_sizes: dict = field(default_factory=dict)  # Per endpoint family page size overrides, e.g. {"builds": 500}
+    prefetch_pages: bool = False  # Request the next page while the current one is processed
+    record_dir: Optional[str] = None  # Record every HTTP exchange into this cassette directory
+    replay_dir: Optional[str] = None  # Serve HTTP exchanges from this cassette directory, no network access
+    api_base_url: Optional[str] = None  # Send https://<host>/... to <api_base_url>/<host>/... (local mock server)
+    max_retries: int = 6  # Retries for connection errors and 5xx, jittered backoff
+    breaker_threshold: int = 5  # Consecutive failures that open an endpoint family's circuit breaker, 0 disables
+    breaker_reset_seconds: float = 30.0  # Seconds an open breaker sheds requests before a probe
+    connect_timeout: float = 10.0  # Seconds to establish a connection
+    read_timeout: float = 60.0  # Seconds to wait for response data
+    read_timeouts: dict = field(default_factory=dict)  # Read timeout override per endpoint family
+    max_scan_minutes: Optional[float] = None  # Scan deadline; remaining optional steps are skipped once it passes
+    time_budget_minutes: Optional[float] = None  # Scan deadline that also ranks work by value, lower-value sections stopping first
+    max_in_flight: int = 32  # Requests in flight at once across all threads, 0 disables the request scheduler
+    class_limits: dict = field(default_factory=dict)  # In-flight limit per priority class (critical, normal, bulk)
+    concurrency: Optional[int] = None  # Fixed worker threads per fan-out; unset lets the AIMD autotuner choose
+    max_concurrency: int = 16  # Upper bound for the autotuned worker count
+    resume: bool = False  # Continue job_id from its checkpoint instead of starting over
+    plan: bool = False  # Only list and sample the organization and estimate the scan's cost (scanner.planner)
+    org_project_ids: List[str] = field(default_factory=list)  # Shard workers: every wellformed project of the organization
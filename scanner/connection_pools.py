@@ -0,0 +1,84 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Connection pool helpers: per-host sizing, pool accounting, per-thread sessions."""
+
+import threading
+
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+ADO_HOSTS = ("dev.azure.com", "vssps.dev.azure.com", "feeds.dev.azure.com", "pkgs.dev.azure.com")
+DEFAULT_POOL_MAXSIZE = 32
+
+
+def parse_pool_sizes(values, default=DEFAULT_POOL_MAXSIZE):
+    """Parse `--pool-size` values: a bare number sets the default, `HOST=N` a host override."""
+    by_host = {}
+    for value in values or []:
+        if "=" in value:
+            host, size = value.split("=", 1)
+            by_host[host.strip().lower()] = int(size)
+        else:
+            default = int(value)
+    return default, by_host
+
+
+def counting_pool_classes(on_event):
+    """Return urllib3 pool classes that report checkouts, new connections and discards."""
+
+    def _counting(base):
+        class CountingPool(base):
+            def _new_conn(self):
+                on_event(self.host, "new_connection")
+                return super()._new_conn()
+
+            def _get_conn(self, timeout=None):
+                on_event(self.host, "checkout")
+                return super()._get_conn(timeout=timeout)
+
+            def _put_conn(self, conn):
+                if conn is not None and self.pool is not None and self.pool.full():
+                    on_event(self.host, "discarded")
+                return super()._put_conn(conn)
+
+        CountingPool.__name__ = f"Counting{base.__name__}"
+        return CountingPool
+
+    return {"http": _counting(HTTPConnectionPool), "https": _counting(HTTPSConnectionPool)}
+
+
+class ThreadLocalSessions:
+    """Session-like wrapper that hands each worker thread its own session."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._factory()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url, **kwargs):
+        return self._session().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._session().post(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
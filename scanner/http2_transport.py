@@ -0,0 +1,158 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Optional HTTP/2 transport for the HTTP layer (requires `httpx[http2]`).
+
+One thread-safe `httpx.Client` is shared by every worker thread. Against an
+HTTP/2 server (dev.azure.com and the other ADO hosts) concurrent requests
+become streams on a single connection per host instead of one TCP/TLS
+connection each, so raising concurrency does not open more sockets through
+the egress proxy. Plain `http://` URLs (the local mock server) use HTTP/1.1.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+import requests
+
+from scanner.connection_pools import DEFAULT_POOL_MAXSIZE
+from scanner.http_client import BufferedResponse
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+def http2_transport_available():
+    return httpx is not None
+
+
+class Http2Transport:
+    """Session-like transport backed by an HTTP/2 `httpx.Client`.
+
+    Exposes `get`/`post` with the same keyword signature as `requests.Session`
+    and mirrors the retry policy of `requests_session_with_retries`: transport
+    errors and `status_forcelist` responses are retried with the same backoff,
+    and with a limiter 429s pause the host and are re-sent.
+    """
+
+    def __init__(
+        self,
+        max_connections=None,
+        total=6,
+        backoff_factor=1,
+        status_forcelist=(500, 502, 503, 504),
+        limiter=None,
+        on_pool_event=None,
+        max_throttle_retries=6,
+    ):
+        if httpx is None:
+            raise RuntimeError("httpx with HTTP/2 support (httpx[http2]) is required for the http2 transport")
+        self.limiter = limiter
+        self.on_pool_event = on_pool_event
+        self.total = total
+        self.max_throttle_retries = max_throttle_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = set(status_forcelist)
+        max_connections = max_connections or DEFAULT_POOL_MAXSIZE
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            # Timeouts are passed per request, as with the requests transport.
+            timeout=None,
+        )
+
+    def _backoff(self, attempt):
+        # Same curve as urllib3 Retry: no wait on the first retry, then factor * 2^(n-1).
+        if attempt <= 1:
+            return 0
+        return min(self.backoff_factor * (2 ** (attempt - 1)), 120)
+
+    def _retry_after(self, response):
+        try:
+            return max(float(response.headers.get("Retry-After", 0)), 0.0)
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _client_timeout(timeout):
+        """httpx timeout for a requests-style `timeout` (seconds or `(connect, read)`)."""
+        if timeout is None:
+            return None
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=read)
+
+    def _request(self, method, url, headers=None, data=None, timeout=None):
+        attempt = 0
+        throttle_attempt = 0
+        started = time.monotonic()
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire(url, headers)
+            try:
+                resp = self._client.request(
+                    method, url, headers=headers, content=data, timeout=self._client_timeout(timeout)
+                )
+            except httpx.TransportError as err:
+                if attempt >= self.total:
+                    if isinstance(err, httpx.ConnectTimeout):
+                        raise requests.exceptions.ConnectTimeout(str(err)) from err
+                    if isinstance(err, httpx.TimeoutException):
+                        raise requests.exceptions.ReadTimeout(str(err)) from err
+                    raise requests.exceptions.ConnectionError(str(err)) from err
+                attempt += 1
+                logger.debug(f"Retrying {method} {url} after connection error ({attempt}/{self.total}): {err}")
+                time.sleep(self._backoff(attempt))
+                continue
+            if self.on_pool_event is not None:
+                self.on_pool_event(resp.url.host, "checkout")
+                if resp.http_version == "HTTP/2":
+                    self.on_pool_event(resp.url.host, "http2_stream")
+            response = BufferedResponse(
+                resp.status_code,
+                resp.headers,
+                resp.content,
+                str(resp.url),
+                resp.reason_phrase,
+                resp.encoding,
+                resp.num_bytes_downloaded,
+            )
+
+            if self.limiter is not None:
+                pause = self.limiter.observe(url, response.status_code, response.headers, headers)
+                if pause and throttle_attempt < self.max_throttle_retries:
+                    throttle_attempt += 1
+                    continue
+            elif response.status_code == 429 and attempt < self.total:
+                attempt += 1
+                time.sleep(self._retry_after(response) or self._backoff(attempt))
+                continue
+
+            if response.status_code in self.status_forcelist and attempt < self.total:
+                attempt += 1
+                logger.debug(f"Retrying {method} {url} after HTTP {response.status_code} ({attempt}/{self.total})")
+                time.sleep(self._retry_after(response) or self._backoff(attempt))
+                continue
+            response.retries = attempt + throttle_attempt
+            response.elapsed = timedelta(seconds=time.monotonic() - started)
+            return response
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        return self._request("GET", url, headers=headers, timeout=timeout)
+
+    def post(self, url, headers=None, data=None, timeout=None, **kwargs):
+        return self._request("POST", url, headers=headers, data=data, timeout=timeout)
+
+    def close(self):
+        self._client.close()
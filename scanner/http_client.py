@@ -8,28 +8,254 @@
 ####
 
 import logging
+from datetime import timedelta
+
 import requests
 from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from urllib3.util.retry import Retry
 
+from scanner.connection_pools import (
+    ADO_HOSTS,
+    DEFAULT_POOL_MAXSIZE,
+    ThreadLocalSessions,
+    counting_pool_classes,
+)
+from scanner.compression import ACCEPT_ENCODING
+from scanner.json_codec import loads
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+class BufferedResponse:
+    """Minimal `requests.Response` look-alike for bodies that are already in memory.
+
+    Used for async transport responses and cached bodies so every path shares
+    `decode_response`. `content` is always the decoded body; `wire_bytes` is
+    what was received for it (compressed size, 0 for bodies served locally).
+    """
+
+    def __init__(self, status_code, headers, content, url, reason=None, encoding=None, wire_bytes=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.content = content or b""
+        self.url = url
+        self.reason = reason or ""
+        self.encoding = encoding or "utf-8"
+        self.retries = 0
+        self.elapsed = timedelta(0)
+        self.wire_bytes = len(self.content) if wire_bytes is None else wire_bytes
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return loads(self.content)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        chunk_size = chunk_size or len(self.content) or 1
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 500:
+            kind = "Client Error"
+        elif 500 <= self.status_code < 600:
+            kind = "Server Error"
+        else:
+            return
+        raise requests.exceptions.HTTPError(
+            f"{self.status_code} {kind}: {self.reason} for url: {self.url}", response=self
+        )
+
+
+class ScannerHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with optional rate limiting and connection pool accounting.
 
-def requests_session_with_retries(total=6, backoff_factor=1, status_forcelist=(500, 502, 503, 504)):
+    With a limiter, 429 responses are not retried by urllib3; they are fed to
+    the limiter, which pauses the whole host, and the request is re-sent once
+    the pause is over. With `on_pool_event`, the adapter's pools report
+    checkouts, new connections and discarded connections.
+    """
+
+    def __init__(self, limiter=None, max_throttle_retries=6, on_pool_event=None, **kwargs):
+        self.limiter = limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.on_pool_event = on_pool_event
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.on_pool_event is not None:
+            self.poolmanager.pool_classes_by_scheme = counting_pool_classes(self.on_pool_event)
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        attempt = 0
+        while True:
+            self.limiter.acquire(request.url, request.headers)
+            response = super().send(request, **kwargs)
+            pause = self.limiter.observe(request.url, response.status_code, response.headers, request.headers)
+            if not pause or attempt >= self.max_throttle_retries:
+                response.throttle_retries = attempt
+                return response
+            attempt += 1
+            logger.debug(f"Re-sending {request.method} {request.url} after throttle ({attempt}/{self.max_throttle_retries})")
+            response.close()
+
+
+def requests_session_with_retries(
+    total=6,
+    backoff_factor=1,
+    status_forcelist=(500, 502, 503, 504),
+    limiter=None,
+    pool_maxsize=None,
+    pool_maxsize_by_host=None,
+    on_pool_event=None,
+    max_throttle_retries=6,
+):
     session = requests.Session()
     retry_strategy = Retry(
         total=total,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
         allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],
+        # With a limiter, Retry-After is handled by the adapter instead of a
+        # urllib3 sleep inside the worker thread.
+        respect_retry_after_header=limiter is None,
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
+    if limiter is None and pool_maxsize is None and on_pool_event is None:
+        session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
+        return session
+
+    def _adapter(maxsize):
+        return ScannerHTTPAdapter(
+            limiter=limiter,
+            max_throttle_retries=max_throttle_retries,
+            on_pool_event=on_pool_event,
+            max_retries=retry_strategy,
+            pool_maxsize=maxsize,
+        )
+
+    pool_maxsize = pool_maxsize or DEFAULT_POOL_MAXSIZE
+    pool_maxsize_by_host = pool_maxsize_by_host or {}
+    session.mount("https://", _adapter(pool_maxsize))
+    # Plain http is only used against a local stand-in (see `RebasedSession`).
+    session.mount("http://", _adapter(pool_maxsize))
+    # One adapter (and therefore one pool manager) per ADO host, so a burst on
+    # one host cannot evict or exhaust the connections of another.
+    for host in set(ADO_HOSTS) | set(pool_maxsize_by_host):
+        session.mount(f"https://{host}/", _adapter(pool_maxsize_by_host.get(host, pool_maxsize)))
     return session
 
 
 http = requests_session_with_retries()
 
+TRANSPORTS = ("sync", "async", "http2")
+
+
+def build_transport(
+    transport="sync", limiter=None, session_per_thread=False, transport_retries=True, throttle_retries=6, **pool_options
+):
+    """Return the session-like object used for ADO calls.
+
+    `sync` is a `requests` session (the shared one unless options are given,
+    optionally one per worker thread); `async` multiplexes requests on a single
+    asyncio event loop and falls back to `sync` when aiohttp is missing;
+    `http2` multiplexes the worker threads' requests as HTTP/2 streams over
+    one connection per host and falls back to `sync` when httpx[http2] is
+    missing.
+    `pool_options` are `pool_maxsize`, `pool_maxsize_by_host` and `on_pool_event`.
+
+    With `transport_retries=False` the transport sends every request once
+    (throttle re-sends through the limiter excepted) and leaves connection
+    error and 5xx retries to the caller. `throttle_retries` caps those
+    re-sends; with 0 every 429 is returned to the caller.
+    """
+    retry_options = {"max_throttle_retries": throttle_retries}
+    if not transport_retries:
+        retry_options.update(total=0, status_forcelist=())
+    if transport == "async":
+        from scanner.async_transport import AsyncTransport, async_transport_available
+
+        if async_transport_available():
+            # aiohttp keeps one connector for all hosts, capped by max_in_flight.
+            return AsyncTransport(limiter=limiter, on_pool_event=pool_options.get("on_pool_event"), **retry_options)
+        logger.warning("Async transport requested but aiohttp is not installed; using the sync transport")
+    elif transport == "http2":
+        from scanner.http2_transport import Http2Transport, http2_transport_available
+
+        if http2_transport_available():
+            # Per-thread sessions would defeat multiplexing; the client is shared.
+            return Http2Transport(
+                max_connections=pool_options.get("pool_maxsize"),
+                limiter=limiter,
+                on_pool_event=pool_options.get("on_pool_event"),
+                **retry_options,
+            )
+        logger.warning("HTTP/2 transport requested but httpx[http2] is not installed; using the sync transport")
+    elif transport != "sync":
+        raise ValueError(f"Unknown transport '{transport}', expected one of {', '.join(TRANSPORTS)}")
+    if limiter is None and not session_per_thread and transport_retries and throttle_retries == 6 and not any(pool_options.values()):
+        return http
+
+    def _factory():
+        return requests_session_with_retries(limiter=limiter, **retry_options, **pool_options)
+
+    if session_per_thread:
+        return ThreadLocalSessions(_factory)
+    return _factory()
+
+
+class RebasedSession:
+    """Session-like wrapper that sends `https://<host>/<path>` to `<base_url>/<host>/<path>`.
+
+    Used to point a scan at the local mock server (`scanner.mock_ado`)
+    without touching the URLs the services build.
+    """
+
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        if hasattr(session, "get_many"):
+            self.get_many = self._get_many
+
+    def rebase(self, url):
+        if url.startswith("https://"):
+            return f"{self.base_url}/{url[len('https://'):]}"
+        return url
+
+    def get(self, url, **kwargs):
+        return self.session.get(url=self.rebase(url), **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(url=self.rebase(url), **kwargs)
+
+    def _get_many(self, urls, headers=None, timeout=None):
+        return self.session.get_many([self.rebase(url) for url in urls], headers=headers, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
 
 class AdoHttpClient:
     def __init__(self, token: str):
@@ -43,40 +269,61 @@ class AdoHttpClient:
         }
 
     def get_json(self, url):
-        response = http.get(url=url, headers=self.headers)
+        response = http.get(url=url, headers=self.headers, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return data["value"] if "value" in data else data
 
     def get_text(self, url):
-        response = http.get(url=url, headers=self.headers)
+        response = http.get(url=url, headers=self.headers, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         return response.text
 
     def post_json(self, url, payload):
-        response = http.post(url=url, headers=self.headers, data=payload)
+        response = http.post(url=url, headers=self.headers, data=payload, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         return response.json()
 
 
-def fetch_data(url, token, qret=False):
-    headers = {
+def auth_headers(token, scheme="Basic"):
+    return {
         "Content-Type": "application/json",
-        "Authorization": f"Basic {token}",
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Authorization": f"{scheme} {token}",
     }
+
+
+def retry_count(response):
+    """Retries spent on `response`: transport retries, throttle re-sends and `HttpOps` retries."""
+    retries = getattr(response, "retries", None)
+    if not isinstance(retries, int):
+        history = getattr(getattr(getattr(response, "raw", None), "retries", None), "history", None)
+        retries = len(history) if history else 0
+    return retries + getattr(response, "throttle_retries", 0) + getattr(response, "scanner_retries", 0)
+
+
+def fetch_data(url, token, qret=False, session=None):
+    session = session or http
     try:
         logger.debug(f"Fetching data from {url}")
         try:
-            response = http.get(url=url, headers=headers)
+            response = session.get(url=url, headers=auth_headers(token), timeout=DEFAULT_TIMEOUT)
         except ConnectionResetError as cre:
             logger.warning(f"Connection reset error: {cre}")
             return None
+        return decode_response(response, qret=qret)
+    except Exception as err:
+        logger.error(f"Error fetching data: {err}")
+        return None
+
 
+def decode_response(response, qret=False):
+    try:
         if qret:
             return response.text
 
         response.raise_for_status()
-        data = response.json()
+        data = loads(response.content)
 
         return data["value"] if "value" in data.keys() else data
     except requests.exceptions.HTTPError as http_err:
@@ -86,17 +333,21 @@ def fetch_data(url, token, qret=False):
         return None
 
 
-def fetch_data_with_headers(url, token):
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Basic {token}",
-    }
-
+def fetch_data_with_headers(url, token, session=None):
+    session = session or http
     try:
         logger.debug(f"Fetching data with headers from {url}")
-        response = http.get(url=url, headers=headers)
+        response = session.get(url=url, headers=auth_headers(token), timeout=DEFAULT_TIMEOUT)
+    except Exception as err:
+        logger.error(f"Error fetching data: {err}")
+        return None, None
+    return decode_response_with_headers(response)
+
+
+def decode_response_with_headers(response):
+    try:
         response.raise_for_status()
-        data = response.json()
+        data = loads(response.content)
         result_data = data["value"] if "value" in data.keys() else data
         return result_data, response.headers
     except requests.exceptions.HTTPError as http_err:
@@ -107,16 +358,20 @@ def fetch_data_with_headers(url, token):
         return None, None
 
 
-def post_data(url, payload, token):
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Basic {token}",
-    }
+def post_data(url, payload, token, session=None):
+    session = session or http
+    try:
+        response = session.post(url=url, headers=auth_headers(token), data=payload, timeout=DEFAULT_TIMEOUT)
+    except Exception as err:
+        return None, str(err)
+    return decode_post_response(response)
+
+
+def decode_post_response(response):
     try:
-        response = http.post(url=url, headers=headers, data=payload)
         response.raise_for_status()
-        logger.debug(f"Data posted to {url}")
-        return response.json(), None
+        logger.debug(f"Data posted to {response.url}")
+        return loads(response.content), None
     except requests.exceptions.HTTPError as http_err:
         try:
             error_message = response.json().get("message", str(http_err))
@@ -0,0 +1,146 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""JSON decoding for API responses.
+
+`loads` uses orjson when it is installed and the standard library otherwise.
+`iter_items` decodes a response body incrementally from its chunks and yields
+the elements of the top-level `value` array (or of a top-level array) one at a
+time, so only the current element and one chunk are held as text.
+"""
+
+import codecs
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _ItemReader:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_chars=1):
+        """Append at least `min_chars` of input; returns False once the input is exhausted."""
+        if self._eof:
+            return False
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        added = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            self._buffer += text
+            added += len(text)
+            if added >= min_chars:
+                return True
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return added > 0
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of input'}'")
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Incomplete element: at least double the pending text so a
+                # large element is re-scanned a logarithmic number of times.
+                if self._fill(max(len(self._buffer) - self._pos, 1)):
+                    continue
+                raise
+            if end == len(self._buffer) and not self._eof and self._fill():
+                # A number at the very end of the buffer may continue in the next chunk.
+                continue
+            self._pos = end
+            return value
+
+    def _array(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            found = self._peek()
+            self._pos += 1
+            if found == "]":
+                return
+            if found != ",":
+                raise ValueError(f"Expected ',' or ']' in array but found '{found or 'end of input'}'")
+
+    def items(self):
+        first = self._peek()
+        if first == "":
+            raise ValueError("Empty response body")
+        if first == "[":
+            self._pos += 1
+            yield from self._array()
+            return
+        if first != "{":
+            self._value()
+            return
+        self._pos += 1
+        while True:
+            found = self._peek()
+            if found == "}":
+                self._pos += 1
+                return
+            if found == ",":
+                self._pos += 1
+                continue
+            key = self._value()
+            self._expect(":")
+            if key == "value" and self._peek() == "[":
+                self._pos += 1
+                yield from self._array()
+            else:
+                # Other top-level keys (`count`, ...) are small; read past them
+                # so the connection is fully drained and can be reused.
+                self._value()
+
+
+def iter_items(chunks):
+    """Yield the `value` items of a JSON body given as an iterable of byte chunks.
+
+    Mirrors `normalize_to_list`: a top-level array yields its elements, an
+    object yields the elements of its `value` array and anything else yields
+    nothing. Malformed input raises `ValueError`.
+    """
+    return _ItemReader(chunks).items()
@@ -0,0 +1,711 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Local stand-in for the Azure DevOps REST endpoints the scanner calls.
+
+The server answers `<base>/<ado-host>/<organization>/...`, which is where the
+scanner sends `https://<ado-host>/<organization>/...` when it runs with
+`--api-base-url <base>`. The organization is synthetic and deterministic: its
+size comes from `MockOrgSpec` and every entity is derived from its indexes,
+so even a 1000-project organization costs no memory up front. `FaultSpec`
+adds latency, 429s (with `Retry-After` and `X-RateLimit-*` headers) and 5xx.
+
+Continuation-token endpoints honour `$top`/`top` and `continuationToken`;
+`$skip` endpoints (commits, pull requests, feed packages) honour `$top` and
+`$skip`. Unknown endpoints answer an empty list. Bodies of at least
+`COMPRESS_MIN_BYTES` are gzip-encoded when the client accepts gzip, as Azure
+DevOps does.
+"""
+
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from scanner.rate_limiter import identity_of
+from scanner.services.runtime import endpoint_family
+
+DEFAULT_PAGE_SIZE = 100
+COMPRESS_MIN_BYTES = 1024
+_NAMESPACE = uuid.UUID("6f1c1d6e-0b7a-4c1e-9a57-3f5d0e6c2a10")
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class MockOrgSpec:
+    organization: str = "mockorg"
+    projects: int = 10
+    definitions_per_project: int = 5
+    builds_per_definition: int = 5
+    repos_per_project: int = 2
+    branches_per_repo: int = 5
+    commits_per_repo: int = 20
+    pull_requests_per_repo: int = 5
+    endpoints_per_project: int = 2
+    variable_groups_per_project: int = 2
+    environments_per_project: int = 1
+    pools: int = 3
+    feeds: int = 2
+    packages_per_feed: int = 10
+    users: int = 10
+    tasks: int = 50
+
+
+@dataclass
+class FaultSpec:
+    latency_ms: float = 0.0  # Added to every response
+    jitter_ms: float = 0.0  # Uniform extra latency in [0, jitter_ms]
+    throttle_rate: float = 0.0  # Fraction of requests answered with 429
+    error_rate: float = 0.0  # Fraction of requests answered with 503
+    retry_after: float = 1.0  # Seconds advertised in Retry-After on 429
+    failing_families: tuple = ()  # Endpoint families that always answer 503
+    identity_rps: float = 0.0  # Requests per second allowed per Authorization header before 429, 0 disables
+    seed: int = 0
+
+
+def _id(*parts):
+    return str(uuid.uuid5(_NAMESPACE, "/".join(str(part) for part in parts)))
+
+
+def _timestamp(minutes):
+    return (_EPOCH + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _recent(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+PIPELINE_YAML = """trigger:
+  - main
+pool:
+  vmImage: ubuntu-latest
+steps:
+  - script: echo building {name}
+  - task: AzureCLI@2
+    inputs:
+      azureSubscription: {endpoint}
+      scriptType: bash
+      inlineScript: az account show
+"""
+
+
+class SyntheticOrg:
+    """Deterministic Azure DevOps organization generated from `MockOrgSpec`."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.org = spec.organization
+        self._projects = [self._project(index) for index in range(spec.projects)]
+        self._project_by_key = {}
+        for index, project in enumerate(self._projects):
+            self._project_by_key[project["id"]] = index
+            self._project_by_key[project["name"].lower()] = index
+
+    # Entities ---------------------------------------------------------------
+
+    def _project(self, index):
+        return {
+            "id": _id("project", index),
+            "name": f"project-{index:04d}",
+            "state": "wellFormed",
+            "visibility": "private",
+            "revision": index,
+            "lastUpdateTime": _timestamp(index),
+            "url": f"https://dev.azure.com/{self.org}/_apis/projects/{_id('project', index)}",
+        }
+
+    def project_index(self, key):
+        return self._project_by_key.get(unquote(key).lower())
+
+    def repo(self, p, r):
+        project = self._projects[p]
+        name = f"repo-{r:03d}"
+        return {
+            "id": _id("repo", p, r),
+            "name": name,
+            "url": f"https://dev.azure.com/{self.org}/{project['name']}/_apis/git/repositories/{name}",
+            "defaultBranch": "refs/heads/main",
+            "size": 1024 * (r + 1),
+            "isDisabled": False,
+            "project": {"id": project["id"], "name": project["name"], "state": "wellFormed"},
+        }
+
+    def endpoint(self, p, e):
+        project = self._projects[p]
+        return {
+            "id": _id("endpoint", p, e),
+            "name": f"azure-{p:04d}-{e:02d}",
+            "type": "azurerm",
+            "url": "https://management.azure.com/",
+            "isShared": False,
+            "isReady": True,
+            "authorization": {"scheme": "WorkloadIdentityFederation", "parameters": {"tenantid": _id("tenant")}},
+            "data": {"subscriptionId": _id("subscription", p), "subscriptionName": f"sub-{p}"},
+            "serviceEndpointProjectReferences": [
+                {"projectReference": {"id": project["id"], "name": project["name"]}, "name": f"azure-{p:04d}-{e:02d}"}
+            ],
+        }
+
+    def definition(self, p, d):
+        project = self._projects[p]
+        repo = self.repo(p, d % max(self.spec.repos_per_project, 1))
+        return {
+            "id": d + 1,
+            "name": f"pipeline-{d:03d}",
+            "path": "\\",
+            "type": "build",
+            "queueStatus": "enabled",
+            "revision": 1,
+            "project": {"id": project["id"], "name": project["name"]},
+            "repository": {
+                "id": repo["id"],
+                "name": repo["name"],
+                "url": f"https://dev.azure.com/{self.org}/{project['name']}/_git/{repo['name']}",
+                "defaultBranch": "refs/heads/main",
+                "type": "TfsGit",
+            },
+            "process": {"type": 2, "yamlFilename": "azure-pipelines.yml"},
+            "queue": {"id": p * 10 + 1, "name": "Azure Pipelines"},
+            "_links": {"self": {"href": f"https://dev.azure.com/{self.org}/{project['id']}/_apis/build/Definitions/{d + 1}"}},
+        }
+
+    def build(self, p, d, b):
+        project = self._projects[p]
+        build_id = (p * 1000 + d) * 1000 + b + 1
+        finish = b * 60 + d
+        return {
+            "id": build_id,
+            "buildNumber": f"2025.{b + 1}",
+            "status": "completed",
+            "result": "succeeded" if b % 5 else "failed",
+            "queueTime": _timestamp(finish - 5),
+            "startTime": _timestamp(finish - 4),
+            "finishTime": _timestamp(finish),
+            "sourceBranch": f"refs/heads/{'main' if b % 2 == 0 else 'feature-1'}",
+            "reason": "individualCI",
+            "definition": {"id": d + 1, "name": f"pipeline-{d:03d}"},
+            "project": {"id": project["id"], "name": project["name"]},
+            "repository": {"id": self.repo(p, d % max(self.spec.repos_per_project, 1))["id"], "type": "TfsGit"},
+            "requestedFor": {"displayName": f"User {b % self.spec.users}", "uniqueName": f"user{b % self.spec.users}@example.com"},
+            "templateParameters": {},
+            "_links": {"self": {"href": f"https://dev.azure.com/{self.org}/{project['id']}/_apis/build/Builds/{build_id}"}},
+        }
+
+    def commit(self, p, r, c):
+        user = c % max(self.spec.users, 1)
+        return {
+            "commitId": uuid.uuid5(_NAMESPACE, f"commit/{p}/{r}/{c}").hex + "00000000",
+            "author": {"name": f"User {user}", "email": f"user{user}@example.com", "date": _recent(c % 80)},
+            "committer": {"name": f"User {user}", "email": f"user{user}@example.com", "date": _recent(c % 80)},
+            "push": {
+                "pushId": c + 1,
+                "date": _recent(c % 80),
+                "pushedBy": {"displayName": f"User {user}", "uniqueName": f"user{user}@example.com"},
+            },
+            "changeCounts": {"Add": c % 3, "Edit": c % 5, "Delete": c % 2},
+            "comment": f"Change {c}",
+        }
+
+    # Collections -----------------------------------------------------------
+
+    def projects(self, query):
+        return [] if query.get("stateFilter") == "deleted" else self._projects
+
+    def definitions(self, p):
+        return [self.definition(p, d) for d in range(self.spec.definitions_per_project)]
+
+    def builds(self, p, definition_id):
+        return [self.build(p, definition_id - 1, b) for b in range(self.spec.builds_per_definition)]
+
+    def repos(self, p):
+        return [self.repo(p, r) for r in range(self.spec.repos_per_project)]
+
+    def branches(self, p, r, name_filter):
+        names = ["main"] + [f"feature-{index}" for index in range(1, self.spec.branches_per_repo)]
+        refs = [{"name": f"refs/heads/{name}", "objectId": _id("ref", p, r, name).replace("-", "")[:40]} for name in names]
+        if name_filter and name_filter != "heads/":
+            refs = [ref for ref in refs if ref["name"] == f"refs/{name_filter}"]
+        return refs
+
+    def endpoints(self, p):
+        return [self.endpoint(p, e) for e in range(self.spec.endpoints_per_project)]
+
+    def execution_history(self, p, e):
+        return [
+            {
+                "data": {
+                    "id": index + 1,
+                    "planType": "Build",
+                    "result": "succeeded",
+                    "startTime": _timestamp(index * 60 - 1),
+                    "finishTime": _timestamp(index * 60),
+                    "owner": {"id": self.build(p, index % max(self.spec.definitions_per_project, 1), index)["id"], "name": f"pipeline-{index:03d}"},
+                },
+                "endpointId": _id("endpoint", p, e),
+            }
+            for index in range(self.spec.builds_per_definition)
+        ]
+
+    def pools(self):
+        return [
+            {"id": index + 1, "name": f"pool-{index}", "scope": _id("scope"), "isHosted": index == 0, "poolType": "automation", "size": 2}
+            for index in range(self.spec.pools)
+        ]
+
+    def queues(self, p):
+        project = self._projects[p]
+        return [
+            {"id": p * 10 + index + 1, "name": f"pool-{index}", "projectId": project["id"], "pool": {"id": index + 1, "name": f"pool-{index}"}}
+            for index in range(self.spec.pools)
+        ]
+
+    def variable_groups(self, p):
+        project = self._projects[p]
+        return [
+            {
+                "id": p * 100 + index + 1,
+                "name": f"vars-{index}",
+                "type": "Vsts",
+                "variables": {"ENVIRONMENT": {"value": "dev"}, "API_KEY": {"isSecret": True}},
+                "variableGroupProjectReferences": [{"projectReference": {"id": project["id"], "name": project["name"]}, "name": f"vars-{index}"}],
+            }
+            for index in range(self.spec.variable_groups_per_project)
+        ]
+
+    def environments(self, p):
+        project = self._projects[p]
+        return [
+            {"id": p * 100 + index + 1, "name": f"env-{index}", "project": {"id": project["id"], "name": project["name"]}, "resources": []}
+            for index in range(self.spec.environments_per_project)
+        ]
+
+    def feeds(self):
+        return [
+            {"id": _id("feed", index), "name": f"feed-{index}", "upstreamEnabled": True, "upstreamSources": []}
+            for index in range(self.spec.feeds)
+        ]
+
+    def packages(self, feed_id):
+        return [
+            {
+                "id": _id("package", feed_id, index),
+                "name": f"package-{index}",
+                "protocolType": ("npm", "nuget", "maven", "python")[index % 4],
+                "versions": [{"version": f"1.0.{index}", "isLatest": True}],
+            }
+            for index in range(self.spec.packages_per_feed)
+        ]
+
+    def users(self):
+        users = [
+            {
+                "subjectKind": "user",
+                "domain": "Build",
+                "principalName": self._projects[p]["id"],
+                "displayName": f"{self._projects[p]['name']} Build Service ({self.org})",
+                "descriptor": f"svc.{p}",
+            }
+            for p in range(len(self._projects))
+        ]
+        users += [
+            {"subjectKind": "user", "domain": "AgentPool", "principalName": _id("user", index), "displayName": f"Agent Pool Service ({index})"}
+            for index in range(self.spec.users)
+        ]
+        return users
+
+    def tasks(self):
+        return [
+            {"id": _id("task", index), "name": f"Task{index}", "version": {"major": 1, "minor": 0, "patch": index}, "author": "Mock"}
+            for index in range(self.spec.tasks)
+        ]
+
+
+# Routing --------------------------------------------------------------------
+
+_PROJECT = r"/(?P<project>[^/_][^/]*)"
+_ROUTES = []
+
+
+def _route(method, pattern, paging=None):
+    def register(handler):
+        _ROUTES.append((method, re.compile(pattern + r"/?$"), paging, handler))
+        return handler
+
+    return register
+
+
+@_route("GET", r"/_apis/projects", "continuation")
+def _projects(org, m, q):
+    return org.projects(q)
+
+
+@_route("GET", _PROJECT + r"/_apis/build/generalsettings")
+def _general_settings(org, m, q):
+    return {"enforceReferencedRepoScopedToken": True, "disableClassicPipelineCreation": False, "enforceJobAuthScope": True}
+
+
+@_route("GET", _PROJECT + r"/_apis/build/metrics/(?P<agg>\w+)")
+def _project_metrics(org, m, q):
+    return {"count": 1, "value": [{"name": "TotalBuilds", "intValue": 10, "date": _timestamp(0)}]}
+
+
+@_route("GET", _PROJECT + r"/_apis/projectanalysis/languagemetrics")
+def _language_metrics(org, m, q):
+    return {"repositoryLanguageAnalytics": [], "languageBreakdown": [{"name": "Python", "languagePercentage": 100.0}]}
+
+
+@_route("GET", r"/_apis/distributedtask/tasks")
+def _tasks(org, m, q):
+    return org.tasks()
+
+
+@_route("GET", _PROJECT + r"/_apis/build/definitions", "continuation")
+def _definitions(org, m, q):
+    return [{key: value for key, value in definition.items() if key in ("id", "name", "path", "queueStatus", "revision")} for definition in org.definitions(m["p"])]
+
+
+@_route("GET", _PROJECT + r"/_apis/build/definitions/(?P<definition>\d+)")
+def _definition(org, m, q):
+    definition = int(m["definition"])
+    return org.definition(m["p"], definition - 1) if definition <= org.spec.definitions_per_project else None
+
+
+@_route("GET", _PROJECT + r"/_apis/build/definitions/(?P<definition>\d+)/metrics")
+def _definition_metrics(org, m, q):
+    return {"count": 1, "value": [{"name": "SuccessfulBuilds", "intValue": 4, "date": _timestamp(0)}]}
+
+
+@_route("GET", _PROJECT + r"/_apis/build/definitions/(?P<definition>\d+)/yaml")
+def _definition_yaml(org, m, q):
+    return {"yaml": PIPELINE_YAML.format(name=m["definition"], endpoint=org.endpoint(m["p"], 0)["name"])}
+
+
+@_route("GET", _PROJECT + r"/_apis/build/definitions/(?P<definition>\d+)/resources")
+def _definition_resources(org, m, q):
+    return [{"type": "endpoint", "id": endpoint["id"], "authorized": True} for endpoint in org.endpoints(m["p"])[:1]]
+
+
+@_route("GET", _PROJECT + r"/_apis/build/builds", "continuation")
+def _builds(org, m, q):
+    definition = int(q.get("definitions", "1").split(",")[0])
+    return org.builds(m["p"], definition)
+
+
+@_route("GET", _PROJECT + r"/_apis/build/builds/(?P<build>\d+)/logs/(?P<log>\d+)")
+def _build_log(org, m, q):
+    return PIPELINE_YAML.format(name=m["build"], endpoint=org.endpoint(m["p"], 0)["name"])
+
+
+@_route("POST", _PROJECT + r"/_apis/pipelines/(?P<pipeline>\d+)/preview")
+def _preview(org, m, q):
+    return {"finalYaml": PIPELINE_YAML.format(name=m["pipeline"], endpoint=org.endpoint(m["p"], 0)["name"])}
+
+
+@_route("GET", _PROJECT + r"/_apis/git/repositories", "continuation")
+def _repos(org, m, q):
+    return org.repos(m["p"])
+
+
+def _repo_index(org, m):
+    repo_ids = [repo["id"] for repo in org.repos(m["p"])]
+    return repo_ids.index(m["repo"]) if m["repo"] in repo_ids else None
+
+
+@_route("GET", _PROJECT + r"/_apis/git/repositories/(?P<repo>[^/]+)/refs", "continuation")
+def _refs(org, m, q):
+    r = _repo_index(org, m)
+    return None if r is None else org.branches(m["p"], r, q.get("filter"))
+
+
+@_route("GET", _PROJECT + r"/_apis/git/repositories/(?P<repo>[^/]+)/commits", "skip")
+def _commits(org, m, q):
+    r = _repo_index(org, m)
+    if r is None:
+        return None
+    count = org.spec.commits_per_repo
+    if "searchCriteria.$top" in q:
+        count = min(count, int(q["searchCriteria.$top"]))
+    return [org.commit(m["p"], r, c) for c in range(count)]
+
+
+@_route("GET", _PROJECT + r"/_apis/git/repositories/(?P<repo>[^/]+)/pullrequests", "skip")
+def _pull_requests(org, m, q):
+    statuses = ("active", "completed", "abandoned")
+    return [{"pullRequestId": index + 1, "status": statuses[index % 3]} for index in range(org.spec.pull_requests_per_repo)]
+
+
+@_route("GET", _PROJECT + r"/_apis/pipelines/checks/configurations")
+def _checks(org, m, q):
+    if int(m["p"]) % 2:
+        return []
+    return [
+        {
+            "id": 1,
+            "type": {"id": _id("check-type", "approval"), "name": "Approval"},
+            "settings": {"approvers": [{"displayName": "User 0", "uniqueName": "user0@example.com"}], "minRequiredApprovers": 1},
+            "resource": {"type": q.get("resourceType"), "id": q.get("resourceId")},
+        }
+    ]
+
+
+@_route("GET", _PROJECT + r"/_apis/pipelines/pipelinepermissions/(?P<kind>\w+)/(?P<resource>[^/]+)")
+def _pipeline_permissions(org, m, q):
+    return {
+        "resource": {"type": m["kind"], "id": m["resource"]},
+        "allPipelines": {"authorized": m["kind"] == "queue"},
+        "pipelines": [{"id": d + 1, "authorized": True} for d in range(min(org.spec.definitions_per_project, 2))],
+    }
+
+
+@_route("GET", _PROJECT + r"/_apis/serviceendpoint/endpoints", "continuation")
+def _endpoints(org, m, q):
+    return org.endpoints(m["p"])
+
+
+@_route("GET", r"(?:" + _PROJECT + r")?/_apis/serviceendpoint/(?P<endpoint>[^/]+)/executionhistory", "continuation")
+def _execution_history(org, m, q):
+    p = m["p"] or 0
+    endpoint_ids = [endpoint["id"] for endpoint in org.endpoints(p)]
+    e = endpoint_ids.index(m["endpoint"]) if m["endpoint"] in endpoint_ids else 0
+    return org.execution_history(p, e)
+
+
+@_route("GET", r"/_apis/distributedtask/pools", "continuation")
+def _pools(org, m, q):
+    return org.pools()
+
+
+@_route("GET", _PROJECT + r"/_apis/distributedtask/queues", "continuation")
+def _queues(org, m, q):
+    return org.queues(m["p"])
+
+
+@_route("GET", _PROJECT + r"/_apis/distributedtask/variablegroups", "continuation")
+def _variable_groups(org, m, q):
+    return org.variable_groups(m["p"])
+
+
+@_route("GET", _PROJECT + r"/_apis/distributedtask/environments", "continuation")
+def _environments(org, m, q):
+    return org.environments(m["p"])
+
+
+@_route("GET", _PROJECT + r"/_apis/distributedtask/environments/(?P<environment>\d+)")
+def _environment(org, m, q):
+    environment_id = int(m["environment"])
+    return next((environment for environment in org.environments(m["p"]) if environment["id"] == environment_id), None)
+
+
+@_route("GET", r"(?:" + _PROJECT + r")?/_apis/packaging/feeds", "continuation")
+def _feeds(org, m, q):
+    return org.feeds() if m["p"] is None else []
+
+
+@_route("GET", r"(?:" + _PROJECT + r")?/_apis/packaging/feeds/(?P<feed>[^/]+)/packages", "skip")
+def _packages(org, m, q):
+    return org.packages(m["feed"])
+
+
+@_route("GET", r"/_apis/graph/users", "continuation")
+def _graph_users(org, m, q):
+    return org.users()
+
+
+def _page(items, query, paging):
+    """Slice `items` for the request; returns `(page, continuation_token)`."""
+    top = query.get("$top") or query.get("top")
+    top = int(top) if top else DEFAULT_PAGE_SIZE
+    if paging == "skip":
+        start = int(query.get("$skip", 0) or 0)
+        return items[start : start + top], None
+    start = int(query.get("continuationToken", 0) or 0)
+    end = start + top
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+class MockAdoServer:
+    """Threaded HTTP server serving a `SyntheticOrg`; use as a context manager."""
+
+    def __init__(self, spec=None, faults=None, host="127.0.0.1", port=0, compress=True):
+        self.org = SyntheticOrg(spec or MockOrgSpec())
+        self.compress = compress
+        self.faults = faults or FaultSpec()
+        self._random = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self.requests_total = 0
+        self.requests_by_family = defaultdict(int)
+        self.responses_by_status = defaultdict(int)
+        self.body_bytes = 0
+        self.wire_bytes = 0
+        self.requests_by_identity = defaultdict(int)
+        self._identity_windows = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ado", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests_total": self.requests_total,
+                "requests_by_family": dict(self.requests_by_family),
+                "responses_by_status": {str(status): count for status, count in self.responses_by_status.items()},
+                "body_bytes": self.body_bytes,
+                "wire_bytes": self.wire_bytes,
+                "requests_by_identity": dict(self.requests_by_identity),
+            }
+
+    def _fault(self):
+        """Return a status to inject (429/503) or None, after the configured latency."""
+        faults = self.faults
+        with self._lock:
+            jitter = self._random.uniform(0, faults.jitter_ms) if faults.jitter_ms else 0.0
+            roll = self._random.random()
+        if faults.latency_ms or jitter:
+            time.sleep((faults.latency_ms + jitter) / 1000.0)
+        if roll < faults.throttle_rate:
+            return 429
+        if roll < faults.throttle_rate + faults.error_rate:
+            return 503
+        return None
+
+    def _identity_throttled(self, authorization):
+        """Per-identity budget: more than `identity_rps` requests in the current second get a 429."""
+        identity = identity_of({"Authorization": authorization})
+        now = time.monotonic()
+        with self._lock:
+            self.requests_by_identity[identity] += 1
+            if not self.faults.identity_rps:
+                return False
+            started, count = self._identity_windows.get(identity, (now, 0))
+            if now - started >= 1.0:
+                started, count = now, 0
+            self._identity_windows[identity] = (started, count + 1)
+            return count + 1 > self.faults.identity_rps
+
+    def handle(self, method, raw_path, authorization=None):
+        """Answer one request; returns `(status, headers, body_bytes)`."""
+        split = urlsplit(raw_path)
+        segments = split.path.lstrip("/").split("/", 2)
+        query = {key: values[-1] for key, values in parse_qs(split.query, keep_blank_values=True).items()}
+        if len(segments) < 2 or segments[1] != self.org.org:
+            return 404, {}, b'{"message": "Unknown organization"}'
+        ado_host = segments[0]
+        path = "/" + (segments[2] if len(segments) > 2 else "")
+        family = endpoint_family(f"https://{ado_host}/{self.org.org}{path}")
+        with self._lock:
+            self.requests_total += 1
+            self.requests_by_family[family] += 1
+        if family in self.faults.failing_families:
+            return 503, {}, b'{"message": "Service Unavailable"}'
+        if self._identity_throttled(authorization):
+            return 429, {"Retry-After": "1", "X-RateLimit-Resource": "ATCPU", "X-RateLimit-Remaining": "0", "X-RateLimit-Limit": str(int(self.faults.identity_rps))}, b'{"message": "Request was blocked due to exceeding usage of resource"}'
+
+        injected = self._fault()
+        if injected == 429:
+            return 429, {"Retry-After": str(self.faults.retry_after), "X-RateLimit-Resource": "ATCPU", "X-RateLimit-Remaining": "0", "X-RateLimit-Limit": "200"}, b'{"message": "Request was blocked due to exceeding usage of resource"}'
+        if injected == 503:
+            return 503, {}, b'{"message": "Service Unavailable"}'
+
+        for route_method, pattern, paging, handler in _ROUTES:
+            match = pattern.match(path) if route_method == method else None
+            if match is None:
+                continue
+            groups = match.groupdict()
+            if groups.get("project") is not None:
+                groups["p"] = self.org.project_index(groups["project"])
+                if groups["p"] is None:
+                    return 404, {}, b'{"message": "Project not found"}'
+            else:
+                groups["p"] = None
+            result = handler(self.org, groups, query)
+            if result is None:
+                return 404, {}, b'{"message": "Not found"}'
+            if isinstance(result, str):
+                return 200, {"Content-Type": "text/plain; charset=utf-8"}, result.encode()
+            headers = {"Content-Type": "application/json; charset=utf-8"}
+            if isinstance(result, list):
+                page, token = _page(result, query, paging) if paging else (result, None)
+                if token:
+                    headers["x-ms-continuationtoken"] = token
+                result = {"count": len(page), "value": page}
+            return 200, headers, json.dumps(result).encode()
+        return 200, {"Content-Type": "application/json; charset=utf-8"}, b'{"count": 0, "value": []}'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without TCP_NODELAY every
+            # keep-alive response waits for the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, headers, body = server.handle(method, self.path, self.headers.get("Authorization"))
+                body_bytes = len(body)
+                accepted = {coding.split(";")[0].strip().lower() for coding in self.headers.get("Accept-Encoding", "").split(",")}
+                if server.compress and "gzip" in accepted and body_bytes >= COMPRESS_MIN_BYTES:
+                    body = gzip.compress(body, compresslevel=6)
+                    headers = {**headers, "Content-Encoding": "gzip"}
+                with server._lock:
+                    server.responses_by_status[status] += 1
+                    server.body_bytes += body_bytes
+                    server.wire_bytes += len(body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (read timeout); nothing to answer.
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+        return Handler
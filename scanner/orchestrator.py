@@ -14,13 +14,30 @@ from datetime import datetime
 from pathlib import Path
 
 from scanner.ado_client import AzureDevOpsManager
-from scanner.output import write_scan_result
+from scanner.checkpoint import CheckpointStore, checkpoint_dir, config_fingerprint
+from scanner.output import write_http_metrics, write_scan_result
 from scanner.html_report import write_html_report
+from scanner.http_client import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
 from scanner.services.identity_resolution import IdentityResolutionService
+from scanner.stage_graph import Stage, StageGraph
 from scanner.filters import filter_builds, filter_definitions, filter_protected_resources
 
 logger = logging.getLogger(__name__)
 
+# Stage outputs run_scan reads once the stage graph has run.
+SCAN_RESULT_VALUES = (
+    "stats",
+    "tasks",
+    "definitions",
+    "builds",
+    "inventory",
+    "build_service_accounts",
+    "commits",
+    "committer_stats",
+    "artifacts",
+    "deferred_retries",
+)
+
 
 def setup_logging(job_id: str, results_dir: str = None):
     """
@@ -148,7 +165,219 @@ def default_build_settings_expectations():
     }
 
 
-def run_scan(config, scanner_version: str):
+def build_http_options(config):
+    """Map the HTTP layer settings of a ScannerConfig onto HttpOps keyword arguments."""
+    cache_dir = getattr(config, 'cache_dir', None)
+    max_scan_minutes = getattr(config, 'max_scan_minutes', None)
+    time_budget_minutes = getattr(config, 'time_budget_minutes', None)
+    deadline_minutes = min(minutes for minutes in (max_scan_minutes, time_budget_minutes, float("inf")) if minutes)
+    return {
+        "transport": getattr(config, 'transport', 'sync'),
+        "rate_limit": getattr(config, 'rate_limit', 100.0),
+        "pool_maxsize": getattr(config, 'pool_maxsize', None),
+        "pool_maxsize_by_host": getattr(config, 'pool_maxsize_by_host', None),
+        "session_per_thread": getattr(config, 'session_per_thread', False),
+        "cache_dir": cache_dir,
+        "cache_max_bytes": int(getattr(config, 'cache_max_mb', 512) * 1024 * 1024),
+        "cache_ttl_seconds": getattr(config, 'cache_ttl_hours', 168) * 3600,
+        "page_sizes": getattr(config, 'page_sizes', None),
+        "prefetch_pages": getattr(config, 'prefetch_pages', False),
+        "record_dir": getattr(config, 'record_dir', None),
+        "replay_dir": getattr(config, 'replay_dir', None),
+        "api_base_url": getattr(config, 'api_base_url', None),
+        "max_retries": getattr(config, 'max_retries', 6),
+        "breaker_threshold": getattr(config, 'breaker_threshold', 5),
+        "breaker_reset_seconds": getattr(config, 'breaker_reset_seconds', 30.0),
+        "connect_timeout": getattr(config, 'connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+        "read_timeout": getattr(config, 'read_timeout', DEFAULT_READ_TIMEOUT),
+        "read_timeouts": getattr(config, 'read_timeouts', None),
+        "deadline_seconds": deadline_minutes * 60 if deadline_minutes != float("inf") else None,
+        "time_budget": bool(time_budget_minutes),
+        "max_in_flight": getattr(config, 'max_in_flight', 32),
+        "class_limits": getattr(config, 'class_limits', None),
+        "concurrency": getattr(config, 'concurrency', None),
+        "max_concurrency": getattr(config, 'max_concurrency', 16),
+    }
+
+
+def build_scan_stages(
+    az_manager, top_branches_to_scan=5, skip_builds=False, skip_feeds=False, skip_committer_stats=False, checkpoint=None
+):
+    """The scan as a graph of stages; see `StageGraph` for how they are run.
+
+    Stages that mutate the protected-resource inventory in place publish it
+    under a new name (`inventory_checked`, `inventory_permissions`, ...) so
+    everything that reads it runs after them. Checks and commits also publish
+    the fetches they deferred, so a resumed scan can still report them.
+    """
+    deadline = az_manager.deadline
+
+    def language_metrics():
+        return az_manager.get_project_language_metrics(az_manager.projects.values())
+
+    def task_list():
+        tasks = az_manager.get_task_list()
+        logger.debug(f"Retrieved {len(tasks)} task definitions")
+        return tasks
+
+    def pipelines():
+        definitions, builds = az_manager.get_builds_per_definition_per_project(
+            top_branches_to_scan=top_branches_to_scan,
+            skip_builds=skip_builds,
+            progress=checkpoint.progress("pipelines") if checkpoint is not None else None,
+        )
+        logger.debug(f"Found {len(definitions)} definitions and {len(builds)} builds")
+        return definitions, builds
+
+    def authorised_resources(pipeline_definitions):
+        return az_manager.get_build_definition_authorised_resources(pipeline_definitions)
+
+    def protected_resources():
+        return az_manager.get_protected_resources(build_starter_inventory())
+
+    def service_connection_usage(pipeline_builds, inventory_discovered):
+        return az_manager.resources_service.attach_used_service_connections_to_builds(
+            pipeline_builds, inventory_discovered.get("endpoint", {}).get("protected_resources", [])
+        )
+
+    def checks(inventory_discovered):
+        inventory = az_manager.get_checks_approvals(inventory_discovered)
+        return inventory, az_manager.http_ops.retry_ledger.pending("checks")
+
+    def permissions(inventory_checked, authorised_definitions, builds):
+        inventory = az_manager.get_permissions(inventory_checked, authorised_definitions, builds)
+        return az_manager.enrich_resource_protection_and_cross_project(inventory)
+
+    def enriched_definitions(authorised_definitions, inventory_permissions):
+        return az_manager.get_enriched_build_definitions(authorised_definitions, inventory_permissions)
+
+    def build_service_accounts():
+        accounts = az_manager.get_all_build_service_accounts()
+        logger.debug(f"Found {len(accounts)} build service accounts")
+        return accounts
+
+    def repository_commits(inventory_discovered):
+        if deadline.should_skip("repository commits"):
+            return [], []
+        commits = az_manager.get_commits_per_repository(inventory_discovered["repository"]["protected_resources"])
+        logger.debug(f"Retrieved {len(commits)} commits")
+        return commits, az_manager.http_ops.retry_ledger.pending("repository_commits")
+
+    def artifact_feeds():
+        if skip_feeds or deadline.should_skip("artifact feeds"):
+            if skip_feeds:
+                logger.info("Skipping artifact feeds scanning")
+            return {"active": [], "recyclebin": []}
+        artifacts = az_manager.get_artifacts_feeds()
+        logger.debug(f"Found {len(artifacts.get('active', []))} active feeds, {len(artifacts.get('recyclebin', []))} in recycle bin")
+        return artifacts
+
+    def deferred_retries(collected_commits, inventory_permissions, definitions, checks_deferred, commits_deferred):
+        # Checks and commits defer their transient failures; they are retried
+        # once here, in the order of a sequential scan: after protection was
+        # derived and definitions enriched, before anything uses the commits.
+        # Recovered data is written into the commits and inventory in place,
+        # so both are published again under the names later stages read.
+        ledger = az_manager.http_ops.retry_ledger
+        live = [entity for entity, _ in ledger.pending()]
+        for entity, error in checks_deferred + commits_deferred:
+            # Deferred by a stage restored from a checkpoint: the retry itself
+            # could not be saved, so the entity is reported as incomplete.
+            if entity not in live:
+                ledger.record(entity, error)
+        summary = az_manager.retry_deferred_fetches()
+        if summary["incomplete"]:
+            logger.warning(f"{len(summary['incomplete'])} entities are incomplete after the retry pass")
+        return summary, collected_commits, inventory_permissions
+
+    def committer_statistics(commits, build_service_accounts, inventory_retried):
+        if skip_committer_stats or deadline.should_skip("committer statistics"):
+            logger.info("Skipping committer stats calculation")
+            return [], inventory_retried
+        committer_stats = az_manager.get_committer_stats(commits, build_service_accounts=build_service_accounts)
+        logger.debug(f"Generated stats for {len(committer_stats)} committers")
+        inventory_retried["repository"]["protected_resources"] = az_manager.enrich_repositories_with_committer_stats(
+            inventory_retried["repository"]["protected_resources"], commits
+        )
+        return committer_stats, inventory_retried
+
+    def enriched_stats(language_stats, inventory, definitions, builds, commits, artifacts):
+        return az_manager.get_enriched_stats(language_stats, inventory, definitions, builds, commits, artifacts)
+
+    return [
+        Stage("language_metrics", language_metrics, (), ("language_stats",), "Gathering project metrics..."),
+        Stage("tasks", task_list, (), ("tasks",), "Gathering tasks..."),
+        Stage("pipelines", pipelines, (), ("pipeline_definitions", "pipeline_builds"), "Collecting build definitions and builds..."),
+        Stage("authorised_resources", authorised_resources, ("pipeline_definitions",), ("authorised_definitions",)),
+        Stage("protected_resources", protected_resources, (), ("inventory_discovered",), "Scanning protected resources..."),
+        Stage("service_connection_usage", service_connection_usage, ("pipeline_builds", "inventory_discovered"), ("builds",)),
+        Stage("checks", checks, ("inventory_discovered",), ("inventory_checked", "checks_deferred"), "Analyzing checks and approvals..."),
+        Stage(
+            "permissions",
+            permissions,
+            ("inventory_checked", "authorised_definitions", "builds"),
+            ("inventory_permissions",),
+            "Analyzing permissions...",
+        ),
+        Stage("enriched_definitions", enriched_definitions, ("authorised_definitions", "inventory_permissions"), ("definitions",)),
+        Stage("build_service_accounts", build_service_accounts, (), ("build_service_accounts",)),
+        Stage("commits", repository_commits, ("inventory_discovered",), ("collected_commits", "commits_deferred"), "Collecting repository commits..."),
+        Stage("feeds", artifact_feeds, (), ("artifacts",), None if skip_feeds else "Scanning artifact feeds..."),
+        Stage(
+            "deferred_retries",
+            deferred_retries,
+            ("collected_commits", "inventory_permissions", "definitions", "checks_deferred", "commits_deferred"),
+            ("deferred_retries", "commits", "inventory_retried"),
+        ),
+        Stage(
+            "committer_stats",
+            committer_statistics,
+            ("commits", "build_service_accounts", "inventory_retried"),
+            ("committer_stats", "inventory"),
+            None if skip_committer_stats else "Calculating committer statistics...",
+        ),
+        Stage(
+            "stats",
+            enriched_stats,
+            ("language_stats", "inventory", "definitions", "builds", "commits", "artifacts"),
+            ("stats",),
+            "Enriching statistics...",
+        ),
+    ]
+
+
+def resource_counts(projects, protected_resources, definitions, builds, commits, committer_stats, artifacts):
+    """The organisation-level `resource_counts` of a scan result."""
+    return {
+        "projects": len(projects),
+        "pools": len(protected_resources["pools"]["protected_resources"]),
+        "queue": len(protected_resources["queue"]["protected_resources"]),
+        "endpoint": len(protected_resources["endpoint"]["protected_resources"]),
+        "variablegroup": len(protected_resources["variablegroup"]["protected_resources"]),
+        "securefile": len(protected_resources["securefile"]["protected_resources"]),
+        "repository": len(protected_resources["repository"]["protected_resources"]),
+        "environment": len(protected_resources["environment"]["protected_resources"]),
+        "pipelines": len(definitions),
+        "builds": len(builds),
+        "commits": len(commits),
+        "committers": len(committer_stats),
+        "artifacts_feeds": len(artifacts["active"]) if "active" in artifacts else 0
+        + len(artifacts["recyclebin"])
+        if "recyclebin" in artifacts
+        else 0,
+        "artifacts_packages": sum(len(feed.get("packages", [])) for feed in artifacts.get("active", []))
+        if "active" in artifacts
+        else 0,
+    }
+
+
+def run_scan(config, scanner_version: str, scheduler=None, configure_logging=True):
+    """Scan one organization and write its results.
+
+    `scheduler` replaces the scan's own request scheduler (a batch scan shares
+    one across organizations); with `configure_logging=False` the caller's
+    logging setup is kept.
+    """
     organization = config.organization
     job_id = config.job_id
     pat_token = config.pat_token
@@ -160,6 +389,10 @@ def run_scan(config, scanner_version: str):
     skip_feeds = getattr(config, 'skip_feeds', False)
     skip_committer_stats = getattr(config, 'skip_committer_stats', False)
     skip_builds = getattr(config, 'skip_builds', False)
+    resume = getattr(config, 'resume', False)
+    http_options = build_http_options(config)
+    if scheduler is not None:
+        http_options["scheduler"] = scheduler
 
     if not organization:
         raise ValueError("Organization must be provided")
@@ -169,202 +402,183 @@ def run_scan(config, scanner_version: str):
         raise ValueError("Personal Access Token (PAT) must be provided")
 
     # Setup logging
-    setup_logging(job_id=job_id, results_dir=results_dir)
+    if configure_logging:
+        setup_logging(job_id=job_id, results_dir=results_dir)
     
+    checkpoint = CheckpointStore(
+        checkpoint_dir(results_dir, job_id), config_fingerprint(config, scanner_version), resume=resume
+    )
+
     start_date = datetime.now().isoformat()
-    logger.info(f"Starting scan for {organization} (Job ID: {job_id})")
+    logger.info(f"{'Resuming' if resume else 'Starting'} scan for {organization} (Job ID: {job_id})")
     logger.debug(f"Configuration: projects={projects}, top_branches={top_branches_to_scan}, "
-                 f"skip_builds={skip_builds}, skip_feeds={skip_feeds}, skip_committer_stats={skip_committer_stats}")
+                 f"skip_builds={skip_builds}, skip_feeds={skip_feeds}, skip_committer_stats={skip_committer_stats}, "
+                 f"http_options={ {k: v for k, v in http_options.items() if k not in ('cache_dir', 'scheduler')} }")
     
     az_manager = AzureDevOpsManager(
         organization=organization,
         project_filter=projects if projects else [],
         default_build_settings_expectations=default_build_settings_expectations(),
         pat_token=pat_token,
+        additional_pat_tokens=getattr(config, 'additional_pat_tokens', []),
+        bearer_tokens=getattr(config, 'bearer_tokens', []),
+        org_project_ids=getattr(config, 'org_project_ids', []),
+        **http_options,
     )
 
-    logger.info("Gathering project metrics and tasks...")
-    stats = az_manager.get_project_language_metrics(az_manager.projects.values())
-    tasks = az_manager.get_task_list()
-    logger.debug(f"Retrieved {len(tasks)} task definitions")
-    
-    logger.info("Collecting build definitions and builds...")
-    definitions, builds = az_manager.get_builds_per_definition_per_project(top_branches_to_scan=top_branches_to_scan, skip_builds=skip_builds)
-    logger.debug(f"Found {len(definitions)} definitions and {len(builds)} builds")
-    
-    definitions = az_manager.get_build_definition_authorised_resources(definitions)
-    
-    logger.info("Scanning protected resources...")
-    protected_resources_inventory_resources = az_manager.get_protected_resources(build_starter_inventory())
-    builds = az_manager.resources_service.attach_used_service_connections_to_builds(
-        builds,
-        protected_resources_inventory_resources.get("endpoint", {}).get("protected_resources", [])
-    )
-    
-    logger.info("Analyzing checks, approvals, and permissions...")
-    protected_resources_inventory_resources_checks = az_manager.get_checks_approvals(protected_resources_inventory_resources)
-    protected_resources_inventory_resources_checks_definitions = az_manager.get_permissions(
-        protected_resources_inventory_resources_checks, definitions, builds
-    )
-    protected_resources_inventory_resources_checks_definitions = az_manager.enrich_resource_protection_and_cross_project(
-        protected_resources_inventory_resources_checks_definitions
-    )
-    definitions = az_manager.get_enriched_build_definitions(definitions, protected_resources_inventory_resources_checks_definitions)
-    build_service_accounts = az_manager.get_all_build_service_accounts()
-    logger.debug(f"Found {len(build_service_accounts)} build service accounts")
-    
-    logger.info("Collecting repository commits...")
-    commits = az_manager.get_commits_per_repository(
-        protected_resources_inventory_resources_checks_definitions["repository"]["protected_resources"]
-    )
-    logger.debug(f"Retrieved {len(commits)} commits")
-    if skip_committer_stats:
-        logger.info("Skipping committer stats calculation")
-        committer_stats = []
-        protected_resources_inventory_resources_checks_definitions["repository"]["protected_resources"] = \
-            protected_resources_inventory_resources_checks_definitions["repository"]["protected_resources"]
-    else:
-        logger.info("Calculating committer statistics...")
-        committer_stats = az_manager.get_committer_stats(commits, build_service_accounts=build_service_accounts)
-        logger.debug(f"Generated stats for {len(committer_stats)} committers")
-        protected_resources_inventory_resources_checks_definitions["repository"][
-            "protected_resources"
-        ] = az_manager.enrich_repositories_with_committer_stats(
-            protected_resources_inventory_resources_checks_definitions["repository"]["protected_resources"], commits
+    try:
+        deadline = az_manager.deadline
+        # Once the deadline has cut something short, later outputs may be
+        # incomplete; they are not checkpointed so a resumed scan collects them.
+        checkpoint.writable = lambda: not deadline.truncated
+        graph = StageGraph(
+            build_scan_stages(
+                az_manager,
+                top_branches_to_scan=top_branches_to_scan,
+                skip_builds=skip_builds,
+                skip_feeds=skip_feeds,
+                skip_committer_stats=skip_committer_stats,
+                checkpoint=checkpoint,
+            ),
+            checkpoint=checkpoint,
         )
-    
-    # Optionally skip artifact feeds scanning
-    if skip_feeds:
-        logger.info("Skipping artifact feeds scanning")
-        artifacts = {"active": [], "recyclebin": []}
-    else:
-        logger.info("Scanning artifact feeds...")
-        artifacts = az_manager.get_artifacts_feeds()
-        logger.debug(f"Found {len(artifacts.get('active', []))} active feeds, "
-                     f"{len(artifacts.get('recyclebin', []))} in recycle bin")
-    
-    logger.info("Enriching statistics...")
-    stats = az_manager.get_enriched_stats(
-        stats, protected_resources_inventory_resources_checks_definitions, definitions, builds, commits, artifacts
-    )
+        values = graph.run(results=SCAN_RESULT_VALUES)
+        stats = values["stats"]
+        tasks = values["tasks"]
+        definitions = values["definitions"]
+        builds = values["builds"]
+        protected_resources_inventory_resources_checks_definitions = values["inventory"]
+        build_service_accounts = values["build_service_accounts"]
+        commits = values["commits"]
+        committer_stats = values["committer_stats"]
+        artifacts = values["artifacts"]
+        deferred_retries = values["deferred_retries"]
+        stage_timings = graph.summary()
+        logger.debug(f"Stage timings: {stage_timings}")
 
-    project_refs = [
-        {"id": proj["id"], "name": proj["name"]}
-        for proj in az_manager.projects.values()
-        if "id" in proj and "name" in proj
-    ]
-    logger.debug(f"Processing {len(project_refs)} project references")
-    
-    # ADD "last_run_date" to pipeline definitions
-    logger.debug("Adding last run dates to pipeline definitions")
-    for definition in definitions:
-        if "builds" in definition and isinstance(definition["builds"], dict) and "builds" in definition["builds"]:
-            builds_list = definition["builds"]["builds"]
-            if isinstance(builds_list, list) and len(builds_list) > 0:
-                latest_build_id = max(builds_list)
-                latest_build = next((b for b in builds if b.get("id") == latest_build_id), None)
-                if latest_build:
-                    definition["last_run_date"] = {
-                        "id": latest_build.get("id"),
-                        "queueTime": latest_build.get("queueTime"),
-                        "startTime": latest_build.get("startTime"),
-                        "finishTime": latest_build.get("finishTime"),
-                    }
-
-    # Filter builds
-    logger.info("Applying filters to scan results...")
-    filtered_builds = filter_builds(builds)
-    logger.debug(f"Filtered builds: {len(builds)} -> {len(filtered_builds)}")
-
-    # Filter build definitions
-    filtered_definitions = filter_definitions(definitions)
-    logger.debug(f"Filtered definitions: {len(definitions)} -> {len(filtered_definitions)}")
-
-    # Filter protected resources for each type
-    filtered_protected_resources = {}
-    for res_type, res_data in protected_resources_inventory_resources_checks_definitions.items():
-        if "protected_resources" in res_data and isinstance(res_data["protected_resources"], list):
-            original_count = len(res_data["protected_resources"])
-            res_data["protected_resources"] = filter_protected_resources(res_data["protected_resources"])
-            logger.debug(f"Filtered {res_type}: {original_count} -> {len(res_data['protected_resources'])} resources")
-        filtered_protected_resources[res_type] = res_data
-
-    result = {
-        "scanner_version": scanner_version,
-        "id": organization,
-        "scan_start": start_date,
-        "scan_end": datetime.now().isoformat(),
-        "organisation": {
+        project_refs = [
+            {"id": proj["id"], "name": proj["name"]}
+            for proj in az_manager.projects.values()
+            if "id" in proj and "name" in proj
+        ]
+        logger.debug(f"Processing {len(project_refs)} project references")
+
+        # ADD "last_run_date" to pipeline definitions
+        logger.debug("Adding last run dates to pipeline definitions")
+        for definition in definitions:
+            if "builds" in definition and isinstance(definition["builds"], dict) and "builds" in definition["builds"]:
+                builds_list = definition["builds"]["builds"]
+                if isinstance(builds_list, list) and len(builds_list) > 0:
+                    latest_build_id = max(builds_list)
+                    latest_build = next((b for b in builds if b.get("id") == latest_build_id), None)
+                    if latest_build:
+                        definition["last_run_date"] = {
+                            "id": latest_build.get("id"),
+                            "queueTime": latest_build.get("queueTime"),
+                            "startTime": latest_build.get("startTime"),
+                            "finishTime": latest_build.get("finishTime"),
+                        }
+
+        # Filter builds
+        logger.info("Applying filters to scan results...")
+        filtered_builds = filter_builds(builds)
+        logger.debug(f"Filtered builds: {len(builds)} -> {len(filtered_builds)}")
+
+        # Filter build definitions
+        filtered_definitions = filter_definitions(definitions)
+        logger.debug(f"Filtered definitions: {len(definitions)} -> {len(filtered_definitions)}")
+
+        # Filter protected resources for each type
+        filtered_protected_resources = {}
+        for res_type, res_data in protected_resources_inventory_resources_checks_definitions.items():
+            if "protected_resources" in res_data and isinstance(res_data["protected_resources"], list):
+                original_count = len(res_data["protected_resources"])
+                res_data["protected_resources"] = filter_protected_resources(res_data["protected_resources"])
+                logger.debug(f"Filtered {res_type}: {original_count} -> {len(res_data['protected_resources'])} resources")
+            filtered_protected_resources[res_type] = res_data
+
+        result = {
+            "scanner_version": scanner_version,
             "id": organization,
-            "name": organization,
-            "url": os.environ.get("SYSTEM_COLLECTIONURI", f"https://dev.azure.com/{organization}"),
-            "type": "AzureDevOps",
-            "owner": "unknown",
-            "shadow_color": "0, 0, 0",
-            "partial_scan": True if projects else False,
-            "projects_filter": projects if projects else [],
-            "projectRefs": project_refs,
-            "resource_counts": {
-                "projects": len(az_manager.projects),
-                "pools": len(filtered_protected_resources["pools"]["protected_resources"]),
-                "queue": len(filtered_protected_resources["queue"]["protected_resources"]),
-                "endpoint": len(filtered_protected_resources["endpoint"]["protected_resources"]),
-                "variablegroup": len(filtered_protected_resources["variablegroup"]["protected_resources"]),
-                "securefile": len(filtered_protected_resources["securefile"]["protected_resources"]),
-                "repository": len(filtered_protected_resources["repository"]["protected_resources"]),
-                "environment": len(filtered_protected_resources["environment"]["protected_resources"]),
-                "pipelines": len(filtered_definitions),
-                "builds": len(filtered_builds),
-                "commits": len(commits),
-                "committers": len(committer_stats),
-                "artifacts_feeds": len(artifacts["active"]) if "active" in artifacts else 0
-                + len(artifacts["recyclebin"])
-                if "recyclebin" in artifacts
-                else 0,
-                "artifacts_packages": sum(len(feed.get("packages", [])) for feed in artifacts.get("active", []))
-                if "active" in artifacts
-                else 0,
+            "scan_start": start_date,
+            "scan_end": datetime.now().isoformat(),
+            "organisation": {
+                "id": organization,
+                "name": organization,
+                "url": os.environ.get("SYSTEM_COLLECTIONURI", f"https://dev.azure.com/{organization}"),
+                "type": "AzureDevOps",
+                "owner": "unknown",
+                "shadow_color": "0, 0, 0",
+                "partial_scan": True if projects else False,
+                "projects_filter": projects if projects else [],
+                "projectRefs": project_refs,
+                "resource_counts": resource_counts(
+                    az_manager.projects,
+                    filtered_protected_resources,
+                    filtered_definitions,
+                    filtered_builds,
+                    commits,
+                    committer_stats,
+                    artifacts,
+                ),
             },
-        },
-        "stats": stats,
-        "projects": az_manager.projects,
-        "protected_resources": filtered_protected_resources,
-        "build_definitions": filtered_definitions,
-        "builds": filtered_builds,
-        "tasks": tasks,
-        "commits": commits,
-        "committer_stats": committer_stats,
-        "build_service_accounts": build_service_accounts,
-        "artifacts": artifacts,
-    }
+            "stats": stats,
+            "projects": az_manager.projects,
+            "protected_resources": filtered_protected_resources,
+            "build_definitions": filtered_definitions,
+            "builds": filtered_builds,
+            "tasks": tasks,
+            "commits": commits,
+            "committer_stats": committer_stats,
+            "build_service_accounts": build_service_accounts,
+            "artifacts": artifacts,
+            "deferred_retries": deferred_retries,
+            "scan_stages": stage_timings,
+        }
 
-    # Optional: Resolve cloud identities for service connections, variable groups, secure files
-    # This step is fault-tolerant - if it fails, the scan continues without identity data
-    if resolve_identities:
-        logger.info("Resolving cloud identities (Entra ID, GCP)...")
-        identity_service = IdentityResolutionService(enabled=True)
-        if identity_service.is_available:
-            result = identity_service.resolve_identities(
-                result, 
-                resolve=identity_resolution_resolve
-            )
-            status = result.get('_identity_resolution', {}).get('status', 'unknown')
-            logger.info(f"Identity resolution complete: {status}")
-            logger.debug(f"Identity resolution details: {result.get('_identity_resolution', {})}")
-        else:
-            logger.warning("Identity resolution not available (laughing-lamp not installed)")
-
-    logger.info("Writing scan results...")
-    output_path = write_scan_result(result, results_dir=results_dir, job_id=job_id)
-    html_report_path = write_html_report(result, results_dir=results_dir, job_id=job_id, config=config)
-    file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    logger.debug(f"Scan result file size: {file_size_mb:.2f} MB")
-    
-    if hasattr(az_manager, "log_perf_summary"):
-        az_manager.log_perf_summary()
-    
-    logger.info(f"Scan complete. Report: {html_report_path}")
-    return result, output_path
+        # Optional: Resolve cloud identities for service connections, variable groups, secure files
+        # This step is fault-tolerant - if it fails, the scan continues without identity data
+        if resolve_identities and not deadline.should_skip("identity resolution"):
+            logger.info("Resolving cloud identities (Entra ID, GCP)...")
+            identity_service = IdentityResolutionService(enabled=True)
+            if identity_service.is_available:
+                result = identity_service.resolve_identities(
+                    result, 
+                    resolve=identity_resolution_resolve
+                )
+                status = result.get('_identity_resolution', {}).get('status', 'unknown')
+                logger.info(f"Identity resolution complete: {status}")
+                logger.debug(f"Identity resolution details: {result.get('_identity_resolution', {})}")
+            else:
+                logger.warning("Identity resolution not available (laughing-lamp not installed)")
+
+        if deadline.enabled:
+            result["scan_truncation"] = deadline.summary()
+            if result["scan_truncation"]["truncated"]:
+                logger.warning(f"Scan truncated by the {deadline.seconds:.0f}s deadline: {result['scan_truncation']}")
+            for name, section in result["scan_truncation"].get("sections", {}).items():
+                if section["status"] != "complete":
+                    logger.warning(f"Time budget: {name} {section['status']}, {section['skipped']} of {section['started'] + section['skipped']} items skipped")
+
+        logger.info("Writing scan results...")
+        output_path = write_scan_result(result, results_dir=results_dir, job_id=job_id)
+        html_report_path = write_html_report(result, results_dir=results_dir, job_id=job_id, config=config)
+        file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        logger.debug(f"Scan result file size: {file_size_mb:.2f} MB")
+
+        if hasattr(az_manager, "log_perf_summary"):
+            az_manager.log_perf_summary()
+        metrics_paths = write_http_metrics(
+            az_manager.metrics_snapshot(), az_manager.metrics_openmetrics(), results_dir=results_dir, job_id=job_id
+        )
+        logger.debug(f"HTTP metrics written to {', '.join(metrics_paths)}")
+        checkpoint.remove()
+
+        logger.info(f"Scan complete. Report: {html_report_path}")
+        return result, output_path
+    finally:
+        # Also on failure: a batch scan moves on to the next organization.
+        az_manager.close()
 
 
 def scan_azdevops(config, scanner_version: str):
@@ -25,6 +25,20 @@ def write_scan_result(result: dict, results_dir: str, job_id: str) -> str:
     return output_path
 
 
+def write_http_metrics(snapshot: dict, openmetrics_text: str, results_dir: str, job_id: str) -> tuple:
+    """Write the request metrics sidecars next to the scan result: JSON and OpenMetrics text."""
+    results_dir = os.path.abspath(results_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    safe_job_id = re.sub(r"[^a-zA-Z0-9_-]", "_", job_id)
+    json_path = os.path.join(results_dir, f"scan_{safe_job_id}_http_metrics.json")
+    openmetrics_path = os.path.join(results_dir, f"scan_{safe_job_id}_http_metrics.prom")
+    with open(json_path, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    with open(openmetrics_path, "w") as f:
+        f.write(openmetrics_text)
+    return json_path, openmetrics_path
+
+
 def format_size(size_bytes):
     if size_bytes >= 1024**3:
         return f"{size_bytes / (1024**3):.2f} GB"
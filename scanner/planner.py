@@ -0,0 +1,544 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Dry run: estimate what a scan will cost before running it.
+
+`--plan` makes only the list calls a scan starts with: projects, and per
+project the build definitions and the protected-resource lists
+(repositories, service endpoints, queues, variable groups, secure files,
+environments), plus agent pools and artifact feeds. What no list tells
+(builds per definition, branches, commits and pull requests per repository,
+packages per feed) is measured on a few definitions, repositories and feeds
+(`PLAN_SAMPLE_SIZE` of each) with the calls the scan itself makes.
+
+From those counts, `top_branches_to_scan` and the skip flags the plan
+estimates the requests per endpoint family, the wall time at the configured
+concurrency and in-flight limits, and the memory taken by the collected
+data. It is printed and written to `plan_<job-id>.json`; nothing is scanned.
+
+The wall time follows the scan's stage graph: the longest chain of requests
+that run one after the other (projects are collected in turn, a
+definition's builds before its logs, ...) plus the CPU time of parsing and
+pattern matching pipeline YAML, or, when the limits are the bottleneck, the
+request time divided by the slots of each priority class. Latencies and
+YAML CPU time are measured while planning, so plan from the machine and
+network the scan will run on.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import yaml
+
+from scanner.orchestrator import build_http_options, build_starter_inventory, setup_logging
+from scanner.output import format_size
+from scanner.services.concurrency import DEFAULT_CONCURRENCY
+from scanner.services.http_ops import HttpOps
+from scanner.services.paginator import SKIP
+from scanner.services.pipelines import load_regex_patterns
+from scanner.services.request_scheduler import DEFAULT_CLASS_LIMITS, PRIORITY_CLASSES, priority_class
+from scanner.services.runtime import ScanRuntimeState, normalize_to_list
+from scanner.services.token_pool import basic_token
+from scanner.shard import list_projects
+
+logger = logging.getLogger(__name__)
+
+PLAN_SAMPLE_SIZE = 5
+COMMIT_DAYS = 90  # Window of `RepositoriesService.get_commits_per_repository`
+ALL_BRANCHES = 1000  # `max_items` of a repository's full branch list
+UPSTREAM_PROTOCOLS = ("maven", "nuget", "npm", "python")
+# Decoded into Python objects, parsed (pipeline recipes, findings) and
+# serialized again for the result, the collected JSON takes about this many
+# times its size in memory; measured on mock scans dominated by builds and
+# by commits.
+PYTHON_OBJECT_FACTOR = 8.0
+
+
+def _pages(count, page_size):
+    """Requests to page through `count` items with continuation tokens."""
+    return max(1, math.ceil(count / page_size)) if page_size else 1
+
+
+def _json_bytes(value):
+    return len(json.dumps(value, separators=(",", ":"))) if value is not None else 0
+
+
+def _mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+
+def _spread(items, count):
+    """Up to `count` of `items`, spread evenly so one large project does not make up the sample."""
+    if len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(index * step)] for index in range(count)]
+
+
+def _map(http_ops, fn, items):
+    with http_ops.concurrency.pool() as pool:
+        futures = [pool.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def list_inventory(config, http_ops):
+    """Projects, definitions and protected resources, listed with the URLs the scan uses."""
+    organization = config.organization
+    projects = list_projects(config, http_ops)
+    wellformed = [project["id"] for project in projects if str(project.get("state", "")).lower() == "wellformed"]
+    starter = build_starter_inventory()
+    resources = {key: [] for key in starter}
+    seen = {key: set() for key in starter}
+
+    def _list(url):
+        return http_ops.fetch_all(url, page_size=0)
+
+    def _resource_url(project, value):
+        prefix = f"https://dev.azure.com/{organization}/{project}" if project else f"https://dev.azure.com/{organization}"
+        url = f"{prefix}/_apis/{value['api_endpoint']}"
+        return f"{url}?{value['query_params']}" if value.get("query_params") else url
+
+    def _project_lists(project):
+        definitions = http_ops.fetch_all(f"https://dev.azure.com/{organization}/{project}/_apis/build/definitions?api-version=7.1")
+        lists = {key: _list(_resource_url(project, value)) for key, value in starter.items() if value.get("level") != "org"}
+        return definitions, lists
+
+    def _add(key, items):
+        # Shared endpoints are listed by every project they are shared with; the scan keeps one.
+        for item in items:
+            if item.get("id") not in seen[key]:
+                seen[key].add(item.get("id"))
+                resources[key].append(item)
+
+    definitions = {}
+    if wellformed:
+        for key, value in starter.items():
+            if value.get("level") == "org":
+                _add(key, _list(_resource_url(None, value)))
+    for project, (project_definitions, lists) in zip(wellformed, _map(http_ops, _project_lists, wellformed)):
+        definitions[project] = project_definitions
+        for key, items in lists.items():
+            _add(key, items)
+    feeds = normalize_to_list(http_ops.fetch_data(f"https://feeds.dev.azure.com/{organization}/_apis/packaging/feeds?api-version=7.1"))
+    return {"projects": projects, "wellformed": wellformed, "definitions": definitions, "resources": resources, "feeds": feeds}
+
+
+def yaml_cpu_seconds(document):
+    """CPU time the scan spends on one pipeline YAML: parsing it and matching the CI/CD SAST patterns."""
+    if not document:
+        return 0.0
+    started = time.thread_time()
+    try:
+        yaml.safe_load(document)
+    except yaml.YAMLError:
+        pass
+    for pattern_info in load_regex_patterns().get("regex", []):
+        for _ in pattern_info["pattern"].finditer(document):
+            pass
+    return time.thread_time() - started
+
+
+def sample_definitions(config, http_ops, definitions):
+    """Builds per definition, and the size of a definition, a build and its YAML log."""
+    organization = config.organization
+
+    def _sample(item):
+        project, definition = item
+        base = f"https://dev.azure.com/{organization}/{project}/_apis/build"
+        detail = http_ops.fetch_data(f"{base}/definitions/{definition['id']}?api-version=7.1")
+        if config.skip_builds:
+            return {"detail_bytes": _json_bytes(detail)}
+        paginator = http_ops.paginate(f"{base}/builds?definitions={definition['id']}&api-version=7.1")
+        builds = paginator.all()
+        latest = max(builds, key=lambda build: build["id"], default=None)
+        log = http_ops.fetch_data(f"{base}/builds/{latest['id']}/logs/1?api-version=7.1", qret=True) if latest else None
+        return {
+            "detail_bytes": _json_bytes(detail),
+            "builds": len(builds),
+            "build_pages": max(1, paginator.pages_fetched),
+            "build_bytes": _mean(_json_bytes(build) for build in builds),
+            "log_bytes": len(log) if isinstance(log, str) else _json_bytes(log),
+            "yaml_cpu_seconds": yaml_cpu_seconds(log if isinstance(log, str) else None),
+        }
+
+    return _map(http_ops, _sample, definitions)
+
+
+def sample_repositories(config, http_ops, repositories):
+    """Branches, commits of the commit window and pull requests per repository."""
+    organization = config.organization
+    since_iso = (datetime.utcnow() - timedelta(days=COMMIT_DAYS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def _sample(repo):
+        base = f"https://dev.azure.com/{organization}/{repo['project']['id']}/_apis/git/repositories/{repo['id']}"
+        refs = http_ops.paginate(f"{base}/refs?api-version=7.1", page_size=100, max_items=ALL_BRANCHES)
+        # The scan lists every ref and keeps the branches.
+        ref_list = refs.all()
+        branches = [ref for ref in ref_list if ref.get("name", "").startswith("refs/heads/")]
+        commits = http_ops.paginate(
+            f"{base}/commits?searchCriteria.fromDate={since_iso}&searchCriteria.includePushData=true&api-version=7.1", style=SKIP
+        )
+        commit_list = commits.all()
+        pull_requests = http_ops.paginate(f"{base}/pullrequests?searchCriteria.status=all&api-version=7.1", style=SKIP)
+        pull_requests.all()
+        return {
+            "refs": len(ref_list),
+            "branches": len(branches),
+            "branch_pages": max(1, refs.pages_fetched),
+            "branch_bytes": _mean(_json_bytes(branch) for branch in branches),
+            "commits": len(commit_list),
+            "commit_pages": max(1, commits.pages_fetched),
+            "commit_bytes": _mean(_json_bytes(commit) for commit in commit_list),
+            "pull_request_pages": max(1, pull_requests.pages_fetched),
+        }
+
+    return _map(http_ops, _sample, repositories)
+
+
+def sample_feeds(config, http_ops, feeds):
+    """Packages per feed and how many of them get an upstream lookup."""
+    organization = config.organization
+
+    def _sample(feed):
+        project = feed.get("project")
+        scope = f"{organization}/{project['id']}" if project else organization
+        paginator = http_ops.paginate(
+            f"https://feeds.dev.azure.com/{scope}/_apis/packaging/feeds/{feed.get('id') or feed.get('name')}/packages?api-version=7.1-preview.1&includeUrls=false",
+            style=SKIP,
+        )
+        packages = paginator.all()
+        return {
+            "packages": len(packages),
+            "package_pages": max(1, paginator.pages_fetched),
+            "package_bytes": _mean(_json_bytes(package) for package in packages),
+            "upstream": sum(1 for package in packages if (package.get("protocolType") or "").lower() in UPSTREAM_PROTOCOLS),
+        }
+
+    return _map(http_ops, _sample, feeds)
+
+
+def _averages(samples):
+    keys = {key for sample in samples for key in sample}
+    return {key: _mean(sample[key] for sample in samples if key in sample) for key in keys} | {"sampled": len(samples)}
+
+
+def build_shape(inventory, definition_samples, repository_samples, feed_samples, config, page_sizes):
+    """Entity counts and per-entity averages the estimates are made from."""
+    definitions = [definition for items in inventory["definitions"].values() for definition in items]
+    resources = inventory["resources"]
+    repositories = resources["repository"]
+    repos_by_project = Counter(repo.get("project", {}).get("id") for repo in repositories)
+    endpoints = resources["endpoint"]
+    defs = _averages(definition_samples)
+    repos = _averages(repository_samples)
+    feeds = _averages(feed_samples)
+    top = config.top_branches_to_scan
+    # Branches previewed per definition and requests for their list, as `PipelinesService` picks them.
+    if top in (0, 1):
+        previews = branch_lists = 1
+    else:
+        limit = ALL_BRANCHES if top < 0 else top
+        previews = min(repos.get("branches", 1) or 1, limit)
+        branch_lists = _pages(min(repos.get("refs", 1) or 1, limit), min(limit, 100))
+    return {
+        "projects": len(inventory["projects"]),
+        "projects_active": sum(1 for project in inventory["projects"] if project.get("state") != "deleted"),
+        "projects_wellformed": len(inventory["wellformed"]),
+        "definitions": len(definitions),
+        "definitions_enabled": sum(1 for definition in definitions if definition.get("queueStatus") != "disabled"),
+        "definition_list_pages": sum(
+            _pages(len(items), page_sizes.get("build_definitions")) for items in inventory["definitions"].values()
+        ),
+        # A definition's repository is only in its details; assume a project's
+        # definitions use its repositories evenly.
+        "definition_repositories": sum(
+            min(len(items), repos_by_project.get(project, 0)) for project, items in inventory["definitions"].items()
+        ),
+        "builds_per_definition": defs.get("builds", 0.0),
+        "build_pages_per_definition": defs.get("build_pages", 1.0),
+        "previews_per_definition": previews,
+        "branch_lists_per_repository": branch_lists,
+        "repositories": len(repositories),
+        "branches_per_repository": repos.get("branches", 0.0),
+        "branch_pages_per_repository": repos.get("branch_pages", 1.0),
+        "commits_per_repository": repos.get("commits", 0.0),
+        "commit_pages_per_repository": repos.get("commit_pages", 1.0),
+        "pull_request_pages_per_repository": repos.get("pull_request_pages", 1.0),
+        "endpoints": len(endpoints),
+        "endpoints_shared": sum(1 for endpoint in endpoints if endpoint.get("isShared")),
+        "endpoint_project_references": sum(len(endpoint.get("serviceEndpointProjectReferences") or []) for endpoint in endpoints),
+        "pools": len(resources["pools"]),
+        "queues": len(resources["queue"]),
+        "variable_groups": len(resources["variablegroup"]),
+        "secure_files": len(resources["securefile"]),
+        "environments": len(resources["environment"]),
+        "feeds": len(inventory["feeds"]),
+        "packages_per_feed": feeds.get("packages", 0.0),
+        "package_pages_per_feed": feeds.get("package_pages", 1.0),
+        "upstream_lookups_per_feed": feeds.get("upstream", 0.0),
+        "yaml_cpu_seconds": defs.get("yaml_cpu_seconds", 0.0),
+        "sampled": {"definitions": defs["sampled"], "repositories": repos["sampled"], "feeds": feeds["sampled"]},
+        "bytes": {
+            "definition": defs.get("detail_bytes", 0.0),
+            "build": defs.get("build_bytes", 0.0),
+            "yaml": defs.get("log_bytes", 0.0),
+            "branch": repos.get("branch_bytes", 0.0),
+            "commit": repos.get("commit_bytes", 0.0),
+            "package": feeds.get("package_bytes", 0.0),
+            "resources": sum(_json_bytes(items) for items in resources.values()),
+        },
+    }
+
+
+def estimate_requests(shape, config):
+    """Requests per endpoint family of a full scan of `shape`; previews are POSTs, the rest GETs."""
+    s = shape
+    requests = Counter()
+    requests["projects"] = 2
+    requests["projectanalysis"] = s["projects"]
+    requests["build_settings"] = s["projects_active"]
+    requests["build_metrics"] = s["projects_active"] + s["definitions"]
+    requests["graph"] = 1
+    # Task list, agent pools, the four project lists and every environment's details.
+    requests["distributedtask"] = 2 + 4 * s["projects_wellformed"] + s["environments"]
+    requests["build_definitions"] = s["definition_list_pages"] + 2 * s["definitions"]
+    requests["serviceendpoint"] = s["projects_wellformed"] + s["endpoints"]
+    requests["securityroles"] = s["endpoints_shared"]
+    repositories = s["repositories"]
+    # Branch list (plus the default-branch lookup), commit dates, pull requests and commits.
+    requests["repos"] = s["projects_wellformed"] + repositories * (
+        s["branch_pages_per_repository"] + 1 + 2 + s["pull_request_pages_per_repository"] + s["commit_pages_per_repository"]
+    )
+    if not config.skip_builds:
+        requests["builds"] = s["definitions"] * s["build_pages_per_definition"]
+        requests["build_logs"] = s["definitions"] * s["builds_per_definition"]
+        requests["previews"] = s["definitions_enabled"] * s["previews_per_definition"]
+        if config.top_branches_to_scan != 0:
+            requests["repos"] += s["definition_repositories"] * s["branch_lists_per_repository"]
+    project_resources = s["queues"] + s["variable_groups"] + s["secure_files"] + s["environments"]
+    requests["checks"] = s["endpoints"] + repositories + project_resources
+    # Repository grants are asked of every project, the others of their owner project.
+    requests["pipelinepermissions"] = s["endpoint_project_references"] + repositories * s["projects_wellformed"] + project_resources
+    if not config.skip_feeds:
+        requests["feeds"] = 2 + s["feeds"] * (1 + s["package_pages_per_feed"] + s["upstream_lookups_per_feed"])
+    return {family: round(count) for family, count in sorted(requests.items()) if round(count)}
+
+
+def _latency(family, latencies):
+    return latencies.get(family) or latencies.get("*", 0.0)
+
+
+def estimate_wall_seconds(shape, requests, latencies, config, workers):
+    """Wall time of a scan with `workers` threads per fan-out: its longest chain of requests, or the limits."""
+    s = shape
+    lat = lambda family: _latency(family, latencies)
+    waves = lambda count: math.ceil(count / workers) if count else 0
+
+    # Pipelines: projects one after the other, each definition's calls in turn.
+    per_project = s["definitions"] / max(1, s["projects_wellformed"])
+    definition_chain = lat("build_definitions") + lat("build_metrics")
+    if not config.skip_builds:
+        definition_chain += s["build_pages_per_definition"] * lat("builds") + waves(s["builds_per_definition"]) * lat("build_logs")
+        if config.top_branches_to_scan != 0:
+            definition_chain += lat("repos")
+        definition_chain += waves(s["previews_per_definition"]) * lat("previews")
+    pipelines = s["projects_wellformed"] * (lat("build_definitions") + waves(per_project) * definition_chain)
+    pipelines += waves(s["definitions"]) * lat("build_definitions")  # authorised resources
+
+    # Protected resources: lists per project, then one repository after the other.
+    repositories = s["repositories"]
+    discovery = lat("distributedtask") + s["projects_wellformed"] * (
+        4 * lat("distributedtask") + lat("serviceendpoint") + lat("repos")
+    )
+    discovery += s["environments"] * lat("distributedtask") + s["endpoints"] * lat("serviceendpoint")
+    discovery += s["endpoints_shared"] * lat("securityroles")
+    discovery += repositories * (
+        s["branch_pages_per_repository"] + 3 + s["pull_request_pages_per_repository"]
+    ) * lat("repos")
+    project_resources = s["queues"] + s["variable_groups"] + s["secure_files"] + s["environments"]
+    checks = waves(requests.get("checks", 0)) * lat("checks")
+    permissions = (
+        s["endpoint_project_references"] + repositories * waves(s["projects_wellformed"]) + project_resources
+    ) * lat("pipelinepermissions")
+    commits = repositories * s["commit_pages_per_repository"] * lat("repos")
+    resources = discovery + max(max(checks, pipelines - discovery) + permissions, commits)
+
+    feeds = 0.0
+    if not config.skip_feeds:
+        feeds = (2 + s["feeds"] * (1 + s["package_pages_per_feed"] + s["upstream_lookups_per_feed"])) * lat("feeds")
+    chain = max(pipelines + permissions, resources, feeds)
+
+    # Limits: each priority class has its slots, all of them share max_in_flight.
+    max_in_flight = config.max_in_flight or math.inf
+    class_limits = {**DEFAULT_CLASS_LIMITS, **(config.class_limits or {})} if config.max_in_flight else {}
+    # Stages overlap and fan-outs nest, so more than `workers` requests can be in flight.
+    slots = min(max_in_flight, workers * 2)
+    busy = {name: 0.0 for name in PRIORITY_CLASSES}
+    for family, count in requests.items():
+        busy[priority_class(family)] += count * lat(family)
+    limited = max(
+        [sum(busy.values()) / slots]
+        + [seconds / min(slots, class_limits.get(name, math.inf)) for name, seconds in busy.items()]
+    )
+    if config.rate_limit:
+        # Nearly every request goes to dev.azure.com; each identity has its own bucket, which starts full.
+        rate = config.rate_limit * (1 + len(config.additional_pat_tokens or []) + len(config.bearer_tokens or []))
+        limited = max(limited, (sum(requests.values()) - rate) / rate)
+    cpu = 0.0
+    if not config.skip_builds:
+        documents = s["definitions"] * s["builds_per_definition"] + s["definitions_enabled"] * s["previews_per_definition"]
+        cpu = documents * s["yaml_cpu_seconds"]
+    # Parsing and pattern matching YAML holds the GIL, so it adds to the network time.
+    return max(chain + cpu, limited)
+
+
+def estimate_memory_bytes(shape, config):
+    """Bytes of JSON the scan keeps in memory; Python objects take `PYTHON_OBJECT_FACTOR` times that."""
+    s = shape
+    size = s["bytes"]
+    data = s["definitions"] * size["definition"] + size["resources"]
+    data += s["repositories"] * (s["branches_per_repository"] * size["branch"] + s["commits_per_repository"] * size["commit"])
+    if not config.skip_builds:
+        data += s["definitions"] * s["builds_per_definition"] * (size["build"] + size["yaml"])
+        data += s["definitions_enabled"] * s["previews_per_definition"] * size["yaml"]
+    if not config.skip_feeds:
+        data += s["feeds"] * s["packages_per_feed"] * size["package"]
+    return data
+
+
+def _rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is in KB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _latencies(http_ops):
+    families = http_ops.metrics_snapshot()["families"]
+    latencies = {family: summary["latency_seconds"]["mean"] for family, summary in families.items() if summary["requests"]}
+    total = sum(summary["latency_seconds"]["sum"] for summary in families.values())
+    count = sum(summary["requests"] for summary in families.values())
+    latencies["*"] = total / count if count else 0.0
+    return latencies
+
+
+def plan_scan(config, scanner_version, sample_size=PLAN_SAMPLE_SIZE):
+    """List and sample the organization, and estimate the cost of scanning it with `config`."""
+    started = time.monotonic()
+    # The scan's deadline is for the scan; planning calls are not cut short by it.
+    http_options = {**build_http_options(config), "deadline_seconds": None, "time_budget": False}
+    http_ops = HttpOps(token=basic_token(config.pat_token), runtime_state=ScanRuntimeState(), logger=logger, **http_options)
+    try:
+        logger.info("Listing projects, definitions, protected resources and feeds...")
+        inventory = list_inventory(config, http_ops)
+        definitions = [(project, definition) for project, items in inventory["definitions"].items() for definition in items]
+        logger.info("Sampling definitions, repositories and feeds...")
+        definition_samples = sample_definitions(config, http_ops, _spread(definitions, sample_size))
+        repository_samples = sample_repositories(config, http_ops, _spread(inventory["resources"]["repository"], sample_size))
+        feed_samples = [] if config.skip_feeds else sample_feeds(config, http_ops, _spread(inventory["feeds"], sample_size))
+        latencies = _latencies(http_ops)
+        planning_requests = http_ops.metrics_snapshot()["counters"]["get_total"]
+    finally:
+        http_ops.close()
+
+    shape = build_shape(inventory, definition_samples, repository_samples, feed_samples, config, http_ops.page_sizes)
+    requests = estimate_requests(shape, config)
+    if config.concurrency:
+        wall = {f"concurrency {config.concurrency}": estimate_wall_seconds(shape, requests, latencies, config, config.concurrency)}
+    else:
+        # The autotuner starts low and adds workers while the service keeps up.
+        wall = {
+            f"autotuned up to {config.max_concurrency}": estimate_wall_seconds(shape, requests, latencies, config, config.max_concurrency),
+            f"autotuner at {DEFAULT_CONCURRENCY}": estimate_wall_seconds(shape, requests, latencies, config, DEFAULT_CONCURRENCY),
+        }
+    data_bytes = estimate_memory_bytes(shape, config)
+    baseline = _rss_bytes()
+    deadline_minutes = min((minutes for minutes in (config.max_scan_minutes, config.time_budget_minutes) if minutes), default=None)
+    return {
+        "organization": config.organization,
+        "job_id": config.job_id,
+        "scanner_version": scanner_version,
+        "planned_at": datetime.now().isoformat(),
+        "settings": {
+            "top_branches_to_scan": config.top_branches_to_scan,
+            "skip_builds": config.skip_builds,
+            "skip_feeds": config.skip_feeds,
+            "skip_committer_stats": config.skip_committer_stats,
+            "concurrency": config.concurrency,
+            "max_concurrency": config.max_concurrency,
+            "max_in_flight": config.max_in_flight,
+            "rate_limit": config.rate_limit,
+            "deadline_minutes": deadline_minutes,
+        },
+        "shape": shape,
+        "requests": {"by_family": requests, "total": sum(requests.values()), "post": requests.get("previews", 0)},
+        "latency_seconds": {family: round(seconds, 4) for family, seconds in sorted(latencies.items())},
+        "wall_seconds": {name: round(seconds, 1) for name, seconds in wall.items()},
+        "memory_bytes": {
+            "data": round(data_bytes),
+            "process_peak": round(baseline + data_bytes * PYTHON_OBJECT_FACTOR),
+        },
+        "planning": {"requests": planning_requests, "seconds": round(time.monotonic() - started, 3)},
+    }
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def format_plan(plan):
+    shape = plan["shape"]
+    lines = [
+        f"Scan plan for {plan['organization']} (job {plan['job_id']})",
+        f"  {shape['projects_wellformed']} projects, {shape['definitions']} definitions, {shape['repositories']} repositories, "
+        f"{shape['endpoints']} service endpoints, {shape['feeds']} feeds",
+        f"  Per definition {shape['builds_per_definition']:.1f} builds and {shape['previews_per_definition']} previewed branches; "
+        f"per repository {shape['branches_per_repository']:.1f} branches and {shape['commits_per_repository']:.1f} commits "
+        f"(sampled {shape['sampled']['definitions']} definitions, {shape['sampled']['repositories']} repositories, {shape['sampled']['feeds']} feeds)",
+        f"  Requests: {plan['requests']['total']} ({plan['requests']['post']} POST)",
+    ]
+    lines += [f"    {family:<20} {count:>8}" for family, count in sorted(plan["requests"]["by_family"].items(), key=lambda item: -item[1])]
+    lines.append("  Wall time:")
+    lines += [f"    {name:<20} {_duration(seconds):>8}" for name, seconds in plan["wall_seconds"].items()]
+    deadline = plan["settings"]["deadline_minutes"]
+    if deadline and min(plan["wall_seconds"].values()) > deadline * 60:
+        lines.append(f"    Over the {deadline:g} minute deadline: the scan would be truncated")
+    memory = plan["memory_bytes"]
+    lines.append(f"  Memory: {format_size(memory['process_peak'])} peak ({format_size(memory['data'])} of collected data)")
+    lines.append(f"  Planned with {plan['planning']['requests']} requests in {plan['planning']['seconds']:.1f}s")
+    return "\n".join(lines)
+
+
+def run_plan(config, scanner_version):
+    """Plan the scan `config` describes; returns the plan and the path it was written to."""
+    results_dir = config.results_dir or os.getcwd()
+    os.makedirs(results_dir, exist_ok=True)
+    setup_logging(job_id=f"plan_{config.job_id}", results_dir=results_dir)
+    plan = plan_scan(config, scanner_version)
+    safe_job_id = re.sub(r"[^a-zA-Z0-9_-]", "_", config.job_id)
+    plan_path = os.path.join(os.path.abspath(results_dir), f"plan_{safe_job_id}.json")
+    with open(plan_path, "w") as handle:
+        json.dump(plan, handle, indent=2)
+    print(format_plan(plan))
+    logger.info(f"Plan written to {plan_path}")
+    return plan, plan_path
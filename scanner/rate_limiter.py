@@ -0,0 +1,204 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Adaptive per-host token-bucket limiter driven by ADO rate-limit headers.
+
+Azure DevOps reports pressure through `X-RateLimit-Remaining`/`X-RateLimit-Limit`
+(TSTUs left in the sliding window), `X-RateLimit-Delay` (seconds the server
+already delayed the request) and `Retry-After` on 429/503. Each host
+(dev.azure.com, vssps, feeds, pkgs) gets its own bucket whose refill rate is
+halved under pressure and recovers slowly while responses are clean, so every
+worker slows down before the server starts rejecting requests. With
+`per_identity=True` the buckets are per host and credential instead, since
+ADO budgets each identity separately.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = (429,)
+
+
+@dataclass
+class HostBucket:
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+
+
+def host_of(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def identity_of(headers):
+    """Short stable id of the identity behind a request's `Authorization` header."""
+    authorization = headers.get("Authorization") if headers is not None else None
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()[:8]
+
+
+def parse_retry_after(value, now=None):
+    """Return seconds to wait for a `Retry-After` header (delta or HTTP date)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - (now if now is not None else time.time()), 0.0)
+
+
+def _header_float(headers, name):
+    value = headers.get(name) if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        rate: float = 100.0,
+        burst: float = None,
+        min_rate: float = 1.0,
+        low_remaining_ratio: float = 0.25,
+        recovery_step: float = 0.5,
+        on_record=None,
+        per_identity: bool = False,
+    ):
+        self.max_rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.min_rate = min_rate
+        self.low_remaining_ratio = low_remaining_ratio
+        self.recovery_step = recovery_step
+        self.on_record = on_record
+        self.per_identity = per_identity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _record(self, host, kind, value=1):
+        if self.on_record is not None:
+            self.on_record(host, kind, value)
+
+    def _bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = HostBucket(rate=self.max_rate, capacity=self.burst, tokens=self.burst, updated=now)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _key(self, host, headers):
+        identity = identity_of(headers) if self.per_identity else None
+        return f"{host}#{identity}" if identity else host
+
+    def reserve(self, url, headers=None) -> float:
+        """Take one token for the URL's host (and identity) and return how long to wait first."""
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(self._key(host, headers), now)
+            bucket.tokens = min(bucket.capacity, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            wait = 0.0 if bucket.tokens >= 0 else -bucket.tokens / bucket.rate
+            wait = max(wait, bucket.blocked_until - now)
+        if wait > 0:
+            self._record(host, "wait_seconds", wait)
+        return wait
+
+    def acquire(self, url, headers=None) -> float:
+        wait = self.reserve(url, headers)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url, headers=None) -> float:
+        wait = self.reserve(url, headers)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def _decrease(self, bucket, now):
+        # Halve at most once per second so one burst of throttled responses
+        # does not collapse the rate to the floor.
+        if now - bucket.last_decrease < 1.0:
+            return
+        bucket.rate = max(self.min_rate, bucket.rate / 2)
+        bucket.capacity = max(1.0, min(bucket.capacity, bucket.rate))
+        bucket.last_decrease = now
+
+    def observe(self, url, status_code, headers, request_headers=None) -> float:
+        """Feed a response back into the host (and identity) bucket.
+
+        Returns the server-requested pause (seconds) when the response was a
+        throttle, otherwise 0.
+        """
+        host = host_of(url)
+        now = time.monotonic()
+        retry_after = parse_retry_after(headers.get("Retry-After") if headers is not None else None)
+        server_delay = _header_float(headers, "X-RateLimit-Delay")
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        limit = _header_float(headers, "X-RateLimit-Limit")
+        throttled = status_code in THROTTLE_STATUSES
+        pressured = bool(server_delay) or (
+            remaining is not None and limit and remaining / limit < self.low_remaining_ratio
+        )
+
+        with self._lock:
+            bucket = self._bucket(self._key(host, request_headers), now)
+            if throttled or pressured or retry_after:
+                self._decrease(bucket, now)
+            elif bucket.rate < self.max_rate:
+                bucket.rate = min(self.max_rate, bucket.rate + self.recovery_step)
+                bucket.capacity = min(self.burst, max(bucket.capacity, math.floor(bucket.rate)))
+            pause = 0.0
+            if retry_after:
+                pause = retry_after
+            elif throttled:
+                pause = max(1.0, 1.0 / bucket.rate)
+            if pause:
+                bucket.blocked_until = max(bucket.blocked_until, now + pause)
+            current_rate = bucket.rate
+
+        if throttled:
+            self._record(host, "throttled")
+            logger.debug(f"Throttled by {host}; pausing {pause:.1f}s, rate now {current_rate:.1f} req/s")
+        if server_delay:
+            self._record(host, "server_delay_seconds", server_delay)
+        if remaining is not None:
+            self._record(host, "remaining", remaining)
+        return pause if throttled else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {host: round(bucket.rate, 2) for host, bucket in self._buckets.items()}
@@ -0,0 +1,108 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Cassette round-trip check.
+
+Scans the `request_budget` organization shapes on the local mock server
+while recording a cassette (`--record`), replays that cassette (`--replay`)
+and compares the two scan results. A replay must reproduce the recorded scan:
+any difference outside the scan's own timestamps and stage timings fails,
+as does a request the cassette cannot serve.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from scanner.config import ScannerConfig
+from scanner.mock_ado import MockAdoServer, MockOrgSpec
+from scanner.orchestrator import run_scan
+from scanner.request_budget import ORG_SHAPES, SCAN_OPTIONS, SHAPE_PROJECTS
+
+# Result keys that differ between any two runs of the same scan.
+VOLATILE_KEYS = ("scan_start", "scan_end", "scan_stages")
+MAX_REPORTED = 20
+
+
+def _comparable(result):
+    data = json.loads(json.dumps(result, default=str))
+    for key in VOLATILE_KEYS:
+        data.pop(key, None)
+    return data
+
+
+def differences(recorded, replayed, path=""):
+    """Paths at which two decoded JSON documents differ, as readable lines."""
+    if type(recorded) is not type(replayed):
+        return [f"{path or '/'}: {type(recorded).__name__} recorded, {type(replayed).__name__} replayed"]
+    if isinstance(recorded, dict):
+        found = []
+        for key in sorted(set(recorded) | set(replayed), key=str):
+            if key not in replayed:
+                found.append(f"{path}/{key}: missing from the replay")
+            elif key not in recorded:
+                found.append(f"{path}/{key}: only in the replay")
+            else:
+                found.extend(differences(recorded[key], replayed[key], f"{path}/{key}"))
+        return found
+    if isinstance(recorded, list):
+        if len(recorded) != len(replayed):
+            return [f"{path or '/'}: {len(recorded)} items recorded, {len(replayed)} replayed"]
+        return [line for index, (a, b) in enumerate(zip(recorded, replayed)) for line in differences(a, b, f"{path}[{index}]")]
+    return [] if recorded == replayed else [f"{path or '/'}: {recorded!r} recorded, {replayed!r} replayed"]
+
+
+def round_trip(shape, scanner_version, work_dir=None):
+    """Record a scan of `shape`, replay it, and return `(differences, requests)`."""
+    org_options, scan_options = ORG_SHAPES[shape]
+    spec = MockOrgSpec(projects=SHAPE_PROJECTS[shape], **org_options)
+    work_dir = work_dir or tempfile.mkdtemp(prefix=f"ado-replay-{shape}-")
+    cassette = os.path.join(work_dir, "cassette")
+    for name in ("recorded", "replayed"):
+        os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+    options = {"organization": spec.organization, "job_id": f"replay-{shape}", **SCAN_OPTIONS, **scan_options}
+    with MockAdoServer(spec) as server:
+        recorded, _ = run_scan(
+            ScannerConfig(
+                pat_token="mock",
+                results_dir=os.path.join(work_dir, "recorded"),
+                api_base_url=server.url,
+                record_dir=cassette,
+                **options,
+            ),
+            scanner_version=scanner_version,
+        )
+        requests = server.stats()["requests_total"]
+    replayed, _ = run_scan(
+        ScannerConfig(pat_token="replay", results_dir=os.path.join(work_dir, "replayed"), replay_dir=cassette, **options),
+        scanner_version=scanner_version,
+    )
+    return differences(_comparable(recorded), _comparable(replayed)), requests
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Check that replaying a recorded cassette reproduces the recorded scan.")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(ORG_SHAPES), default=list(ORG_SHAPES), help="Organization shapes to scan")
+    return parser
+
+
+def main(scanner_version, argv=None):
+    args = build_parser().parse_args(argv)
+    failures = []
+    for shape in [shape for shape in ORG_SHAPES if shape in args.shapes]:
+        found, requests = round_trip(shape, scanner_version)
+        print(f"{shape:>6}: {requests} requests recorded, {len(found)} differences on replay", file=sys.stderr)
+        failures.extend(f"{shape}: {line}" for line in found[:MAX_REPORTED])
+        if len(found) > MAX_REPORTED:
+            failures.append(f"{shape}: ... and {len(found) - MAX_REPORTED} more differences")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,155 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Request-budget regression check.
+
+Scans a few synthetic organization shapes on the local mock server and
+compares what `PerfCounters` counted (GET/POST totals and GETs per endpoint
+family) with a stored baseline. Request counts are deterministic for a given
+shape, so any increase fails: that is how an accidental N+1 pattern shows
+up. Wall time and peak RSS are compared with a tolerance, since they depend
+on the machine. Fewer requests than the baseline pass, with a hint to
+refresh it (`--update`). Each shape is scanned in a fresh child process, so
+its peak RSS is its own and not the largest shape's so far.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from scanner.benchmark import run_one
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "request_budget.json")
+BASELINE_KEYS = ("get_total", "post_total", "get_by_family", "post_by_family", "seconds", "peak_rss_mb")
+
+# name -> (MockOrgSpec options, ScannerConfig options)
+ORG_SHAPES = {
+    # Few of everything: fixed per-scan overhead.
+    "small": ({"definitions_per_project": 2, "builds_per_definition": 2, "repos_per_project": 1}, {"top_branches_to_scan": 1}),
+    # Many thin projects: per-project request patterns.
+    "wide": ({"definitions_per_project": 1, "builds_per_definition": 1, "repos_per_project": 1}, {"top_branches_to_scan": 0}),
+    # Few projects with many definitions, builds and branches: per-definition and per-build patterns.
+    "deep": ({"definitions_per_project": 12, "builds_per_definition": 8, "repos_per_project": 4}, {"top_branches_to_scan": 3}),
+}
+SHAPE_PROJECTS = {"small": 2, "wide": 25, "deep": 3}
+# Deterministic scans: no rate limiter, cache, deadline or injected faults.
+SCAN_OPTIONS = {"rate_limit": 0}
+
+
+def measure(shape, scanner_version):
+    org_options, scan_options = ORG_SHAPES[shape]
+    run = run_one(SHAPE_PROJECTS[shape], scanner_version, org_options, None, {**SCAN_OPTIONS, **scan_options})
+    counters = run["counters"]
+    return {
+        "get_total": counters["get_total"],
+        "post_total": counters["post_total"],
+        "get_by_family": dict(sorted(counters["get_by_family"].items())),
+        "post_by_family": dict(sorted(counters["post_by_family"].items())),
+        "seconds": run["seconds"],
+        "peak_rss_mb": run["peak_rss_mb"],
+    }
+
+
+def measure_isolated(shape, scanner_version):
+    """`measure` in a fresh interpreter, which also runs that shape's mock server."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measure, shape, scanner_version).result()
+
+
+def load_baseline(path, shapes):
+    """Return `(baseline, errors)`; errors name a missing or unreadable file, or shapes without a usable entry."""
+    try:
+        with open(path) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError) as err:
+        return None, [f"cannot read baseline {path}: {err}"]
+    errors = []
+    for shape in shapes:
+        if shape not in baseline:
+            errors.append(f"{shape}: no baseline, run with --update")
+        elif any(key not in baseline[shape] for key in BASELINE_KEYS):
+            missing = ", ".join(key for key in BASELINE_KEYS if key not in baseline[shape])
+            errors.append(f"{shape}: baseline lacks {missing}, run with --update")
+    return baseline, errors
+
+
+def compare(shape, measured, baseline, time_tolerance=0.5, rss_tolerance=0.25):
+    """Return `(failures, notes)` for one shape: request count increases and resource regressions fail."""
+    failures = []
+    notes = []
+    for key in ("get_total", "post_total"):
+        if measured[key] > baseline[key]:
+            failures.append(f"{shape}: {key} rose from {baseline[key]} to {measured[key]}")
+        elif measured[key] < baseline[key]:
+            notes.append(f"{shape}: {key} fell from {baseline[key]} to {measured[key]}")
+    for kind in ("get_by_family", "post_by_family"):
+        for family in sorted(set(measured[kind]) | set(baseline[kind])):
+            now, before = measured[kind].get(family, 0), baseline[kind].get(family, 0)
+            if now > before:
+                failures.append(f"{shape}: {kind}[{family}] rose from {before} to {now}")
+            elif now < before:
+                notes.append(f"{shape}: {kind}[{family}] fell from {before} to {now}")
+    if measured["seconds"] > baseline["seconds"] * (1 + time_tolerance):
+        failures.append(f"{shape}: wall time {measured['seconds']:.2f}s exceeds baseline {baseline['seconds']:.2f}s by more than {time_tolerance:.0%}")
+    if measured["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + rss_tolerance):
+        failures.append(f"{shape}: peak RSS {measured['peak_rss_mb']:.1f} MB exceeds baseline {baseline['peak_rss_mb']:.1f} MB by more than {rss_tolerance:.0%}")
+    return failures, notes
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Check the scanner's request budget against a stored baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"Baseline JSON file (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(ORG_SHAPES), default=list(ORG_SHAPES), help="Organization shapes to scan")
+    parser.add_argument("--update", action="store_true", help="Write the measurements as the new baseline instead of checking")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed wall time increase as a fraction (default: 0.5)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="Allowed peak RSS increase as a fraction (default: 0.25)")
+    return parser
+
+
+def main(scanner_version, argv=None):
+    args = build_parser().parse_args(argv)
+    shapes = [shape for shape in ORG_SHAPES if shape in args.shapes]
+    if not args.update:
+        # Checked before scanning, so a bad baseline fails in seconds rather than after every scan.
+        baseline, errors = load_baseline(args.baseline, shapes)
+        if errors:
+            for error in errors:
+                print(f"FAIL {error}", file=sys.stderr)
+            return 1
+    measured = {shape: measure_isolated(shape, scanner_version) for shape in shapes}
+    if args.update:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(measured)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    failures = []
+    for shape, values in measured.items():
+        shape_failures, notes = compare(shape, values, baseline[shape], args.time_tolerance, args.rss_tolerance)
+        failures.extend(shape_failures)
+        for note in notes:
+            print(f"NOTE {note} (refresh the baseline with --update)", file=sys.stderr)
+        print(
+            f"{shape:>6}: GET {values['get_total']} (baseline {baseline[shape]['get_total']}) "
+            f"POST {values['post_total']} (baseline {baseline[shape]['post_total']}) "
+            f"{values['seconds']:.2f}s peak {values['peak_rss_mb']:.1f} MB",
+            file=sys.stderr,
+        )
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
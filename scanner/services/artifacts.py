@@ -8,6 +8,7 @@
 ####
 
 import logging
+from scanner.services.paginator import SKIP
 from scanner.services.runtime import normalize_to_list
 
 logger = logging.getLogger(__name__)
@@ -25,8 +26,7 @@ class ArtifactsService:
         else:
             packages_url = f"https://feeds.dev.azure.com/{self.manager.organization}/_apis/packaging/feeds/{feed_id}/packages?api-version=7.1-preview.1&includeUrls=false"
         try:
-            packages = self.http_ops.fetch_data(packages_url)
-            package_list = normalize_to_list(packages)
+            package_list = self.http_ops.fetch_all(packages_url, style=SKIP)
             for pkg in package_list:
                 protocol = (pkg.get("protocolType") or "").lower()
                 if protocol in ("maven", "nuget", "npm", "python"):
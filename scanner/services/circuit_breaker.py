@@ -0,0 +1,175 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Circuit breakers per endpoint family, and the jittered retry backoff.
+
+A breaker opens after `failure_threshold` consecutive failures (connection
+errors and 5xx) and then sheds every request for its family with
+`CircuitOpenError` until `reset_seconds` have passed. After that one probe
+request is let through: success closes the breaker, failure opens it again
+for twice as long (capped at `max_reset_seconds`). A probe that is not sent,
+or is throttled (429), says nothing about the family's health; it is handed
+back with `release_probe` so the next request can probe instead.
+"""
+
+import random
+import time
+from threading import Lock
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request whose endpoint family is failing."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, max_reset_seconds=300.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_seconds = reset_seconds
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def record_success(self):
+        """Returns True when this closes an open breaker."""
+        reopened = self.state != CLOSED
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_seconds = self.base_reset_seconds
+        self._probing = False
+        return reopened
+
+    def record_failure(self):
+        """Returns True when this failure opens the breaker."""
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.reset_seconds = min(self.reset_seconds * 2, self.max_reset_seconds)
+        elif self.state == OPEN or self.failures < self.failure_threshold:
+            return False
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self._probing = False
+        return True
+
+
+class CircuitBreakers:
+    """One `CircuitBreaker` per endpoint family; `failure_threshold=0` disables them.
+
+    `on_event(family, kind)` is called with `opened`, `closed` and `shed`.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, on_event=None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.on_event = on_event
+        self._breakers = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self.failure_threshold > 0
+
+    def _breaker(self, family):
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return breaker
+
+    def _emit(self, family, kind):
+        if self.on_event is not None:
+            self.on_event(family, kind)
+
+    def allow(self, family):
+        if not self.enabled:
+            return True
+        with self._lock:
+            allowed = self._breaker(family).allow()
+        if not allowed:
+            self._emit(family, "shed")
+        return allowed
+
+    def check(self, family, url):
+        """Raise `CircuitOpenError` when `family` is shedding requests.
+
+        Returns True when the request is the half-open probe; the caller then
+        records its outcome, or calls `release_probe` if it is not sent or the
+        outcome is neither a success nor a failure.
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            breaker = self._breaker(family)
+            allowed = breaker.allow()
+            probe = allowed and breaker.state == HALF_OPEN
+        if not allowed:
+            self._emit(family, "shed")
+            raise CircuitOpenError(f"Circuit open for '{family}' requests, not sending {url}")
+        return probe
+
+    def release_probe(self, family):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._breaker(family).release_probe()
+
+    def is_open(self, family):
+        if not self.enabled:
+            return False
+        with self._lock:
+            breaker = self._breakers.get(family)
+            return breaker is not None and breaker.state == OPEN
+
+    def record_success(self, family):
+        if not self.enabled:
+            return
+        with self._lock:
+            closed = self._breaker(family).record_success()
+        if closed:
+            self._emit(family, "closed")
+
+    def record_failure(self, family):
+        if not self.enabled:
+            return
+        with self._lock:
+            opened = self._breaker(family).record_failure()
+        if opened:
+            self._emit(family, "opened")
+
+    def snapshot(self):
+        with self._lock:
+            return {family: breaker.state for family, breaker in sorted(self._breakers.items())}
+
+
+def jittered_backoff(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(cap, base * (2 ** max(attempt - 1, 0))))
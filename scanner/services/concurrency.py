@@ -0,0 +1,224 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Adaptive worker concurrency (additive increase, multiplicative decrease).
+
+`AimdController` watches every request outcome. After each window of
+requests it either adds one worker, if the window was healthy and some pool
+had work waiting, or halves the limit, if too many requests were throttled
+(429), failed (5xx, connection errors) or latency rose well above its
+baseline. Latency is judged per endpoint family against the fastest that
+family has been, so a switch from list calls to log downloads does not look
+like a slowdown.
+
+`AdaptivePool` is a `ThreadPoolExecutor` stand-in whose number of running
+tasks follows the controller's current limit. Each pool counts its own
+tasks, so nested pools (definitions -> builds -> logs) cannot deadlock on a
+shared budget. A task waiting out a deferred retry (`wait_deferred`) hands
+its slot back to its pool meanwhile, so the pool starts its next task and a
+failing endpoint family does not hold up the healthy ones.
+"""
+
+import math
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock, local
+
+from scanner.services.request_metrics import ERROR_STATUS, percentile
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 16
+# Latencies below this are all "fast"; ratios against them are noise.
+BASELINE_FLOOR_SECONDS = 0.05
+MAX_HISTORY = 500
+# Threads per pool beyond the limit, for tasks parked in `wait_deferred`.
+PARKED_HEADROOM = 2
+
+_worker = local()
+
+
+def wait_deferred(seconds):
+    """Wait `seconds` for a deferred retry without holding a worker slot.
+
+    On a worker of an `AdaptivePool` the task is parked: its slot goes back to
+    the pool, which starts its next queued task, and is taken again when the
+    wait is over (the pool may briefly run one task over its limit).
+    """
+    if seconds <= 0:
+        return
+    pool = getattr(_worker, "pool", None)
+    if pool is None:
+        time.sleep(seconds)
+        return
+    pool._park()
+    try:
+        time.sleep(seconds)
+    finally:
+        pool._unpark()
+
+
+class AimdController:
+    def __init__(
+        self,
+        initial=DEFAULT_CONCURRENCY,
+        minimum=1,
+        maximum=DEFAULT_MAX_CONCURRENCY,
+        window=50,
+        error_threshold=0.05,
+        latency_factor=3.0,
+        decrease=0.5,
+        clock=time.monotonic,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.window = window
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+        self.decrease = decrease
+        self.clock = clock
+        self.started = clock()
+        self.history = [{"seconds": 0.0, "limit": self.limit, "reason": "initial"}]
+        self._baselines = {}
+        self._ratios = []
+        self._failures = 0
+        self._saturated = False
+        self._lock = Lock()
+
+    @property
+    def fixed(self):
+        return self.minimum == self.maximum
+
+    def note_saturated(self):
+        """A pool had tasks waiting for a worker; the limit may be raised."""
+        self._saturated = True
+
+    def observe(self, family, seconds, status):
+        if self.fixed:
+            return
+        with self._lock:
+            if status == ERROR_STATUS or status == 429 or (isinstance(status, int) and status >= 500):
+                self._failures += 1
+                self._ratios.append(1.0)
+            else:
+                baseline = max(self._baselines.get(family, seconds), BASELINE_FLOOR_SECONDS)
+                self._ratios.append(seconds / baseline)
+                # Falls to a faster sample at once, creeps up towards slower ones.
+                self._baselines[family] = min(seconds, baseline + 0.01 * (seconds - baseline))
+            if len(self._ratios) >= self.window:
+                self._evaluate()
+
+    def _evaluate(self):
+        samples = len(self._ratios)
+        error_rate = self._failures / samples
+        p95 = percentile(sorted(self._ratios), 0.95)
+        if error_rate > self.error_threshold:
+            self._set(math.floor(self.limit * self.decrease), f"errors {error_rate:.0%}")
+        elif p95 > self.latency_factor:
+            self._set(math.floor(self.limit * self.decrease), f"latency p95 {p95:.1f}x baseline")
+        elif self._saturated:
+            self._set(self.limit + 1, "healthy")
+        self._ratios = []
+        self._failures = 0
+        self._saturated = False
+
+    def _set(self, limit, reason):
+        limit = min(max(limit, self.minimum), self.maximum)
+        if limit == self.limit:
+            return
+        self.limit = limit
+        if len(self.history) < MAX_HISTORY:
+            self.history.append({"seconds": round(self.clock() - self.started, 3), "limit": limit, "reason": reason})
+
+    def pool(self):
+        return AdaptivePool(self)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "peak": max(entry["limit"] for entry in self.history),
+                "history": list(self.history),
+            }
+
+
+class AdaptivePool:
+    """Runs submitted calls on worker threads, at most `controller.limit` at a time."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self._executor = ThreadPoolExecutor(max_workers=controller.maximum * PARKED_HEADROOM)
+        self._queue = deque()
+        self._running = 0
+        self._parked = 0
+        self._lock = Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            self._queue.append((future, fn, args, kwargs))
+        self._pump()
+        return future
+
+    def _pump(self):
+        with self._lock:
+            starting = []
+            while self._queue and self._running < self.controller.limit:
+                starting.append(self._queue.popleft())
+                self._running += 1
+            if self._queue:
+                self.controller.note_saturated()
+        for task in starting:
+            self._executor.submit(self._run, *task)
+
+    def _run(self, future, fn, args, kwargs):
+        _worker.pool = self
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as err:
+                    future.set_exception(err)
+        finally:
+            _worker.pool = None
+            with self._lock:
+                self._running -= 1
+            self._pump()
+
+    def _park(self):
+        with self._lock:
+            self._running -= 1
+            self._parked += 1
+        self._pump()
+
+    def _unpark(self):
+        with self._lock:
+            self._running += 1
+            self._parked -= 1
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        # Queued tasks are started as running ones finish, so wait for the queue to drain first.
+        with self._lock:
+            futures = [task[0] for task in self._queue]
+        for future in futures:
+            try:
+                future.exception()
+            except Exception:
+                pass
+        self.shutdown(wait=True)
+        return False
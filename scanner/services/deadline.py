@@ -0,0 +1,196 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Request timeouts per endpoint family and the scan-wide deadline.
+
+Every request gets a `(connect, read)` timeout; the read timeout depends on
+the endpoint family (build logs and YAML previews are slow) and both are
+clamped to the time left before the scan deadline. Once the deadline has
+passed no request is sent: `HttpOps` raises `DeadlineExceeded` and the scan
+skips its remaining optional steps, recording them with `ScanDeadline.skip`.
+
+With a time budget (`--time-budget`) the deadline also ranks the work of a
+scan by value. Each section stops starting new work once its share of the
+budget has elapsed, so the rest of the budget goes to the sections worth
+more. Protected resources, checks and permissions are worth most and run
+until the deadline itself; after them come:
+
+- `latest_builds`: build lists, the YAML of each definition's latest build
+  and the preview of its default branch;
+- `more_builds`: the YAML of older builds, previews of further branches and
+  definition metrics;
+- `commits`: repository commits, commit dates and pull request counts.
+
+The summary reports each section as `complete`, `sampled` (part of its work
+was skipped) or `truncated` (all of it was).
+"""
+
+import logging
+import time
+from threading import Lock
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_READ_TIMEOUTS = {
+    "build_logs": 120.0,
+    "previews": 120.0,
+    "feeds": 90.0,
+}
+# Below this much time left a request is not worth starting.
+MIN_REQUEST_SECONDS = 0.5
+
+LATEST_BUILDS = "latest_builds"
+MORE_BUILDS = "more_builds"
+COMMITS = "commits"
+# Share of the time budget after which a section starts no new work.
+# Permissions wait for every definition and build, so they need the last half.
+BUDGET_SECTIONS = {LATEST_BUILDS: 0.5, MORE_BUILDS: 0.35, COMMITS: 0.25}
+_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1}
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of sending a request after the scan deadline."""
+
+
+def parse_read_timeouts(values):
+    """Parse `--read-timeout-for FAMILY=SECONDS` values into a `{family: seconds}` dict."""
+    timeouts = {}
+    for value in values or []:
+        family, _, seconds = value.partition("=")
+        timeouts[family.strip()] = float(seconds)
+    return timeouts
+
+
+def parse_duration(value):
+    """Seconds in a duration such as `45m`, `1h30m`, `90s` or `2h`; a bare number is minutes."""
+    text = str(value).strip().lower()
+    try:
+        return float(text) * 60
+    except ValueError:
+        pass
+    seconds = 0.0
+    number = ""
+    for char in text:
+        if char.isdigit() or char == ".":
+            number += char
+        elif char in _DURATION_UNITS and number:
+            seconds += float(number) * _DURATION_UNITS[char]
+            number = ""
+        else:
+            raise ValueError(f"Invalid duration '{value}', expected e.g. 45m, 1h30m or 900s")
+    if number or not seconds:
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 45m, 1h30m or 900s")
+    return seconds
+
+
+def section_status(counts):
+    """`complete`, `sampled` or `truncated` for a section's `started` and `skipped` counts."""
+    if not counts["skipped"]:
+        return "complete"
+    return "sampled" if counts["started"] else "truncated"
+
+
+class ScanDeadline:
+    """Wall-clock budget for a scan; `seconds=None` means no deadline.
+
+    `sections` (e.g. `BUDGET_SECTIONS`) turns on the value ranking of a time
+    budget; without it every step runs until the deadline.
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic, sections=None):
+        self.seconds = seconds or None
+        self.clock = clock
+        self.started = clock()
+        self.requests_refused = 0
+        self.sections = dict(sections or {}) if self.seconds else {}
+        self._section_counts = {name: {"started": 0, "skipped": 0} for name in self.sections}
+        self._skipped = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self.seconds is not None
+
+    def remaining(self):
+        """Seconds left, or None without a deadline."""
+        if self.seconds is None:
+            return None
+        return max(self.started + self.seconds - self.clock(), 0.0)
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining < MIN_REQUEST_SECONDS
+
+    def allows_wait(self, seconds):
+        remaining = self.remaining()
+        return remaining is None or seconds + MIN_REQUEST_SECONDS < remaining
+
+    def timeout(self, connect, read, url=""):
+        """`(connect, read)` clamped to the time left; raises `DeadlineExceeded` when it is up."""
+        remaining = self.remaining()
+        if remaining is None:
+            return connect, read
+        if remaining < MIN_REQUEST_SECONDS:
+            with self._lock:
+                self.requests_refused += 1
+            raise DeadlineExceeded(f"Scan deadline of {self.seconds:.0f}s exceeded, not sending {url}")
+        return min(connect, remaining), min(read, remaining)
+
+    def skip(self, step, section=None):
+        """Record an optional step left out because the deadline passed (counted per step)."""
+        with self._lock:
+            first = step not in self._skipped
+            self._skipped[step] = self._skipped.get(step, 0) + 1
+            if section in self._section_counts:
+                self._section_counts[section]["skipped"] += 1
+        if first:
+            if section in self.sections and not self.expired():
+                logger.warning(f"Time budget: {section} has used its share; skipping {step}")
+            else:
+                logger.warning(f"Scan deadline reached; skipping {step}")
+
+    def section_closed(self, section):
+        """True once `section` has used its share of the time budget."""
+        share = self.sections.get(section)
+        return share is not None and self.clock() - self.started >= share * self.seconds
+
+    def should_skip(self, step, section=None):
+        """True, and recorded, when optional `step` is to be skipped: the deadline
+        has passed or, with a time budget, its `section` has used its share."""
+        if not self.expired() and not self.section_closed(section):
+            if section in self._section_counts:
+                with self._lock:
+                    self._section_counts[section]["started"] += 1
+            return False
+        self.skip(step, section)
+        return True
+
+    def _section_summary(self):
+        return {
+            name: {"status": section_status(counts), "budget_share": self.sections[name], **counts}
+            for name, counts in self._section_counts.items()
+        }
+
+    @property
+    def truncated(self):
+        with self._lock:
+            return bool(self._skipped or self.requests_refused)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "truncated": bool(self._skipped or self.requests_refused),
+                "deadline_seconds": self.seconds,
+                "elapsed_seconds": round(self.clock() - self.started, 3),
+                "skipped_steps": dict(self._skipped),
+                "requests_refused": self.requests_refused,
+                **({"sections": self._section_summary()} if self.sections else {}),
+            }
@@ -0,0 +1,156 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Structured fetch failures and the deferred retry pass.
+
+`FetchError` says why a fetch came back empty: HTTP status (or `error` for
+a transport failure), endpoint family and whether trying again later could
+help. A caller that would otherwise keep an empty result hands a retriable
+failure to the `RetryLedger` with the entity it belongs to, a `retry`
+callable and an `apply` callable that writes the recovered data back. The
+ledger is worked off once, at low concurrency, after the main pass of the
+scan; whatever is still missing after that is listed as incomplete in the
+scan result instead of silently looking like "no data".
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Optional
+
+from scanner.cassette import MissingExchangeError
+from scanner.services.request_metrics import ERROR_STATUS
+from scanner.services.runtime import endpoint_family
+
+logger = logging.getLogger(__name__)
+
+RETRIABLE_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+DEFAULT_RETRY_CONCURRENCY = 2
+
+
+@dataclass(frozen=True)
+class FetchError:
+    url: str
+    family: str
+    status: Any  # HTTP status code, ERROR_STATUS for transport errors, "invalid" for undecodable bodies
+    retriable: bool
+    message: str
+
+    @classmethod
+    def from_response(cls, url, response):
+        status = response.status_code
+        return cls(url, endpoint_family(url), status, status in RETRIABLE_STATUSES, f"HTTP {status} {response.reason or ''}".strip())
+
+    @classmethod
+    def from_exception(cls, url, error):
+        # Connection errors, timeouts, open breakers and the deadline may all
+        # clear up later; a cassette without the exchange never will.
+        retriable = not isinstance(error, MissingExchangeError)
+        return cls(url, endpoint_family(url), ERROR_STATUS, retriable, f"{type(error).__name__}: {error}")
+
+    @classmethod
+    def invalid_body(cls, url, error=None):
+        return cls(url, endpoint_family(url), "invalid", False, f"Undecodable response body{f': {error}' if error else ''}")
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "family": self.family,
+            "status": self.status,
+            "retriable": self.retriable,
+            "message": self.message,
+        }
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    data: Any = None
+    error: Optional[FetchError] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class RetryLedger:
+    def __init__(self):
+        self._deferred = []
+        self._incomplete = []
+        self.deferred_total = 0
+        self.recovered = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._deferred)
+
+    def defer(self, entity, error, retry, apply):
+        """Queue `retry()` (returning a `FetchResult`) for the retry pass; `apply(data)` stores its data."""
+        with self._lock:
+            self._deferred.append((entity, error, retry, apply))
+            self.deferred_total += 1
+
+    def pending(self, entity_type=None):
+        """`(entity, error)` of the deferred fetches not retried yet, optionally of one entity type."""
+        with self._lock:
+            return [(entity, error) for entity, error, _, _ in self._deferred if entity_type in (None, entity.get("type"))]
+
+    def record(self, entity, error):
+        """Record a failure that is not worth retrying; retriable ones are deferred instead."""
+        with self._lock:
+            self._incomplete.append({"entity": entity, "error": error.to_dict(), "retried": False})
+
+    def handle(self, entity, error, retry, apply):
+        """Defer `error` when it is retriable, otherwise record the entity as incomplete."""
+        if error.retriable:
+            self.defer(entity, error, retry, apply)
+        else:
+            self.record(entity, error)
+
+    def drain(self, concurrency=DEFAULT_RETRY_CONCURRENCY, deadline=None):
+        """Run every deferred retry once; returns how many entities were recovered."""
+        with self._lock:
+            deferred, self._deferred = self._deferred, []
+        if not deferred:
+            return 0
+        logger.info(f"Retrying {len(deferred)} deferred fetches")
+
+        def _retry(item):
+            _, error, retry, _ = item
+            if deadline is not None and deadline.should_skip("deferred retries"):
+                return FetchResult(error=error)
+            try:
+                return retry()
+            except Exception as err:
+                return FetchResult(error=FetchError.from_exception(error.url, err))
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = list(pool.map(_retry, deferred))
+        recovered = 0
+        # Results are written back on this thread, one at a time, so `apply` needs no locking.
+        for (entity, _, _, apply), result in zip(deferred, results):
+            if result.ok:
+                apply(result.data)
+                recovered += 1
+            else:
+                with self._lock:
+                    self._incomplete.append({"entity": entity, "error": result.error.to_dict(), "retried": True})
+        with self._lock:
+            self.recovered += recovered
+        logger.info(f"Deferred retries recovered {recovered} of {len(deferred)} fetches")
+        return recovered
+
+    def summary(self):
+        with self._lock:
+            return {
+                "deferred": self.deferred_total,
+                "recovered": self.recovered,
+                "incomplete": list(self._incomplete),
+            }
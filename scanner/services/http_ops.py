@@ -7,17 +7,154 @@
 # Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
 ####
 
+import heapq
+import itertools
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from scanner.http_client import fetch_data, fetch_data_with_headers, post_data
-from scanner.services.runtime import endpoint_family
+from scanner.cassette import CassettePlayer, CassetteRecorder, MissingExchangeError
+from scanner.compression import wire_bytes
+from scanner.http_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    RebasedSession,
+    build_transport,
+    decode_post_response,
+    decode_response,
+    decode_response_with_headers,
+    http,
+    retry_count,
+)
+from scanner.json_codec import iter_items
+from scanner.rate_limiter import AdaptiveRateLimiter
+from scanner.services.concurrency import DEFAULT_MAX_CONCURRENCY, AimdController, wait_deferred
+from scanner.services.circuit_breaker import CircuitBreakers, CircuitOpenError, jittered_backoff
+from scanner.services.fetch_errors import FetchError, FetchResult, RetryLedger
+from scanner.services.deadline import BUDGET_SECTIONS, DEFAULT_READ_TIMEOUTS, DeadlineExceeded, ScanDeadline
+from scanner.services.paginator import CONTINUATION, DEFAULT_PAGE_SIZES, SKIP, SKIP_PAGE_SIZE, Paginator
+from scanner.services.request_metrics import ERROR_STATUS
+from scanner.services.request_scheduler import DEFAULT_MAX_IN_FLIGHT, VALUE_FAMILY_CLASSES, RequestScheduler
+from scanner.services.response_cache import ResponseCache
+from scanner.services.runtime import endpoint_family, normalize_to_list
+from scanner.services.single_flight import SingleFlight
+from scanner.services.token_pool import Credential, TokenPool
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+
+class _CountingChunks:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.bytes = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.bytes += len(chunk)
+            yield chunk
 
 
 class HttpOps:
-    def __init__(self, token: str, runtime_state, logger):
+    def __init__(
+        self,
+        token: str,
+        runtime_state,
+        logger,
+        transport: str = "sync",
+        rate_limit: float = 100.0,
+        pool_maxsize: int = None,
+        pool_maxsize_by_host: dict = None,
+        session_per_thread: bool = False,
+        cache_dir: str = None,
+        cache_max_bytes: int = 512 * 1024 * 1024,
+        cache_ttl_seconds: float = 7 * 24 * 3600,
+        page_sizes: dict = None,
+        prefetch_pages: bool = False,
+        record_dir: str = None,
+        replay_dir: str = None,
+        api_base_url: str = None,
+        max_retries: int = 6,
+        breaker_threshold: int = 5,
+        breaker_reset_seconds: float = 30.0,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        read_timeouts: dict = None,
+        deadline_seconds: float = None,
+        time_budget: bool = False,
+        credentials: list = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        class_limits: dict = None,
+        concurrency: int = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        scheduler: RequestScheduler = None,
+    ):
         self.token = token
         self.runtime_state = runtime_state
         self.logger = logger
+        self.transport = transport
+        self.replaying = bool(replay_dir)
+        # `credentials` (a list of `Credential`) replaces the single `token` when given.
+        self.tokens = TokenPool(credentials or [Credential(token, label="pat-1")])
+        pooled = len(self.tokens) > 1
+        if replay_dir:
+            # Offline: no network, so no rate limiting either.
+            self.limiter = None
+            self.session = CassettePlayer(replay_dir)
+        else:
+            self.limiter = (
+                AdaptiveRateLimiter(rate=rate_limit, on_record=self._record_throttle, per_identity=pooled)
+                if rate_limit
+                else None
+            )
+            self.session = build_transport(
+                transport,
+                limiter=self.limiter,
+                session_per_thread=session_per_thread,
+                pool_maxsize=pool_maxsize,
+                pool_maxsize_by_host=pool_maxsize_by_host,
+                on_pool_event=self._record_pool_event,
+                # Retries happen here, per endpoint family, not inside the transport.
+                transport_retries=False,
+                # With several credentials a 429 is retried here with another one.
+                throttle_retries=0 if pooled else 6,
+            )
+            if api_base_url:
+                self.session = RebasedSession(self.session, api_base_url)
+            if record_dir:
+                self.session = CassetteRecorder(self.session, record_dir)
+        if cache_dir and (record_dir or replay_dir):
+            # A cassette must hold full bodies, not 304s answered from the cache.
+            self.logger.warning("The response cache is disabled while recording or replaying a cassette")
+            cache_dir = None
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.read_timeouts = {**DEFAULT_READ_TIMEOUTS, **(read_timeouts or {})}
+        # A time budget ranks sections and requests by the value of their data.
+        self.deadline = ScanDeadline(deadline_seconds, sections=BUDGET_SECTIONS if time_budget else None)
+        self.max_retries = max_retries
+        self.breakers = CircuitBreakers(breaker_threshold, breaker_reset_seconds, on_event=self._record_breaker)
+        self.retry_ledger = RetryLedger()
+        # A batch scan passes one scheduler to every organization, so its in-flight budget is shared.
+        self.scheduler = scheduler or RequestScheduler(
+            0 if replay_dir else max_in_flight, class_limits, family_classes=VALUE_FAMILY_CLASSES if time_budget else None
+        )
+        # Worker threads per fan-out; a fixed `concurrency` turns the autotuner off.
+        self.concurrency = (
+            AimdController(initial=concurrency, minimum=concurrency, maximum=concurrency)
+            if concurrency
+            else AimdController(maximum=max_concurrency)
+        )
+        self.page_sizes = {**DEFAULT_PAGE_SIZES, **(page_sizes or {})}
+        self.page_size_overrides = dict(page_sizes or {})
+        self.prefetch_pages = prefetch_pages
+        self.flight = SingleFlight(on_shared=self._record_coalesced)
+        self.cache = (
+            ResponseCache(cache_dir, max_bytes=cache_max_bytes, ttl_seconds=cache_ttl_seconds, key_salt="|".join(c.token for c in self.tokens.credentials))
+            if cache_dir
+            else None
+        )
 
     def _mark(self, verb: str, url: str):
         family = endpoint_family(url)
@@ -29,17 +166,493 @@ class HttpOps:
                 self.runtime_state.perf.get_total += 1
                 self.runtime_state.perf.by_family_get[family] += 1
 
+    def _record_throttle(self, host, kind, value=1):
+        perf = self.runtime_state.perf
+        with self.runtime_state.perf_lock:
+            if kind == "throttled":
+                perf.throttled_total += 1
+                perf.by_host_throttled[host] += 1
+            elif kind == "wait_seconds":
+                perf.throttle_wait_seconds += value
+            elif kind == "server_delay_seconds":
+                perf.server_delay_seconds += value
+            elif kind == "remaining":
+                perf.min_remaining_by_host[host] = min(value, perf.min_remaining_by_host.get(host, value))
+
+    def _record_pool_event(self, host, kind):
+        with self.runtime_state.perf_lock:
+            self.runtime_state.perf.pool_events_by_host[host][kind] += 1
+
+    def _record_cache(self, family, kind, value=1):
+        with self.runtime_state.perf_lock:
+            self.runtime_state.perf.cache_by_family[family][kind] += value
+
+    def _record_coalesced(self, url):
+        with self.runtime_state.perf_lock:
+            self.runtime_state.perf.coalesced_total += 1
+            self.runtime_state.perf.coalesced_by_family[endpoint_family(url)] += 1
+
+    def _record_breaker(self, family, kind):
+        with self.runtime_state.perf_lock:
+            self.runtime_state.perf.breaker_events_by_family[family][kind] += 1
+        if kind == "opened":
+            self.logger.warning(
+                f"Circuit opened for '{family}' requests after {self.breakers.failure_threshold} consecutive failures; "
+                f"shedding them for at least {self.breakers.reset_seconds:.0f}s"
+            )
+        elif kind == "closed":
+            self.logger.info(f"Circuit closed for '{family}' requests")
+
+    def _record_outcome(self, family, response, probe=False, error=None):
+        # Connection errors and 5xx count against the family. 429 is the rate
+        # limiter's business and a cassette miss is about one URL, not the
+        # family; both count either way, so such a probe is handed back for
+        # the next request.
+        if isinstance(error, MissingExchangeError) or (response is not None and response.status_code == 429):
+            if probe:
+                self.breakers.release_probe(family)
+        elif response is None or response.status_code >= 500:
+            self.breakers.record_failure(family)
+        else:
+            self.breakers.record_success(family)
+
+    def _retryable(self, response, error=None, retry_elsewhere=False):
+        if response is None:
+            return not isinstance(error, MissingExchangeError)
+        if response.status_code == 429:
+            return self.limiter is None or len(self.tokens) > 1
+        return response.status_code in RETRY_STATUSES or retry_elsewhere
+
+    def _retry_delay(self, attempt, response=None):
+        if self.replaying:
+            # Recorded retries are served in order; there is nothing to wait for.
+            return 0.0
+        if response is not None and response.status_code in (401, 429) and self.tokens.has_ready():
+            # Another credential can send it straight away.
+            return 0.0
+        delay = jittered_backoff(attempt)
+        try:
+            retry_after = float(response.headers.get("Retry-After", 0)) if response is not None else 0.0
+        except ValueError:
+            retry_after = 0.0
+        return max(delay, retry_after)
+
+    def _timeout(self, url):
+        """`(connect, read)` timeout for `url`, clamped to the scan deadline."""
+        read = self.read_timeouts.get(endpoint_family(url), self.read_timeout)
+        return self.deadline.timeout(self.connect_timeout, read, url)
+
+    def _send(self, method, url, send, headers=None, observe=True):
+        """Send one request with timeouts, circuit breaking and jittered retries.
+
+        `send(timeout, headers)` performs one attempt with the auth headers of
+        a credential from the pool merged over `headers`, once the scheduler
+        has admitted it for the family's priority class. Raises `CircuitOpenError` without
+        sending while the family's breaker is open and `DeadlineExceeded` once
+        the scan deadline has passed; stops retrying as soon as either happens.
+        A retry is deferred with `wait_deferred`, which hands the worker's
+        slot back to its pool until the backoff is over. With `observe=False`
+        the final response is left for the caller to observe (streamed bodies).
+        """
+        family = endpoint_family(url)
+        attempt = 0
+        while True:
+            timeout = self._timeout(url)
+            probe = self.breakers.check(family, url)
+            slot = self.scheduler.acquire(family)
+            credential = self.tokens.acquire()
+            started = time.monotonic()
+            try:
+                response, error = send(timeout, {**credential.headers, **(headers or {})}), None
+            except Exception as err:
+                response, error = None, err
+            finally:
+                self.scheduler.release(slot)
+            seconds = time.monotonic() - started
+            retry_elsewhere = self.tokens.release(credential, response)
+            self._record_outcome(family, response, probe, error)
+            delay = self._retry_delay(attempt + 1, response)
+            if (
+                attempt < self.max_retries
+                and self._retryable(response, error, retry_elsewhere)
+                and not self.breakers.is_open(family)
+                and self.deadline.allows_wait(delay)
+            ):
+                self._observe(method, url, seconds, response)
+                if response is not None:
+                    response.close()
+                attempt += 1
+                self.logger.debug(f"Retrying {method} {url} ({attempt}/{self.max_retries}) after {error or response.status_code}")
+                wait_deferred(delay)
+                continue
+            if response is not None:
+                response.scanner_retries = attempt
+            if observe or response is None:
+                self._observe(method, url, seconds, response)
+            if error is not None:
+                raise error
+            return response
+
+    def _log_fetch_error(self, err, url=None):
+        # Past the deadline every remaining request is refused, and an open
+        # breaker sheds every request of its family; both are summarised once
+        # (scan result, breaker events) rather than logged per URL.
+        log = self.logger.debug if isinstance(err, (DeadlineExceeded, CircuitOpenError)) else self.logger.error
+        log(f"Error fetching data from {url}: {err}" if url else f"Error fetching data: {err}")
+
+    def _observe(self, method, url, seconds, response=None, nbytes=None):
+        family = endpoint_family(url)
+        self.concurrency.observe(family, seconds, ERROR_STATUS if response is None else response.status_code)
+        if response is None:
+            self.runtime_state.request_metrics.observe(family, url, method, seconds, ERROR_STATUS)
+            return
+        self.runtime_state.request_metrics.observe(
+            family,
+            url,
+            method,
+            seconds,
+            response.status_code,
+            nbytes=len(response.content or b"") if nbytes is None else nbytes,
+            retries=retry_count(response),
+            wire_bytes=wire_bytes(response),
+        )
+
+    def _conditional_headers(self, url):
+        """The cached entry for `url` and its validators (`If-None-Match` and friends)."""
+        entry = self.cache.get(url) if self.cache is not None else None
+        return entry, (entry.validators() if entry is not None else {})
+
+    def _revalidate(self, url, entry, response):
+        """Serve a 304 from the cache, or store a fresh body that carries validators."""
+        if self.cache is None:
+            return response
+        family = endpoint_family(url)
+        if entry is not None and response.status_code == 304:
+            self.cache.touch(url)
+            self._record_cache(family, "hit")
+            self._record_cache(family, "bytes_saved", len(entry.body))
+            return entry.to_response()
+        self._record_cache(family, "miss")
+        if self.cache.put(url, response):
+            self._record_cache(family, "stored")
+        return response
+
+    def _get(self, url):
+        # Concurrent GETs of the same URL share one request; each caller decodes
+        # the shared response itself, so nobody sees another caller's mutations.
+        return self.flight.do(url, lambda: self._get_uncoalesced(url))
+
+    def _get_uncoalesced(self, url):
+        entry, validators = self._conditional_headers(url)
+        response = self._send(
+            "GET", url, lambda timeout, headers: self.session.get(url=url, headers=headers, timeout=timeout), validators
+        )
+        return self._revalidate(url, entry, response)
+
+    def _get_many(self, urls, get_many):
+        """Send the URLs nobody else has in flight in batches; join the rest.
+
+        A failed request is not retried in place: it is re-queued with a
+        jittered delay and goes out with a later batch, so the rest of the
+        batch is not held up, and requests for a family whose breaker is open
+        are shed without being sent. A batch holds as many URLs as the
+        scheduler admits at once; the others wait for the next batch.
+        """
+        claims = [self.flight.claim(url) for url in urls]
+        pending = [(url, future, 0) for url, (future, is_leader) in zip(urls, claims) if is_leader]
+        deferred = []
+        sequence = itertools.count()
+        while pending or deferred:
+            if not pending:
+                wait_deferred(deferred[0][0] - time.monotonic())
+            while deferred and deferred[0][0] <= time.monotonic():
+                _, _, url, future, attempt = heapq.heappop(deferred)
+                pending.append((url, future, attempt))
+            batch = []
+            timeouts = []
+            slots = []
+            probes = []
+            waiting = []
+            for url, future, attempt in pending:
+                family = endpoint_family(url)
+                try:
+                    timeout = self._timeout(url)
+                    probe = self.breakers.check(family, url)
+                except (CircuitOpenError, DeadlineExceeded) as err:
+                    self.flight.release(url, future, error=err)
+                    continue
+                # Wait for the first slot only; holding some while waiting for more could starve other threads.
+                slot = self.scheduler.try_acquire(family) if slots else self.scheduler.acquire(family)
+                if slot is None:
+                    if probe:
+                        self.breakers.release_probe(family)
+                    waiting.append((url, future, attempt))
+                    continue
+                slots.append(slot)
+                probes.append(probe)
+                timeouts.append(timeout)
+                batch.append((url, future, attempt))
+            pending = waiting
+            if not batch:
+                continue
+            conditional = [self._conditional_headers(url) for url, _, _ in batch]
+            credentials = [self.tokens.acquire() for _ in batch]
+            try:
+                responses = get_many(
+                    [url for url, _, _ in batch],
+                    headers=[{**c.headers, **validators} for c, (_, validators) in zip(credentials, conditional)],
+                    timeout=timeouts,
+                )
+            except Exception as err:
+                responses = [err] * len(batch)
+            finally:
+                for slot in slots:
+                    self.scheduler.release(slot)
+            for (url, future, attempt), (entry, _), credential, probe, response in zip(
+                batch, conditional, credentials, probes, responses
+            ):
+                failed = isinstance(response, Exception)
+                received = None if failed else response
+                seconds = 0.0 if failed else response.elapsed.total_seconds()
+                family = endpoint_family(url)
+                retry_elsewhere = self.tokens.release(credential, received)
+                self._record_outcome(family, received, probe, response if failed else None)
+                delay = self._retry_delay(attempt + 1, received)
+                if (
+                    attempt < self.max_retries
+                    and self._retryable(received, response, retry_elsewhere)
+                    and not self.breakers.is_open(family)
+                    and self.deadline.allows_wait(delay)
+                ):
+                    self._observe("GET", url, seconds, received)
+                    heapq.heappush(deferred, (time.monotonic() + delay, next(sequence), url, future, attempt + 1))
+                elif failed:
+                    self._observe("GET", url, seconds)
+                    self.flight.release(url, future, error=response)
+                else:
+                    response.scanner_retries = attempt
+                    self._observe("GET", url, seconds, response)
+                    self.flight.release(url, future, result=self._revalidate(url, entry, response))
+        results = []
+        for future, _ in claims:
+            try:
+                results.append(future.result())
+            except Exception as err:
+                results.append(err)
+        return results
+
+    def _fetch_decoded(self, url, qret=False):
+        try:
+            self.logger.debug(f"Fetching data from {url}")
+            try:
+                response = self._get(url)
+            except ConnectionResetError as cre:
+                self.logger.warning(f"Connection reset error: {cre}")
+                return None
+        except Exception as err:
+            self._log_fetch_error(err)
+            return None
+        return decode_response(response, qret=qret)
+
     def fetch_data(self, url, qret=False):
         self._mark("GET", url)
-        return fetch_data(url, self.token, qret=qret)
+        return self._fetch_decoded(url, qret=qret)
+
+    def _result(self, url, response, qret=False):
+        """`FetchResult` for a response: its decoded data, or why there is none."""
+        if not response.ok:
+            error = FetchError.from_response(url, response)
+            self.logger.error(f"HTTP error: {error.message} for url: {url}")
+            return FetchResult(error=error)
+        data = decode_response(response, qret=qret)
+        if data is None:
+            return FetchResult(error=FetchError.invalid_body(url))
+        return FetchResult(data)
+
+    def fetch_result(self, url, qret=False):
+        """Like `fetch_data`, but a failure comes back as a `FetchResult` carrying a `FetchError`."""
+        self._mark("GET", url)
+        try:
+            self.logger.debug(f"Fetching data from {url}")
+            response = self._get(url)
+        except Exception as err:
+            self._log_fetch_error(err, url)
+            return FetchResult(error=FetchError.from_exception(url, err))
+        return self._result(url, response, qret=qret)
+
+    def _threaded_get_many(self, max_workers):
+        """`get_many` for transports without one: each batch goes through a small thread pool."""
+
+        def _send_one(request):
+            url, headers, timeout = request
+            try:
+                return self.session.get(url=url, headers=headers, timeout=timeout)
+            except Exception as err:
+                return err
+
+        def get_many(urls, headers, timeout):
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                return list(pool.map(_send_one, zip(urls, headers, timeout)))
+
+        return get_many
+
+    def fetch_many_results(self, urls, qret=False, max_workers=None):
+        """Fetch several URLs concurrently, returning a `FetchResult` per URL in input order.
+
+        The async transport issues every request on its event loop at once; the
+        sync transport sends them through a small thread pool, sized by the
+        concurrency autotuner unless `max_workers` is given.
+        """
+        urls = list(urls)
+        for url in urls:
+            self._mark("GET", url)
+        get_many = getattr(self.session, "get_many", None) or self._threaded_get_many(max_workers or self.concurrency.limit)
+        results = []
+        for url, response in zip(urls, self._get_many(urls, get_many)):
+            if isinstance(response, Exception):
+                self._log_fetch_error(response, url)
+                results.append(FetchResult(error=FetchError.from_exception(url, response)))
+            else:
+                results.append(self._result(url, response, qret=qret))
+        return results
+
+    def fetch_many(self, urls, qret=False, max_workers=None):
+        """Fetch several URLs concurrently, returning their data (None on failure) in input order."""
+        return [result.data for result in self.fetch_many_results(urls, qret=qret, max_workers=max_workers)]
 
     def fetch_data_with_headers(self, url):
         self._mark("GET", url)
-        return fetch_data_with_headers(url, self.token)
+        try:
+            self.logger.debug(f"Fetching data with headers from {url}")
+            response = self._get(url)
+        except Exception as err:
+            self._log_fetch_error(err)
+            return None, None
+        return decode_response_with_headers(response)
+
+    def _can_stream(self):
+        # Cached and async responses are buffered anyway (the cache stores the
+        # body, aiohttp reads it on the loop), so they are decoded from memory.
+        return self.cache is None and getattr(self.session, "get_many", None) is None
+
+    def _fetch_streamed(self, url):
+        """GET `url` and decode its items while the body arrives; returns `(items, headers, error)`."""
+        started = time.monotonic()
+        try:
+            self.logger.debug(f"Streaming data from {url}")
+            response = self._send(
+                "GET",
+                url,
+                lambda timeout, headers: self.session.get(url=url, headers=headers, stream=True, timeout=timeout),
+                observe=False,
+            )
+        except Exception as err:
+            self._log_fetch_error(err, url)
+            return None, None, FetchError.from_exception(url, err)
+        with response:
+            if not response.ok:
+                self._observe("GET", url, time.monotonic() - started, response)
+                error = FetchError.from_response(url, response)
+                self.logger.error(f"HTTP error: {error.message} for url: {url}")
+                return None, None, error
+            chunks = _CountingChunks(response.iter_content(STREAM_CHUNK_SIZE))
+            error = None
+            try:
+                items = list(iter_items(chunks))
+            except Exception as err:
+                self._log_fetch_error(err)
+                items, error = None, FetchError.invalid_body(url, err)
+            self._observe("GET", url, time.monotonic() - started, response, nbytes=chunks.bytes)
+            return items, response.headers, error
+
+    def fetch_page(self, url):
+        """Fetch a list endpoint as `(items, headers, error)`; `items` is None and `error` a `FetchError` on failure.
+
+        On the sync transport without a response cache the body is decoded
+        incrementally, so the full text and full parse tree are never held
+        alongside the resulting items.
+        """
+        self._mark("GET", url)
+        if self._can_stream():
+            return self._fetch_streamed(url)
+        try:
+            response = self._get(url)
+        except Exception as err:
+            self._log_fetch_error(err, url)
+            return None, None, FetchError.from_exception(url, err)
+        data, headers = decode_response_with_headers(response)
+        if data is None:
+            error = FetchError.from_response(url, response) if not response.ok else FetchError.invalid_body(url)
+            return None, None, error
+        return normalize_to_list(data), headers, None
+
+    def fetch_items_with_headers(self, url):
+        """Fetch a list endpoint as `(items, headers)`; `(None, None)` on failure."""
+        items, headers, _ = self.fetch_page(url)
+        return items, headers
+
+    def fetch_items(self, url):
+        return self.fetch_items_with_headers(url)[0]
+
+    def paginate(self, url, style=CONTINUATION, page_size=None, max_items=None, **kwargs):
+        """Return a `Paginator` over a list endpoint, sized by its endpoint family by default."""
+        if page_size is None and style == SKIP:
+            page_size = self.page_size_overrides.get(endpoint_family(url), SKIP_PAGE_SIZE)
+        elif page_size is None:
+            page_size = self.page_sizes.get(endpoint_family(url))
+        return Paginator(
+            self, url, style=style, page_size=page_size, max_items=max_items, prefetch=self.prefetch_pages, **kwargs
+        )
+
+    def fetch_all(self, url, style=CONTINUATION, page_size=None, max_items=None, **kwargs):
+        return self.paginate(url, style=style, page_size=page_size, max_items=max_items, **kwargs).all()
 
     def post_data(self, url, payload):
         self._mark("POST", url)
-        return post_data(url, payload, self.token)
+        try:
+            response = self._send(
+                "POST",
+                url,
+                lambda timeout, headers: self.session.post(url=url, headers=headers, data=payload, timeout=timeout),
+            )
+        except Exception as err:
+            return None, str(err)
+        return decode_post_response(response)
+
+    def close(self):
+        if self.session is not http:
+            self.session.close()
+
+    def metrics_snapshot(self):
+        """Per-family request metrics plus the scan-wide counters, for the JSON sidecar."""
+        perf = self.runtime_state.perf
+        with self.runtime_state.perf_lock:
+            counters = {
+                "get_total": perf.get_total,
+                "post_total": perf.post_total,
+                "get_by_family": dict(perf.by_family_get),
+                "post_by_family": dict(perf.by_family_post),
+                "throttled_total": perf.throttled_total,
+                "throttled_by_host": dict(perf.by_host_throttled),
+                "throttle_wait_seconds": perf.throttle_wait_seconds,
+                "server_delay_seconds": perf.server_delay_seconds,
+                "coalesced_total": perf.coalesced_total,
+                "coalesced_by_family": dict(perf.coalesced_by_family),
+                "breaker_events_by_family": {family: dict(events) for family, events in perf.breaker_events_by_family.items()},
+                "cache_by_family": {family: dict(counts) for family, counts in perf.cache_by_family.items()},
+                "pool_events_by_host": {host: dict(events) for host, events in perf.pool_events_by_host.items()},
+            }
+        return {
+            "counters": counters,
+            "breakers": self.breakers.snapshot(),
+            "credentials": self.tokens.snapshot(),
+            "scheduler": self.scheduler.snapshot(),
+            "concurrency": self.concurrency.snapshot(),
+            **self.runtime_state.request_metrics.snapshot(),
+        }
+
+    def metrics_openmetrics(self):
+        return self.runtime_state.request_metrics.to_openmetrics()
 
     def log_perf_summary(self):
         if os.environ.get("SCANNER_PERF_DEBUG") != "1":
@@ -53,3 +666,95 @@ class HttpOps:
             get_by_family,
             post_by_family,
         )
+        perf = self.runtime_state.perf
+        self.logger.info(
+            "Scanner throttling | 429 total=%s by host=%s client wait=%.1fs server delay=%.1fs min remaining=%s rates=%s",
+            perf.throttled_total,
+            dict(perf.by_host_throttled),
+            perf.throttle_wait_seconds,
+            perf.server_delay_seconds,
+            dict(perf.min_remaining_by_host),
+            self.limiter.snapshot() if self.limiter else {},
+        )
+        for host, events in sorted(perf.pool_events_by_host.items()):
+            checkouts = events.get("checkout", 0)
+            new_connections = events.get("new_connection", 0)
+            self.logger.info(
+                "Scanner connection pool | host=%s checkouts=%s hits=%s misses(new connections)=%s discarded=%s http2 streams=%s",
+                host,
+                checkouts,
+                max(checkouts - new_connections, 0),
+                new_connections,
+                events.get("discarded", 0),
+                events.get("http2_stream", 0),
+            )
+        self.logger.info(
+            "Scanner request coalescing | requests saved=%s by family=%s",
+            perf.coalesced_total,
+            dict(perf.coalesced_by_family),
+        )
+        for family, events in sorted(perf.breaker_events_by_family.items()):
+            self.logger.info(
+                "Scanner circuit breaker | family=%s opened=%s closed=%s shed=%s state=%s",
+                family,
+                events.get("opened", 0),
+                events.get("closed", 0),
+                events.get("shed", 0),
+                self.breakers.snapshot().get(family, "closed"),
+            )
+        if len(self.tokens) > 1:
+            for label, usage in self.tokens.snapshot().items():
+                self.logger.info(
+                    "Scanner credentials | credential=%s requests=%s throttled=%s unauthorized=%s budget=%.2f disabled=%s",
+                    label,
+                    usage["requests"],
+                    usage["throttled"],
+                    usage["unauthorized"],
+                    usage["budget"],
+                    usage["disabled"],
+                )
+        concurrency = self.concurrency.snapshot()
+        self.logger.info(
+            "Scanner concurrency | limit=%s peak=%s range=%s-%s changes=%s",
+            concurrency["limit"],
+            concurrency["peak"],
+            concurrency["minimum"],
+            concurrency["maximum"],
+            [(entry["seconds"], entry["limit"], entry["reason"]) for entry in concurrency["history"][1:]],
+        )
+        if self.scheduler.enabled:
+            for name, stats in self.scheduler.snapshot()["classes"].items():
+                self.logger.info(
+                    "Scanner request scheduler | class=%s admitted=%s queued=%s max waiting=%s wait=%.1fs",
+                    name,
+                    stats["admitted"],
+                    stats["queued"],
+                    stats["max_waiting"],
+                    stats["wait_seconds"],
+                )
+        for family, summary in self.runtime_state.request_metrics.snapshot()["families"].items():
+            latency = summary["latency_seconds"]
+            self.logger.info(
+                "Scanner requests | family=%s requests=%s p50=%.3fs p95=%.3fs p99=%.3fs max=%.3fs bytes=%s wire bytes=%s retries=%s status=%s",
+                family,
+                summary["requests"],
+                latency["p50"],
+                latency["p95"],
+                latency["p99"],
+                latency["max"],
+                summary["bytes"],
+                summary["wire_bytes"],
+                summary["retries"],
+                summary["status"],
+            )
+        for family, counts in sorted(perf.cache_by_family.items()):
+            lookups = counts.get("hit", 0) + counts.get("miss", 0)
+            self.logger.info(
+                "Scanner response cache | family=%s hits=%s misses=%s hit rate=%.1f%% stored=%s bytes saved=%s",
+                family,
+                counts.get("hit", 0),
+                counts.get("miss", 0),
+                100.0 * counts.get("hit", 0) / lookups if lookups else 0.0,
+                counts.get("stored", 0),
+                counts.get("bytes_saved", 0),
+            )
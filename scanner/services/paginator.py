@@ -0,0 +1,171 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""One paginator for both ADO paging styles.
+
+- `continuation`: the server returns `x-ms-continuationtoken`; the next page is
+  requested with `continuationToken=<token>` (projects, definitions, builds,
+  refs, execution history, variable groups, environments).
+- `skip`: the client advances `$skip` by the page size until a short page
+  (commits, pull requests, feed packages).
+
+Page size comes from the caller or the per-family defaults on `HttpOps`;
+`page_size=0` sends no `$top` and leaves the page size to the server. A short
+page ends `skip` paging, so a page size above what the server returns would
+stop after one page; `skip` endpoints default to `SKIP_PAGE_SIZE` instead of
+their family's size. With
+`prefetch`, the next page is requested in the background while the current
+one is being consumed.
+"""
+
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner.services.runtime import normalize_to_list
+
+CONTINUATION = "continuation"
+SKIP = "skip"
+
+DEFAULT_PAGE_SIZES = {
+    "projects": 500,
+    "build_definitions": 1000,
+    "builds": 1000,
+    "repos": 1000,
+    "feeds": 1000,
+    "serviceendpoint": 1000,
+}
+# `$top` of `skip` paging unless the caller or `--page-size` sets one; the
+# page size ADO serves commits and pull requests at.
+SKIP_PAGE_SIZE = 100
+
+
+def parse_page_sizes(values):
+    """Parse `--page-size FAMILY=N` values into a `{family: size}` dict."""
+    sizes = {}
+    for value in values or []:
+        family, _, size = value.partition("=")
+        sizes[family.strip()] = int(size)
+    return sizes
+
+
+def with_query(url, **params):
+    """Set query parameters on `url`, replacing existing ones and leaving the rest untouched.
+
+    ADO names such as `$top` are not valid identifiers, so pass them unpacked:
+    `with_query(url, **{"$top": 100})`.
+    """
+    base, _, query = url.partition("?")
+    segments = [segment for segment in query.split("&") if segment]
+    remaining = dict(params)
+    for index, segment in enumerate(segments):
+        key = segment.split("=", 1)[0]
+        if key in remaining:
+            segments[index] = f"{key}={urllib.parse.quote(str(remaining.pop(key)), safe='')}"
+    for key, value in remaining.items():
+        segments.append(f"{key}={urllib.parse.quote(str(value), safe='')}")
+    return f"{base}?{'&'.join(segments)}" if segments else base
+
+
+class Paginator:
+    def __init__(
+        self,
+        http_ops,
+        url,
+        style=CONTINUATION,
+        page_size=None,
+        max_items=None,
+        prefetch=False,
+        top_param="$top",
+        skip_param="$skip",
+        token_param="continuationToken",
+    ):
+        self.http_ops = http_ops
+        self.url = url
+        self.style = style
+        self.page_size = page_size
+        self.max_items = max_items
+        self.prefetch = prefetch
+        self.top_param = top_param
+        self.skip_param = skip_param
+        self.token_param = token_param
+        self.pages_fetched = 0
+        self.failed = False
+        self.error = None  # FetchError of the page that failed
+
+    def _page_url(self, cursor, remaining):
+        params = {}
+        size = self.page_size
+        if remaining is not None and (size is None or remaining < size):
+            size = remaining
+        if size:
+            params[self.top_param] = size
+        if self.style == SKIP:
+            params[self.skip_param] = cursor or 0
+        elif cursor:
+            params[self.token_param] = cursor
+        return with_query(self.url, **params), size
+
+    def _fetch(self, cursor, remaining):
+        url, size = self._page_url(cursor, remaining)
+        data, headers, error = self.http_ops.fetch_page(url)
+        token = None
+        if self.style == CONTINUATION and headers is not None:
+            token = headers.get("x-ms-continuationtoken") or headers.get("X-Ms-Continuationtoken")
+        return data, token, size, error
+
+    def _next_cursor(self, cursor, items, token, size):
+        if self.style == SKIP:
+            if not items or (size and len(items) < size) or not size:
+                return None
+            return (cursor or 0) + len(items)
+        return token
+
+    def pages(self):
+        fetched = 0
+        cursor = None
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            pending = None
+            while True:
+                remaining = None if self.max_items is None else self.max_items - fetched
+                if remaining is not None and remaining <= 0:
+                    return
+                if pending is not None:
+                    data, token, size, error = pending.result()
+                    pending = None
+                else:
+                    data, token, size, error = self._fetch(cursor, remaining)
+                self.pages_fetched += 1
+                if data is None:
+                    self.failed = True
+                    self.error = error
+                    return
+                items = normalize_to_list(data)
+                if remaining is not None:
+                    items = items[:remaining]
+                fetched += len(items)
+                cursor = self._next_cursor(cursor, items, token, size)
+                more = cursor is not None and (self.max_items is None or fetched < self.max_items)
+                if more and executor is not None:
+                    next_remaining = None if self.max_items is None else self.max_items - fetched
+                    pending = executor.submit(self._fetch, cursor, next_remaining)
+                if items:
+                    yield items
+                if not more:
+                    return
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    def all(self):
+        return list(self)
@@ -11,15 +11,59 @@ import json
 import logging
 import urllib.parse
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import re
+from threading import Lock
 
 import yaml
 
+from scanner.services.deadline import LATEST_BUILDS, MORE_BUILDS
 from scanner.services.runtime import normalize_to_list
 
 logger = logging.getLogger(__name__)
 
+_regex_patterns = None
+_regex_patterns_lock = Lock()
+
+
+def load_regex_patterns():
+    """Compiled CI/CD SAST patterns per engine, loaded once per process and shared by every scan in it."""
+    global _regex_patterns
+    with _regex_patterns_lock:
+        if _regex_patterns is not None:
+            return _regex_patterns
+        regex_cache = {}
+        try:
+            with open("datastore/scanners/patterns/cicd_sast.json", "r") as file:
+                patterns_data = json.load(file)
+                for current_engine, engine_data in patterns_data.items():
+                    compiled_patterns = []
+                    categories = engine_data.get("categories", [])
+                    for category in categories:
+                        category_name = category.get("name", "Unknown")
+                        category_severity = category.get("severity", "unknown")
+                        category_description = category.get("description", "")
+                        for pattern in category.get("patterns", []):
+                            try:
+                                compiled_pattern = re.compile(pattern)
+                                compiled_patterns.append({
+                                    "pattern": compiled_pattern,
+                                    "category": category_name,
+                                    "severity": category_severity,
+                                    "description": category_description
+                                })
+                            except re.error as regex_error:
+                                logger.warning(f"Invalid regex pattern skipped for engine {current_engine}, category {category_name}: {regex_error}")
+                    regex_cache[current_engine] = compiled_patterns
+        except FileNotFoundError:
+            logger.error("Regex patterns file not found. Please ensure 'patterns/cicd_sast.json' exists.")
+        except json.JSONDecodeError:
+            logger.error("Failed to parse the regex patterns file as JSON.")
+        except Exception as e:
+            logger.error(f"Error loading regex patterns: {e}")
+        _regex_patterns = regex_cache
+        return regex_cache
+
 
 class PipelinesService:
     def __init__(self, manager, http_ops, runtime_state):
@@ -39,36 +83,7 @@ class PipelinesService:
 
     def scan_string_with_regex(self, string, engine, source_of_data):
         if not self.runtime_state.regex_patterns_loaded:
-            regex_cache = {}
-            try:
-                with open("datastore/scanners/patterns/cicd_sast.json", "r") as file:
-                    patterns_data = json.load(file)
-                    for current_engine, engine_data in patterns_data.items():
-                        compiled_patterns = []
-                        categories = engine_data.get("categories", [])
-                        for category in categories:
-                            category_name = category.get("name", "Unknown")
-                            category_severity = category.get("severity", "unknown")
-                            category_description = category.get("description", "")
-                            for pattern in category.get("patterns", []):
-                                try:
-                                    compiled_pattern = re.compile(pattern)
-                                    compiled_patterns.append({
-                                        "pattern": compiled_pattern,
-                                        "category": category_name,
-                                        "severity": category_severity,
-                                        "description": category_description
-                                    })
-                                except re.error as regex_error:
-                                    logger.warning(f"Invalid regex pattern skipped for engine {current_engine}, category {category_name}: {regex_error}")
-                        regex_cache[current_engine] = compiled_patterns
-            except FileNotFoundError:
-                logger.error("Regex patterns file not found. Please ensure 'patterns/cicd_sast.json' exists.")
-            except json.JSONDecodeError:
-                logger.error("Failed to parse the regex patterns file as JSON.")
-            except Exception as e:
-                logger.error(f"Error loading regex patterns: {e}")
-            self.runtime_state.regex_patterns_cache = regex_cache
+            self.runtime_state.regex_patterns_cache = load_regex_patterns()
             self.runtime_state.regex_patterns_loaded = True
 
         compiled_patterns = self.runtime_state.regex_patterns_cache.get(engine, [])
@@ -130,7 +145,9 @@ class PipelinesService:
         enriched_build_definition["k_project"] = self.manager.enrich_k_project(project)
         enriched_build_definition["k_key"] = f"{project}_{build_definition['id']}"
         enriched_build_definition["builds"] = {
-            "metrics": self.get_build_definition_metrics(build_definition_id=f"{project}_{build_definition['id']}"),
+            "metrics": None
+            if self.http_ops.deadline.should_skip("definition metrics", MORE_BUILDS)
+            else self.get_build_definition_metrics(build_definition_id=f"{project}_{build_definition['id']}"),
             "preview": {},
             "builds": [],
         }
@@ -139,22 +156,31 @@ class PipelinesService:
         processed_builds = []
         builds = []
 
-        if not skip_builds:
+        if not skip_builds and not self.http_ops.deadline.should_skip("build lists", LATEST_BUILDS):
             builds_url = f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['builds']['api_endpoint']}?definitions={enriched_build_definition['id']}&{manager_pipeline['builds']['api_version']}"
-            builds = normalize_to_list(self.http_ops.fetch_data(builds_url))
+            builds = self.http_ops.fetch_all(builds_url)
             logger.debug(f"{len(builds)} builds for build definition {build_definition.get('name')}")
 
             for build in builds:
                 build["k_project"] = self.manager.enrich_k_project(project)
                 build["k_key"] = f"{project}_{build.get('id')}"
 
+            latest_build_id = max((build["id"] for build in builds), default=None)
+
             def _fetch_yaml(build):
+                # The latest build says most about a definition; older ones are worth less.
+                if build["id"] == latest_build_id:
+                    skip = self.http_ops.deadline.should_skip("latest build YAML logs", LATEST_BUILDS)
+                else:
+                    skip = self.http_ops.deadline.should_skip("older build YAML logs", MORE_BUILDS)
+                if skip:
+                    return build["id"], None
                 yaml_url = f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['builds']['api_endpoint']}/{build['id']}/logs/1?{manager_pipeline['builds']['api_version']}"
                 yaml_content = self.http_ops.fetch_data(yaml_url, qret=True)
                 return build["id"], yaml_content
 
             yaml_results = {}
-            with ThreadPoolExecutor(max_workers=4) as pool:
+            with self.http_ops.concurrency.pool() as pool:
                 future_map = {pool.submit(_fetch_yaml, build): build["id"] for build in builds}
                 for future in as_completed(future_map):
                     try:
@@ -184,7 +210,7 @@ class PipelinesService:
                     logger.warning(f"Could not parse YAML for build {build.get('id')} for build definition {build_definition.get('name')}")
                     continue
 
-            if manager_pipeline.get("preview"):
+            if manager_pipeline.get("preview") and not self.http_ops.deadline.should_skip("YAML previews"):
                 preview_url = f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['preview']['api_endpoint']}/{build_definition['id']}/preview?{manager_pipeline['preview']['api_version']}"
                 repository_info = enriched_build_definition.get("repository", {})
                 repo_id = repository_info.get("id")
@@ -207,7 +233,7 @@ class PipelinesService:
                         f"Project name {decoded_string} not found in projects. May need to increase scope of observability in config"
                     )
                 else:
-                    if top_branches_to_scan == 0:
+                    if top_branches_to_scan == 0 or self.http_ops.deadline.should_skip("branch lists for previews", MORE_BUILDS):
                         branches_names = [default_branch.split("/")[-1]]
                     else:
                         _, branches_names = self.manager.get_repository_branches(
@@ -220,6 +246,12 @@ class PipelinesService:
                         )
 
                     def _preview_one_branch(branch_name):
+                        if branch_name == default_branch.split("/")[-1]:
+                            skip = self.http_ops.deadline.should_skip("default branch previews", LATEST_BUILDS)
+                        else:
+                            skip = self.http_ops.deadline.should_skip("branch previews", MORE_BUILDS)
+                        if skip:
+                            return branch_name, None
                         branch_result = {"is_yaml_preview_available": False, "cicd_sast": []}
 
                         if build_definition.get("queueStatus") == "disabled":
@@ -322,12 +354,13 @@ class PipelinesService:
                             branch_result["is_yaml_preview_available"] = False
                         return branch_name, branch_result
 
-                    with ThreadPoolExecutor(max_workers=4) as preview_pool:
+                    with self.http_ops.concurrency.pool() as preview_pool:
                         preview_futures = [preview_pool.submit(_preview_one_branch, branch_name) for branch_name in branches_names]
                         preview_results = {}
                         for future in as_completed(preview_futures):
                             branch_name, branch_payload = future.result()
-                            preview_results[branch_name] = branch_payload
+                            if branch_payload is not None:
+                                preview_results[branch_name] = branch_payload
                     for branch_name in branches_names:
                         enriched_build_definition["builds"]["preview"][branch_name] = preview_results.get(
                             branch_name,
@@ -345,7 +378,14 @@ class PipelinesService:
         },
         top_branches_to_scan=0,
         skip_builds=False,
+        progress=None,
     ):
+        """Definitions and builds of every project.
+
+        With a `progress` log (see `scanner.checkpoint.ProgressLog`) each
+        project's results are stored as it completes, and projects already in
+        the log are taken from it instead of being scanned again.
+        """
         logger.debug("Starting pipeline discovery")
         build_def_list = []
         builds_list = []
@@ -356,14 +396,21 @@ class PipelinesService:
         }
 
         for project in self.manager._wellformed_project_ids():
+            done = progress.get(project) if progress is not None else None
+            if done is not None:
+                build_def_list.extend(done[0])
+                builds_list.extend(done[1])
+                continue
             url = f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['build_definitions']['api_endpoint']}?{manager_pipeline['build_definitions']['api_version']}"
-            build_definitions = normalize_to_list(self.http_ops.fetch_data(url))
+            build_definitions = self.http_ops.fetch_all(url)
             logger.debug(f"{len(build_definitions)} build definitions for {self.manager.projects[project]['name']}")
             if not build_definitions:
+                if progress is not None:
+                    progress.put(project, ([], []))
                 continue
 
             ordered_results = {}
-            with ThreadPoolExecutor(max_workers=4) as pool:
+            with self.http_ops.concurrency.pool() as pool:
                 future_map = {
                     pool.submit(
                         self._process_build_definition,
@@ -384,11 +431,17 @@ class PipelinesService:
                         logger.warning(f"Could not process build definition index {index} in project {project}: {err}")
                         ordered_results[index] = (None, [])
 
+            project_definitions = []
+            project_builds = []
             for index in range(len(build_definitions)):
                 definition_data, build_items = ordered_results.get(index, (None, []))
                 if definition_data is not None:
-                    build_def_list.append(definition_data)
-                    builds_list.extend(build_items)
+                    project_definitions.append(definition_data)
+                    project_builds.extend(build_items)
+            build_def_list.extend(project_definitions)
+            builds_list.extend(project_builds)
+            if progress is not None:
+                progress.put(project, (project_definitions, project_builds))
 
         self.manager._build_runtime_indexes(build_def_list, builds_list)
 
@@ -407,21 +460,13 @@ class PipelinesService:
             },
         },
     ):
-        def _fetch_one(index, build_definition):
+        urls = []
+        for build_definition in build_definitions:
             project, build_definition_id = build_definition["k_key"].split("_")
-            url = f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['build_definitions']['api_endpoint']}/{str(build_definition_id)}/resources?{manager_pipeline['build_definitions']['resources_api_version']}"
-            authorized_resources = self.http_ops.fetch_data(url)
-            return index, normalize_to_list(authorized_resources)
-
-        results = {}
-        with ThreadPoolExecutor(max_workers=4) as pool:
-            future_map = {
-                pool.submit(_fetch_one, index, build_definition): index
-                for index, build_definition in enumerate(build_definitions)
-            }
-            for future in as_completed(future_map):
-                index, resources = future.result()
-                results[index] = resources
+            urls.append(
+                f"https://dev.azure.com/{self.manager.organization}/{project}/{manager_pipeline['build_definitions']['api_endpoint']}/{str(build_definition_id)}/resources?{manager_pipeline['build_definitions']['resources_api_version']}"
+            )
+        results = {index: normalize_to_list(data) for index, data in enumerate(self.http_ops.fetch_many(urls))}
 
         for index, build_definition in enumerate(build_definitions):
             build_definition["resources"] = list(results.get(index, []))
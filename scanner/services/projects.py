@@ -7,9 +7,7 @@
 # Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
 ####
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-from scanner.services.runtime import normalize_to_list
+from concurrent.futures import as_completed
 
 
 class ProjectsService:
@@ -58,8 +56,8 @@ class ProjectsService:
         self.logger.debug("Discovering projects")
         self.manager.projects = {}
 
-        active_projects = normalize_to_list(self.http_ops.fetch_data(url))
-        deleted_projects = normalize_to_list(self.http_ops.fetch_data(url_deleted))
+        active_projects = self.http_ops.fetch_all(url)
+        deleted_projects = self.http_ops.fetch_all(url_deleted)
         all_projects = active_projects + deleted_projects
 
         if project_filter:
@@ -81,7 +79,7 @@ class ProjectsService:
                 self.manager.projects[project_id] = project
 
         eligible_projects = [project for project in selected_projects if project.get("state") != "deleted" and project.get("id")]
-        with ThreadPoolExecutor(max_workers=4) as pool:
+        with self.http_ops.concurrency.pool() as pool:
             future_to_pid = {pool.submit(self._fetch_project_settings, project): project["id"] for project in eligible_projects}
             for future in as_completed(future_to_pid):
                 project_id = future_to_pid[future]
@@ -113,13 +111,11 @@ class ProjectsService:
 
     def get_project_language_metrics(self, projects):
         stats = {}
-        for project in projects:
-            project_id = project.get("id")
-            project_name = project.get("name")
-            url = f"https://dev.azure.com/{self.manager.organization}/{project_name}/_apis/projectanalysis/languagemetrics?api-version=6.0-preview.1"
-            try:
-                language_stats = self.http_ops.fetch_data(url)
-                stats[project_id] = {"language_stats": language_stats}
-            except Exception as err:
-                self.logger.warning(f"An error occurred while retrieving metrics for project {project_name}: {err}")
+        projects = list(projects)
+        urls = [
+            f"https://dev.azure.com/{self.manager.organization}/{project.get('name')}/_apis/projectanalysis/languagemetrics?api-version=6.0-preview.1"
+            for project in projects
+        ]
+        for project, language_stats in zip(projects, self.http_ops.fetch_many(urls)):
+            stats[project.get("id")] = {"language_stats": language_stats}
         return stats
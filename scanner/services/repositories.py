@@ -10,6 +10,10 @@
 import logging
 from datetime import datetime, timedelta, timezone
 
+from scanner.services.deadline import COMMITS
+from scanner.services.fetch_errors import FetchResult
+from scanner.services.paginator import SKIP
+
 logger = logging.getLogger(__name__)
 
 
@@ -135,85 +139,95 @@ class RepositoriesService:
         return stats
 
     def get_commits_per_repository(self, protected_resources):
+        """Commits of the last 90 days for every repository.
+
+        A repository whose paging fails part way keeps the commits read so
+        far; a retriable failure is deferred to the retry pass, which pages
+        the repository again and replaces them.
+        """
         all_commits = []
-        now = datetime.utcnow()
-        since = now - timedelta(days=90)
-        since_iso = since.strftime("%Y-%m-%dT%H:%M:%SZ")
-        batch_size = 100
+        since_iso = (datetime.utcnow() - timedelta(days=90)).strftime("%Y-%m-%dT%H:%M:%SZ")
         for repo_resource in protected_resources:
             repo = repo_resource["resource"]
-            project_id = repo["project"]["id"]
-            repo_id = repo["id"]
-            k_project = repo.get("k_project")
-            skip = 0
-            while True:
-                url = (
-                    f"https://dev.azure.com/{self.manager.organization}/{project_id}/_apis/git/repositories/{repo_id}/commits"
-                    f"?searchCriteria.fromDate={since_iso}"
-                    f"&$top={batch_size}"
-                    f"&$skip={skip}"
-                    f"&searchCriteria.includePushData=true"
-                    f"&api-version=7.1"
-                )
-                commits = self.http_ops.fetch_data(url)
-                if not commits:
-                    break
-                for commit in commits:
-                    author = commit.get("author", {})
-                    committer = commit.get("committer", {})
-                    push = commit.get("push", {})
-                    change_counts = commit.get("changeCounts", {})
-                    author_email = author.get("email")
-                    author_name = author.get("name")
-                    committer_email = committer.get("email")
-                    committer_name = committer.get("name")
-                    committer_date = committer.get("date")
-                    push_email = push.get("pushedBy", {}).get("uniqueName")
-                    push_name = push.get("pushedBy", {}).get("displayName")
-                    push_id = push.get("pushId")
-                    push_date = push.get("date")
-                    add_count = change_counts.get("Add", 0)
-                    edit_count = change_counts.get("Edit", 0)
-                    delete_count = change_counts.get("Delete", 0)
-                    committer_author_match = 1 if committer_name == author_name else 0
-                    committer_pusher_match = 1 if committer_name == push_name else 0
-                    commit_by_ado = 1 if push_email == "00000002-0000-8888-8000-000000000000@2c895908-04e0-4952-89fd-54b0046d6288" else 0
-                    all_commits.append(
-                        {
-                            "repositoryId": repo_id,
-                            "repositoryName": repo.get("name"),
-                            "projectId": project_id,
-                            "k_project": k_project,
-                            "commitId": commit.get("commitId"),
-                            "authorEmail": author_email,
-                            "authorName": author_name,
-                            "committerEmail": committer_email,
-                            "committerName": committer_name,
-                            "committerDate": committer_date,
-                            "changeCounts": {"add": add_count, "edit": edit_count, "delete": delete_count},
-                            "pushEmail": push_email,
-                            "pushId": push_id,
-                            "pushDate": push_date,
-                            "committerAuthorMatch": committer_author_match,
-                            "committerPusherMatch": committer_pusher_match,
-                            "commitByAdo": commit_by_ado,
-                        }
-                    )
-                if len(commits) < batch_size:
-                    break
-                skip += batch_size
+            if self.http_ops.deadline.should_skip("repository commits", COMMITS):
+                continue
+            commits, paginator = self._repository_commits(repo, since_iso)
+            all_commits.extend(commits)
+            if paginator.failed:
+
+                def _retry(repo=repo):
+                    commits, paginator = self._repository_commits(repo, since_iso)
+                    return FetchResult(error=paginator.error) if paginator.failed else FetchResult(commits)
+
+                def _apply(commits, repo_id=repo["id"]):
+                    all_commits[:] = [commit for commit in all_commits if commit["repositoryId"] != repo_id] + commits
+
+                entity = {"type": "repository_commits", "id": repo["id"], "name": repo.get("name"), "project_id": repo["project"]["id"]}
+                self.http_ops.retry_ledger.handle(entity, paginator.error, _retry, _apply)
         return all_commits
 
+    def _repository_commits(self, repo, since_iso):
+        """Commits of one repository since `since_iso`, and the paginator that read them."""
+        project_id = repo["project"]["id"]
+        repo_id = repo["id"]
+        k_project = repo.get("k_project")
+        url = (
+            f"https://dev.azure.com/{self.manager.organization}/{project_id}/_apis/git/repositories/{repo_id}/commits"
+            f"?searchCriteria.fromDate={since_iso}"
+            f"&searchCriteria.includePushData=true"
+            f"&api-version=7.1"
+        )
+        repo_commits = []
+        paginator = self.http_ops.paginate(url, style=SKIP)
+        for commits in paginator.pages():
+            for commit in commits:
+                author = commit.get("author", {})
+                committer = commit.get("committer", {})
+                push = commit.get("push", {})
+                change_counts = commit.get("changeCounts", {})
+                author_email = author.get("email")
+                author_name = author.get("name")
+                committer_email = committer.get("email")
+                committer_name = committer.get("name")
+                committer_date = committer.get("date")
+                push_email = push.get("pushedBy", {}).get("uniqueName")
+                push_name = push.get("pushedBy", {}).get("displayName")
+                push_id = push.get("pushId")
+                push_date = push.get("date")
+                add_count = change_counts.get("Add", 0)
+                edit_count = change_counts.get("Edit", 0)
+                delete_count = change_counts.get("Delete", 0)
+                committer_author_match = 1 if committer_name == author_name else 0
+                committer_pusher_match = 1 if committer_name == push_name else 0
+                commit_by_ado = 1 if push_email == "00000002-0000-8888-8000-000000000000@2c895908-04e0-4952-89fd-54b0046d6288" else 0
+                repo_commits.append(
+                    {
+                        "repositoryId": repo_id,
+                        "repositoryName": repo.get("name"),
+                        "projectId": project_id,
+                        "k_project": k_project,
+                        "commitId": commit.get("commitId"),
+                        "authorEmail": author_email,
+                        "authorName": author_name,
+                        "committerEmail": committer_email,
+                        "committerName": committer_name,
+                        "committerDate": committer_date,
+                        "changeCounts": {"add": add_count, "edit": edit_count, "delete": delete_count},
+                        "pushEmail": push_email,
+                        "pushId": push_id,
+                        "pushDate": push_date,
+                        "committerAuthorMatch": committer_author_match,
+                        "committerPusherMatch": committer_pusher_match,
+                        "commitByAdo": commit_by_ado,
+                    }
+                )
+        return repo_commits, paginator
+
     def get_repository_pull_requests_count(self, project_id, repo_id):
         counts = {"active": 0, "abandoned": 0, "completed": 0, "other": 0, "all": 0}
-        batch_size = 100
-        skip = 0
+        url = f"https://dev.azure.com/{self.manager.organization}/{project_id}/_apis/git/repositories/{repo_id}/pullrequests?searchCriteria.status=all&api-version=7.1"
         try:
-            while True:
-                url = f"https://dev.azure.com/{self.manager.organization}/{project_id}/_apis/git/repositories/{repo_id}/pullrequests?searchCriteria.status=all&$top={batch_size}&$skip={skip}&api-version=7.1"
-                pr_list = self.http_ops.fetch_data(url)
-                if not pr_list:
-                    break
+            for pr_list in self.http_ops.paginate(url, style=SKIP).pages():
                 for pr in pr_list:
                     status = (pr.get("status") or "").lower()
                     if status == "active":
@@ -225,9 +239,6 @@ class RepositoriesService:
                     elif status:
                         counts["other"] += 1
                     counts["all"] += 1
-                if len(pr_list) < batch_size:
-                    break
-                skip += batch_size
             return counts
         except Exception as e:
             self.logger.warning(f"Error fetching pull requests for repository {repo_id}: {e}")
@@ -253,46 +264,24 @@ class RepositoriesService:
     def _get_repository_branches_uncached(
         self, source_project_id, repo_id, project_name, repo_name, top_branches_to_scan, default_branch_name
     ):
-        all_branches = None
-        continuation_token = None
-
         if top_branches_to_scan is None:
             top_branches_to_scan = 0
 
-        total_branches_to_fetch = top_branches_to_scan
-
-        if top_branches_to_scan <= -1:
-            total_branches_to_fetch = 1000
-            top = 100
-        elif top_branches_to_scan == 0:
-            top = 1
+        refs_url = f"https://dev.azure.com/{self.manager.organization}/{source_project_id}/_apis/git/repositories/{repo_id}/refs"
+        if top_branches_to_scan in (0, 1):
+            all_branches = self.http_ops.fetch_data(f"{refs_url}?filter=heads%2F{default_branch_name}&api-version=7.1")
+            failed = all_branches is None
+            all_branches = all_branches or []
         else:
-            top = top_branches_to_scan if top_branches_to_scan < 100 else 100
-
-        while True:
-            if all_branches is None:
-                all_branches = []
-            elif total_branches_to_fetch >= len(all_branches):
-                break
-            elif total_branches_to_fetch - len(all_branches) < top:
-                top = total_branches_to_fetch - len(all_branches)
-
-            if top == 1 and continuation_token is None:
-                branches_url = f"https://dev.azure.com/{self.manager.organization}/{source_project_id}/_apis/git/repositories/{repo_id}/refs?filter=heads%2F{default_branch_name}&api-version=7.1"
-            elif continuation_token:
-                branches_url = f"https://dev.azure.com/{self.manager.organization}/{source_project_id}/_apis/git/repositories/{repo_id}/refs?$top={top}&api-version=7.1&continuationToken={continuation_token}"
-            else:
-                branches_url = f"https://dev.azure.com/{self.manager.organization}/{source_project_id}/_apis/git/repositories/{repo_id}/refs?$top={top}&api-version=7.1"
-
-            branches, headers = self.http_ops.fetch_data_with_headers(branches_url)
-            if branches is None:
-                self.logger.warning(f"Failed to fetch branches for {project_name}/{repo_name}")
-                return [], []
-
-            all_branches.extend(branches)
-            continuation_token = headers.get("x-ms-continuationtoken") or headers.get("X-Ms-Continuationtoken")
-            if not continuation_token:
-                break
+            max_items = 1000 if top_branches_to_scan <= -1 else top_branches_to_scan
+            paginator = self.http_ops.paginate(
+                f"{refs_url}?api-version=7.1", page_size=min(max_items, 100), max_items=max_items
+            )
+            all_branches = paginator.all()
+            failed = paginator.failed and not all_branches
+        if failed:
+            self.logger.warning(f"Failed to fetch branches for {project_name}/{repo_name}")
+            return [], []
 
         default_branch_found = any(branch["name"].endswith("/" + default_branch_name) for branch in all_branches)
         if not default_branch_found:
@@ -323,14 +312,19 @@ class RepositoriesService:
             if cache_key in self.runtime_state.branch_cache:
                 return self.runtime_state.branch_cache[cache_key]
 
-        branches = self._get_repository_branches_uncached(
-            source_project_id,
-            repo_id,
-            project_name,
-            repo_name,
-            top_branches_to_scan,
-            default_branch_name,
-        )
-        with self.runtime_state.branch_cache_lock:
-            self.runtime_state.branch_cache[cache_key] = branches
-        return branches
+        def _load():
+            branches = self._get_repository_branches_uncached(
+                source_project_id,
+                repo_id,
+                project_name,
+                repo_name,
+                top_branches_to_scan,
+                default_branch_name,
+            )
+            with self.runtime_state.branch_cache_lock:
+                self.runtime_state.branch_cache[cache_key] = branches
+            return branches
+
+        # Definitions sharing a repository ask for its branches concurrently;
+        # only the first caller pages through refs, the others wait for it.
+        return self.runtime_state.branch_flight.do(cache_key, _load)
@@ -0,0 +1,143 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Per endpoint family request metrics: latency, payload size, status codes, retries.
+
+Payload size is counted twice: decoded body bytes and bytes on the wire
+(before gzip/deflate/brotli decoding), so the saving from compression is
+visible per family.
+
+Latencies are kept as compact `array('d')` samples so percentiles are exact;
+a long scan with a few hundred thousand requests costs a few MB. The slowest
+URLs are tracked in a bounded heap.
+"""
+
+import bisect
+import heapq
+import itertools
+from array import array
+from collections import defaultdict
+from threading import Lock
+
+# Bucket bounds (seconds) for the OpenMetrics histogram.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ERROR_STATUS = "error"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class FamilyMetrics:
+    def __init__(self):
+        self.latencies = array("d")
+        self.bytes_total = 0
+        self.wire_bytes_total = 0
+        self.retries = 0
+        self.status = defaultdict(int)
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+        total = sum(ordered)
+        return {
+            "requests": len(ordered),
+            "bytes": self.bytes_total,
+            "wire_bytes": self.wire_bytes_total,
+            "compression_ratio": round(self.bytes_total / self.wire_bytes_total, 2) if self.wire_bytes_total else None,
+            "retries": self.retries,
+            "status": {str(status): count for status, count in sorted(self.status.items(), key=lambda item: str(item[0]))},
+            "latency_seconds": {
+                "p50": percentile(ordered, 0.50),
+                "p95": percentile(ordered, 0.95),
+                "p99": percentile(ordered, 0.99),
+                "max": ordered[-1] if ordered else 0.0,
+                "mean": total / len(ordered) if ordered else 0.0,
+                "sum": total,
+            },
+        }
+
+    def buckets(self):
+        ordered = sorted(self.latencies)
+        return [(bound, bisect.bisect_right(ordered, bound)) for bound in LATENCY_BUCKETS]
+
+
+class RequestMetrics:
+    def __init__(self, slowest_n=25):
+        self.slowest_n = slowest_n
+        self._families = defaultdict(FamilyMetrics)
+        self._slowest = []
+        self._sequence = itertools.count()
+        self._lock = Lock()
+
+    def observe(self, family, url, method, seconds, status, nbytes=0, retries=0, wire_bytes=None):
+        """Record one request; `wire_bytes` defaults to `nbytes` (uncompressed response)."""
+        with self._lock:
+            metrics = self._families[family]
+            metrics.latencies.append(seconds)
+            metrics.bytes_total += nbytes
+            metrics.wire_bytes_total += nbytes if wire_bytes is None else wire_bytes
+            metrics.retries += retries
+            metrics.status[status] += 1
+            entry = (seconds, next(self._sequence), family, method, url, status)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def snapshot(self):
+        with self._lock:
+            families = {family: metrics.summary() for family, metrics in sorted(self._families.items())}
+            slowest = sorted(self._slowest, reverse=True)
+        return {
+            "families": families,
+            "slowest": [
+                {"seconds": seconds, "family": family, "method": method, "url": url, "status": status}
+                for seconds, _, family, method, url, status in slowest
+            ],
+        }
+
+    def to_openmetrics(self, prefix="ado_http"):
+        """Render the metrics in the OpenMetrics text exposition format."""
+        with self._lock:
+            families = {
+                family: (metrics.buckets(), len(metrics.latencies), sum(metrics.latencies), metrics.bytes_total, metrics.retries, dict(metrics.status))
+                for family, metrics in sorted(self._families.items())
+            }
+            wire = {family: metrics.wire_bytes_total for family, metrics in self._families.items()}
+        duration = f"{prefix}_request_duration_seconds"
+        lines = [f"# TYPE {duration} histogram", f"# UNIT {duration} seconds", f"# HELP {duration} Request latency including retries."]
+        for family, (buckets, count, total, _, _, _) in families.items():
+            for bound, cumulative in buckets:
+                lines.append(f'{duration}_bucket{{family="{family}",le="{bound}"}} {cumulative}')
+            lines.append(f'{duration}_bucket{{family="{family}",le="+Inf"}} {count}')
+            lines.append(f'{duration}_count{{family="{family}"}} {count}')
+            lines.append(f'{duration}_sum{{family="{family}"}} {total}')
+        response_bytes = f"{prefix}_response_bytes"
+        lines += [f"# TYPE {response_bytes} counter", f"# UNIT {response_bytes} bytes", f"# HELP {response_bytes} Response body bytes after decompression."]
+        for family, (_, _, _, nbytes, _, _) in families.items():
+            lines.append(f'{response_bytes}_total{{family="{family}"}} {nbytes}')
+        wire_bytes = f"{prefix}_response_wire_bytes"
+        lines += [f"# TYPE {wire_bytes} counter", f"# UNIT {wire_bytes} bytes", f"# HELP {wire_bytes} Response body bytes received, before decompression."]
+        for family in families:
+            lines.append(f'{wire_bytes}_total{{family="{family}"}} {wire[family]}')
+        responses = f"{prefix}_responses"
+        lines += [f"# TYPE {responses} counter", f"# HELP {responses} Responses by status code."]
+        for family, (_, _, _, _, _, status_counts) in families.items():
+            for status, count in sorted(status_counts.items(), key=lambda item: str(item[0])):
+                lines.append(f'{responses}_total{{family="{family}",status="{status}"}} {count}')
+        retries = f"{prefix}_retries"
+        lines += [f"# TYPE {retries} counter", f"# HELP {retries} Transport retries and throttle re-sends."]
+        for family, (_, _, _, _, retry_count, _) in families.items():
+            lines.append(f'{retries}_total{{family="{family}"}} {retry_count}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,161 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Priority admission for outgoing requests.
+
+Every request attempt takes a slot from `RequestScheduler` before it is sent
+and gives it back when the response (or error) is in. Slots are limited
+overall (`max_in_flight`) and per priority class, and when requests are
+waiting the free slot goes to the highest class first:
+
+- `critical`: list calls whose results fan out into more work (projects,
+  definitions, repositories, service endpoints, pools, build settings);
+- `normal`: everything else;
+- `bulk`: expensive leaf calls nothing else waits for (build logs, YAML
+  previews, feed and upstream lookups).
+
+So the calls on the critical path of a scan are not stuck behind a backlog
+of log downloads started by another thread. With a time budget the classes
+follow the value of the data instead (`VALUE_FAMILY_CLASSES`): checks and
+pipeline permissions join the critical class, definition metrics go bulk.
+"""
+
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from threading import Condition
+
+CRITICAL = "critical"
+NORMAL = "normal"
+BULK = "bulk"
+PRIORITY_CLASSES = (CRITICAL, NORMAL, BULK)
+
+FAMILY_CLASSES = {
+    "projects": CRITICAL,
+    "build_definitions": CRITICAL,
+    "build_settings": CRITICAL,
+    "repos": CRITICAL,
+    "serviceendpoint": CRITICAL,
+    "distributedtask": CRITICAL,
+    "build_logs": BULK,
+    "previews": BULK,
+    "feeds": BULK,
+}
+VALUE_FAMILY_CLASSES = {
+    **FAMILY_CLASSES,
+    "checks": CRITICAL,
+    "pipelinepermissions": CRITICAL,
+    "build_metrics": BULK,
+}
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_CLASS_LIMITS = {CRITICAL: 32, NORMAL: 24, BULK: 8}
+
+
+def priority_class(family, family_classes=None):
+    return (family_classes or FAMILY_CLASSES).get(family, NORMAL)
+
+
+def parse_class_limits(values):
+    """Parse `--class-limit CLASS=N` values into a `{class: limit}` dict."""
+    limits = {}
+    for value in values or []:
+        name, _, limit = value.partition("=")
+        name = name.strip()
+        if name not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class '{name}', expected one of {', '.join(PRIORITY_CLASSES)}")
+        limits[name] = int(limit)
+    return limits
+
+
+class RequestScheduler:
+    """Admits requests by priority class; `max_in_flight=0` admits everything at once."""
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, class_limits=None, clock=time.monotonic, family_classes=None):
+        self.max_in_flight = max_in_flight
+        self.class_limits = {**DEFAULT_CLASS_LIMITS, **(class_limits or {})}
+        self.family_classes = family_classes or FAMILY_CLASSES
+        self.clock = clock
+        self._in_flight = defaultdict(int)
+        self._total = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = Condition()
+        self._stats = {name: {"admitted": 0, "queued": 0, "wait_seconds": 0.0, "max_waiting": 0} for name in PRIORITY_CLASSES}
+
+    @property
+    def enabled(self):
+        return self.max_in_flight > 0
+
+    def _has_room(self, name):
+        return self._total < self.max_in_flight and self._in_flight[name] < self.class_limits.get(name, self.max_in_flight)
+
+    def _admissible(self, ticket):
+        # Admit `ticket` only when no one ahead of it in priority order could take the slot instead.
+        if not self._has_room(ticket[2]):
+            return False
+        return not any(other < ticket and self._has_room(other[2]) for other in self._waiting)
+
+    def _admit(self, name):
+        self._in_flight[name] += 1
+        self._total += 1
+        self._stats[name]["admitted"] += 1
+
+    def acquire(self, family):
+        """Block until a request of `family` may be sent; returns the class to `release`."""
+        name = priority_class(family, self.family_classes)
+        if not self.enabled:
+            return name
+        with self._condition:
+            ticket = (PRIORITY_CLASSES.index(name), next(self._sequence), name)
+            if self._admissible(ticket):
+                self._admit(name)
+                return name
+            heapq.heappush(self._waiting, ticket)
+            stats = self._stats[name]
+            stats["queued"] += 1
+            stats["max_waiting"] = max(stats["max_waiting"], sum(1 for other in self._waiting if other[2] == name))
+            started = self.clock()
+            while not self._admissible(ticket):
+                self._condition.wait()
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            stats["wait_seconds"] += self.clock() - started
+            self._admit(name)
+            # Admitting this one may leave room a lower class was waiting for.
+            self._condition.notify_all()
+            return name
+
+    def try_acquire(self, family):
+        """Take a slot for `family` without waiting; returns its class, or None when none is free."""
+        name = priority_class(family, self.family_classes)
+        if not self.enabled:
+            return name
+        with self._condition:
+            ticket = (PRIORITY_CLASSES.index(name), float("inf"), name)
+            if not self._admissible(ticket):
+                return None
+            self._admit(name)
+            return name
+
+    def release(self, name):
+        if not self.enabled:
+            return
+        with self._condition:
+            self._in_flight[name] -= 1
+            self._total -= 1
+            self._condition.notify_all()
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "class_limits": dict(self.class_limits),
+                "classes": {name: {**stats, "wait_seconds": round(stats["wait_seconds"], 3)} for name, stats in self._stats.items()},
+            }
@@ -10,7 +10,11 @@
 import urllib.parse
 from datetime import datetime, timedelta, timezone
 
-from scanner.services.runtime import extract_owner_project_id, normalize_to_list, ordered_dedupe
+from scanner.services.deadline import COMMITS
+from scanner.services.runtime import extract_owner_project_id, ordered_dedupe
+
+# Stands for every definition of a project in a shard worker's pipeline permissions.
+ALL_PIPELINES = "*"
 
 
 class ResourcesService:
@@ -113,10 +117,7 @@ class ResourcesService:
             for protected_resource in inventory_value["protected_resources"]:
                 resource = protected_resource["resource"]
 
-                if "checks" in resource and isinstance(resource["checks"], list) and len(resource["checks"]) > 0:
-                    resource["protectedState"] = "protected"
-                else:
-                    resource["protectedState"] = "unprotected"
+                resource["protectedState"] = _protected_state(resource)
 
                 if inventory_key == "endpoint" and "serviceEndpointProjectReferences" in resource:
                     resource["isCrossProject"] = len(resource["serviceEndpointProjectReferences"]) > 1
@@ -248,6 +249,7 @@ class ResourcesService:
 
     def get_checks_approvals(self, inventory):
         self.logger.debug("Checking checks & approvals")
+        pending = []
         for inventory_key, inventory_value in inventory.items():
             for protected_resource in inventory_value["protected_resources"]:
                 actual_resource = protected_resource["resource"]
@@ -266,20 +268,38 @@ class ResourcesService:
                         f"https://dev.azure.com/{self.manager.organization}/{str(project_id)}/_apis/pipelines/checks/configurations?"
                         f"resourceType={inventory_key}&$expand=settings&resourceId={str(project_id)}.{str(actual_resource['id'])}&api-version=7.1-preview.1"
                     )
-
-                new_checks = self.http_ops.fetch_data(url)
-                if new_checks is None:
-                    new_checks = []
-                    continue
-
-                self.logger.debug(f"{len(new_checks)} checks for {inventory_key} {actual_resource['name']} ({actual_resource['id']})")
-                protected_resource["resource"]["checks"] = new_checks
+                pending.append((inventory_key, protected_resource, url))
+
+        results = self.http_ops.fetch_many_results([url for _, _, url in pending])
+        for (inventory_key, protected_resource, url), result in zip(pending, results):
+            actual_resource = protected_resource["resource"]
+            if not result.ok:
+                self.http_ops.retry_ledger.handle(
+                    {"type": "checks", "resource_type": inventory_key, "id": actual_resource.get("id"), "name": actual_resource.get("name")},
+                    result.error,
+                    lambda url=url: self.http_ops.fetch_result(url),
+                    lambda checks, resource=actual_resource: _set_checks(resource, checks),
+                )
+                continue
+            new_checks = result.data
+            self.logger.debug(f"{len(new_checks)} checks for {inventory_key} {actual_resource['name']} ({actual_resource['id']})")
+            protected_resource["resource"]["checks"] = new_checks
         return inventory
 
     def get_permissions(self, inventory, all_definitions, builds):
         self.logger.debug("Checking permissioned pipelines")
         idx = self.manager._build_runtime_indexes(all_definitions, builds)
-        wellformed_projects = idx.wellformed_project_ids
+        # A shard worker checks grants from every project of the organization,
+        # not only the ones it scans; see `_all_pipelines`.
+        wellformed_projects = self.manager.org_project_ids or idx.wellformed_project_ids
+        scanned_projects = set(idx.wellformed_project_ids)
+
+        def _all_pipelines(project_id):
+            # "All pipelines" of a project this shard does not scan are left
+            # as a marker; the shard merge expands it from the merged definitions.
+            if self.manager.org_project_ids and project_id not in scanned_projects:
+                return [f"{project_id}_{ALL_PIPELINES}"]
+            return idx.definition_keys_by_project_id.get(project_id, [])
 
         for inventory_key, inventory_value in inventory.items():
             for protected_resource in inventory_value["protected_resources"]:
@@ -296,7 +316,7 @@ class ResourcesService:
                         data = data if isinstance(data, dict) else {}
                         current_project_reference.setdefault("projectReference", {}).setdefault("pipelinepermissions", [])
                         if "allPipelines" in data.keys():
-                            perms = idx.definition_keys_by_project_id.get(project_id, [])
+                            perms = _all_pipelines(project_id)
                         elif "pipelines" in data.keys():
                             perms = [f"{project_id}_{definition['id']}" for definition in data.get("pipelines", [])]
                         else:
@@ -318,12 +338,14 @@ class ResourcesService:
                     # Query repository permissions from every well-formed project.
                     # Cross-project grants can exist even when local indexes do not
                     # yet show definitions/builds referencing this repository.
-                    for project in wellformed_projects:
-                        url = f"https://dev.azure.com/{self.manager.organization}/{project}/_apis/pipelines/pipelinepermissions/{inventory_key}/{actual_resource['project']['id']}.{actual_resource['id']}?api-version=7.1-preview.1"
-                        data = self.http_ops.fetch_data(url)
+                    urls = [
+                        f"https://dev.azure.com/{self.manager.organization}/{project}/_apis/pipelines/pipelinepermissions/{inventory_key}/{actual_resource['project']['id']}.{actual_resource['id']}?api-version=7.1-preview.1"
+                        for project in wellformed_projects
+                    ]
+                    for project, data in zip(wellformed_projects, self.http_ops.fetch_many(urls)):
                         data = data if isinstance(data, dict) else {}
                         if "allPipelines" in data.keys():
-                            actual_resource["pipelinepermissions"].extend(idx.definition_keys_by_project_id.get(project, []))
+                            actual_resource["pipelinepermissions"].extend(_all_pipelines(project))
                         else:
                             actual_resource["pipelinepermissions"].extend(
                                 [f"{project}_{definition['id']}" for definition in data.get("pipelines", [])]
@@ -352,13 +374,15 @@ class ResourcesService:
                 owner_project = extract_owner_project_id(actual_resource)
                 query_projects = [owner_project] if owner_project else list(wellformed_projects)
                 query_projects = [project for project in query_projects if project]
-                for project in query_projects:
+                urls = [
+                    f"https://dev.azure.com/{self.manager.organization}/{project}/_apis/pipelines/pipelinepermissions/{inventory_key}/{actual_resource['id']}?api-version=7.1-preview.1"
+                    for project in query_projects
+                ]
+                for project, data in zip(query_projects, self.http_ops.fetch_many(urls)):
                     try:
-                        url = f"https://dev.azure.com/{self.manager.organization}/{project}/_apis/pipelines/pipelinepermissions/{inventory_key}/{actual_resource['id']}?api-version=7.1-preview.1"
-                        data = self.http_ops.fetch_data(url)
                         data = data if isinstance(data, dict) else {}
                         if "allPipelines" in data.keys():
-                            actual_resource["pipelinepermissions"].extend(idx.definition_keys_by_project_id.get(project, []))
+                            actual_resource["pipelinepermissions"].extend(_all_pipelines(project))
                         else:
                             actual_resource["pipelinepermissions"].extend(
                                 [f"{project}_{definition['id']}" for definition in data.get("pipelines", [])]
@@ -388,7 +412,7 @@ class ResourcesService:
                     url = f"{url}?{inventory_value['query_params']}"
                 try:
                     self.logger.debug(f"Discovering {inventory_key} @ organisation level")
-                    new_resources = normalize_to_list(self.http_ops.fetch_data(url))
+                    new_resources = self.http_ops.fetch_all(url, page_size=0)
                     self.logger.debug(f"{len(new_resources)} {inventory_key} found")
                     for new_resource in new_resources:
                         resource_id = new_resource.get("id")
@@ -427,7 +451,7 @@ class ResourcesService:
                     url = f"{url}?{inventory_value['query_params']}"
                 try:
                     self.logger.debug(f"Discovering {inventory_key} @ {self.manager.projects[project]['name']}")
-                    new_resources = normalize_to_list(self.http_ops.fetch_data(url))
+                    new_resources = self.http_ops.fetch_all(url, page_size=0)
                     self.logger.debug(f"{len(new_resources)} {inventory_key} found")
 
                     for new_resource in new_resources:
@@ -482,7 +506,11 @@ class ResourcesService:
             )
             repo["branches"] = branches
 
-            first_commit_date, last_commit_date = self.manager.get_repository_commit_dates(repo["project"]["id"], repo["id"])
+            # Commit dates and pull request counts are the least valuable part of a time-budgeted scan.
+            sampled = self.http_ops.deadline.should_skip("repository commit dates and pull requests", COMMITS)
+            first_commit_date, last_commit_date = (
+                (None, None) if sampled else self.manager.get_repository_commit_dates(repo["project"]["id"], repo["id"])
+            )
             repo["stats"] = {}
             repo["stats"]["firstCommitDate"] = (
                 first_commit_date.isoformat() if isinstance(first_commit_date, datetime) and first_commit_date else first_commit_date
@@ -492,7 +520,9 @@ class ResourcesService:
             )
             repo["stats"]["age"] = (datetime.now(timezone.utc) - last_commit_date).days if last_commit_date else None
             repo["stats"]["branches"] = len(branches_names)
-            repo["stats"]["pullRequests"] = self.manager.get_repository_pull_requests_count(repo["project"]["id"], repo["id"])
+            repo["stats"]["pullRequests"] = (
+                None if sampled else self.manager.get_repository_pull_requests_count(repo["project"]["id"], repo["id"])
+            )
             if last_commit_date:
                 now = datetime.now(timezone.utc)
                 if last_commit_date > now - timedelta(days=90):
@@ -552,3 +582,14 @@ class ResourcesService:
                 if res_permission_id not in def_obj["resourcepermissions"][res_permission_type]:
                     def_obj["resourcepermissions"][res_permission_type].append(res_permission_id)
         return definitions
+
+
+def _protected_state(resource):
+    checks = resource.get("checks")
+    return "protected" if isinstance(checks, list) and len(checks) > 0 else "unprotected"
+
+
+def _set_checks(resource, checks):
+    # Checks recovered by the retry pass arrive after protection was derived.
+    resource["checks"] = checks
+    resource["protectedState"] = _protected_state(resource)
@@ -0,0 +1,181 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""On-disk conditional-request cache for ADO GET responses.
+
+Bodies are stored with their `ETag`/`Last-Modified` validators. The next scan
+sends `If-None-Match`/`If-Modified-Since` and a 304 is answered from disk, so
+unchanged definitions, tasks, pools, checks and permissions cost neither
+bandwidth nor much rate-limit budget. Entries expire after `ttl_seconds` and
+the least recently used ones are evicted once the cache exceeds `max_bytes`.
+
+Each entry is one file: a JSON metadata line followed by the raw body.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from scanner.http_client import BufferedResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: str
+    last_modified: str
+    stored_at: float
+    headers: dict
+    body: bytes
+
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self):
+        return BufferedResponse(200, self.headers, self.body, self.url, wire_bytes=0)
+
+
+class ResponseCache:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttl_seconds=7 * 24 * 3600, key_salt=""):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.key_salt = key_salt
+        self._lock = threading.Lock()
+        self._index = {}
+        self._total_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".entry"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                self._index[name[: -len(".entry")]] = [stat.st_size, stat.st_mtime]
+                self._total_bytes += stat.st_size
+
+    def _key(self, url):
+        return hashlib.sha256(f"{self.key_salt}\n{url}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.entry")
+
+    def _drop(self, key):
+        size, _ = self._index.pop(key, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, url):
+        """Return the stored entry for `url`, or None when missing or expired."""
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError) as err:
+            logger.debug(f"Dropping unreadable cache entry for {url}: {err}")
+            with self._lock:
+                self._drop(key)
+            return None
+        if meta.get("url") != url or time.time() - meta.get("stored_at", 0) > self.ttl_seconds:
+            with self._lock:
+                self._drop(key)
+            return None
+        return CacheEntry(
+            url=url,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            stored_at=meta.get("stored_at", 0),
+            headers=meta.get("headers", {}),
+            body=body,
+        )
+
+    def touch(self, url):
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._index[key][1] = now
+        try:
+            os.utime(self._path(key), (now, now))
+        except OSError:
+            pass
+
+    def put(self, url, response):
+        """Store a 200 response that carries validators; returns True when stored."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            return False
+        body = response.content
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+        }
+        key = self._key(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode())
+                f.write(b"\n")
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logger.debug(f"Could not write cache entry for {url}: {err}")
+            return False
+        size = os.path.getsize(path)
+        with self._lock:
+            previous = self._index.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = [size, time.time()]
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return True
+
+    def _evict(self):
+        # Called with the lock held; trims to 90% so eviction is not per-put.
+        target = self.max_bytes * 0.9
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= target:
+                break
+            self._drop(key)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
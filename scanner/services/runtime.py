@@ -12,6 +12,9 @@ from dataclasses import dataclass, field
 from threading import Lock
 from typing import Any
 
+from scanner.services.request_metrics import RequestMetrics
+from scanner.services.single_flight import SingleFlight
+
 
 @dataclass
 class RuntimeIndexes:
@@ -30,6 +33,16 @@ class PerfCounters:
     post_total: int = 0
     by_family_get: dict[str, int] = field(default_factory=lambda: defaultdict(int))
     by_family_post: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    throttled_total: int = 0
+    throttle_wait_seconds: float = 0.0
+    server_delay_seconds: float = 0.0
+    by_host_throttled: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    min_remaining_by_host: dict[str, float] = field(default_factory=dict)
+    pool_events_by_host: dict[str, dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    cache_by_family: dict[str, dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    coalesced_total: int = 0
+    coalesced_by_family: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    breaker_events_by_family: dict[str, dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
 
 
 @dataclass
@@ -41,27 +54,45 @@ class ScanRuntimeState:
     branch_cache: dict[tuple, tuple] = field(default_factory=dict)
     perf_lock: Lock = field(default_factory=Lock)
     branch_cache_lock: Lock = field(default_factory=Lock)
+    branch_flight: SingleFlight = field(default_factory=SingleFlight)
+    request_metrics: RequestMetrics = field(default_factory=RequestMetrics)
 
 
 def endpoint_family(url: str) -> str:
     if not isinstance(url, str):
         return "other"
+    if "vssps.dev.azure.com" in url or "/_apis/graph/" in url:
+        return "graph"
+    if "feeds.dev.azure.com" in url or "pkgs.dev.azure.com" in url or "/_apis/packaging/" in url:
+        return "feeds"
     if "/_apis/projects" in url:
         return "projects"
+    if "/_apis/projectanalysis/" in url:
+        return "projectanalysis"
+    if "/_apis/build/builds" in url:
+        return "build_logs" if "/logs" in url else "builds"
+    if "/_apis/build/" in url and "/metrics" in url:
+        return "build_metrics"
     if "/_apis/build/definitions" in url:
         return "build_definitions"
-    if "/_apis/build/builds" in url:
-        return "builds"
+    if "/_apis/build/" in url:
+        return "build_settings"
     if "/_apis/pipelines/pipelinepermissions/" in url:
         return "pipelinepermissions"
     if "/_apis/pipelines/checks/" in url:
         return "checks"
+    if "/_apis/pipelines/" in url and "/preview" in url:
+        return "previews"
+    if "/_apis/pipelines" in url:
+        return "pipelines"
+    if "/_apis/serviceendpoint/" in url:
+        return "serviceendpoint"
+    if "/_apis/securityroles/" in url:
+        return "securityroles"
+    if "/_apis/distributedtask/" in url:
+        return "distributedtask"
     if "/_apis/git/" in url:
         return "repos"
-    if "feeds.dev.azure.com" in url or "pkgs.dev.azure.com" in url:
-        return "artifacts"
-    if "vssps.dev.azure.com" in url:
-        return "graph"
     return "other"
 
 
@@ -75,6 +106,53 @@ def ordered_dedupe(items):
     return result
 
 
+def build_runtime_indexes(projects, definitions=None, builds=None):
+    """Lookups over the projects, definitions and builds of a scan."""
+    idx = RuntimeIndexes()
+    for project_id, project_data in projects.items():
+        if not isinstance(project_data, dict):
+            continue
+        if project_data.get("state", "").lower() == "wellformed":
+            idx.wellformed_project_ids.append(project_id)
+        project_name = project_data.get("name")
+        if project_name:
+            idx.project_id_by_project_name[project_name] = project_id
+
+    definitions = definitions or []
+    builds = builds or []
+    for definition in definitions:
+        if not isinstance(definition, dict):
+            continue
+        k_key = definition.get("k_key")
+        if not k_key or "_" not in k_key:
+            continue
+        project_id = definition.get("k_project", {}).get("id") or k_key.split("_", 1)[0]
+        idx.definitions_by_project_id.setdefault(project_id, []).append(definition)
+        idx.definition_keys_by_project_id.setdefault(project_id, []).append(k_key)
+        repo_id = definition.get("repository", {}).get("id")
+        if repo_id:
+            idx.definitions_by_repo_id.setdefault(repo_id, []).append(definition)
+
+    for build in builds:
+        if not isinstance(build, dict):
+            continue
+        k_key = build.get("k_key")
+        if k_key and "_" in k_key:
+            project_id = build.get("k_project", {}).get("id") or k_key.split("_", 1)[0]
+            definition_id = build.get("definition", {}).get("id")
+            if definition_id is not None:
+                def_key = f"{project_id}_{definition_id}"
+                idx.builds_by_definition_key.setdefault(def_key, []).append(build)
+        repo_id = build.get("repository", {}).get("id")
+        if repo_id:
+            idx.builds_by_repo_id.setdefault(repo_id, []).append(build)
+
+    for project_id, keys in list(idx.definition_keys_by_project_id.items()):
+        idx.definition_keys_by_project_id[project_id] = ordered_dedupe(keys)
+
+    return idx
+
+
 def normalize_to_list(data):
     if data is None:
         return []
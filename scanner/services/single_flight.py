@@ -0,0 +1,55 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Single-flight coalescing: concurrent calls for the same key share one execution."""
+
+from concurrent.futures import Future
+from threading import Lock
+
+
+class SingleFlight:
+    def __init__(self, on_shared=None):
+        self.on_shared = on_shared
+        self._inflight = {}
+        self._lock = Lock()
+
+    def claim(self, key):
+        """Return `(future, is_leader)`; only the leader must call `release`."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                shared = True
+            else:
+                future = Future()
+                self._inflight[key] = future
+                shared = False
+        if shared and self.on_shared is not None:
+            self.on_shared(key)
+        return future, not shared
+
+    def release(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        future, is_leader = self.claim(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as err:
+            self.release(key, future, error=err)
+            raise
+        self.release(key, future, result=result)
+        return result
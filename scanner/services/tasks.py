@@ -20,7 +20,7 @@ class TasksService:
     def get_task_list(self):
         url = f"https://dev.azure.com/{self.manager.organization}/_apis/distributedtask/tasks?api-version=7.1"
         try:
-            tasks = self.http_ops.fetch_data(url)
+            tasks = self.http_ops.fetch_items(url)
             if tasks is None:
                 logger.warning("Failed to fetch task list")
                 return []
@@ -0,0 +1,144 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Pool of credentials that requests are spread across.
+
+Azure DevOps rate limits each identity separately, so several read-only PATs
+(or service principal access tokens) give several budgets. Each request picks
+a credential at random, weighted by the share of its rate-limit budget left
+(`X-RateLimit-Remaining` / `X-RateLimit-Limit`) and by how few requests it
+has in flight. A credential that gets a 429 is avoided until its
+`Retry-After` has passed, and one that gets a 401 is dropped, so one
+identity's trouble never slows the others down. The rate limiter keeps a
+separate bucket per identity as well (`AdaptiveRateLimiter(per_identity=True)`).
+"""
+
+import base64
+import hashlib
+import logging
+import random
+import time
+from threading import Lock
+
+from scanner.http_client import auth_headers
+from scanner.rate_limiter import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+BASIC = "Basic"
+BEARER = "Bearer"
+
+
+def basic_token(pat):
+    """Encode a PAT as the value of a Basic `Authorization` header."""
+    return base64.b64encode(f":{pat}".encode()).decode()
+
+
+class Credential:
+    def __init__(self, token, scheme=BASIC, label=None):
+        self.token = token
+        self.scheme = scheme
+        self.label = label or f"{scheme.lower()}-{hashlib.sha256(token.encode()).hexdigest()[:8]}"
+        self.headers = auth_headers(token, scheme)
+        self.budget = 1.0
+        self.blocked_until = 0.0
+        self.disabled = False
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.unauthorized = 0
+
+    def weight(self):
+        return max(self.budget, 0.01) / (1 + self.in_flight)
+
+
+class TokenPool:
+    def __init__(self, credentials, clock=time.monotonic):
+        if not credentials:
+            raise ValueError("At least one credential is required")
+        self.credentials = list(credentials)
+        self.clock = clock
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def acquire(self):
+        """Pick the credential for the next request; pair every call with `release`."""
+        with self._lock:
+            if len(self.credentials) == 1:
+                credential = self.credentials[0]
+            else:
+                now = self.clock()
+                usable = [c for c in self.credentials if not c.disabled] or self.credentials
+                ready = [c for c in usable if c.blocked_until <= now]
+                if ready:
+                    credential = random.choices(ready, weights=[c.weight() for c in ready])[0]
+                else:
+                    credential = min(usable, key=lambda c: c.blocked_until)
+            credential.in_flight += 1
+            credential.requests += 1
+        return credential
+
+    def has_ready(self):
+        """True when more than one credential is usable and one of them can send right now."""
+        with self._lock:
+            if len(self.credentials) == 1:
+                return False
+            now = self.clock()
+            return any(not c.disabled and c.blocked_until <= now for c in self.credentials)
+
+    def release(self, credential, response=None):
+        """Feed the outcome of a request back; returns True when another credential should retry it."""
+        retry_elsewhere = False
+        with self._lock:
+            credential.in_flight -= 1
+            if response is None:
+                return False
+            headers = response.headers
+            remaining = _header_float(headers, "X-RateLimit-Remaining")
+            limit = _header_float(headers, "X-RateLimit-Limit")
+            if remaining is not None and limit:
+                credential.budget = remaining / limit
+            elif response.status_code < 400:
+                # No rate-limit headers: the identity is not under pressure.
+                credential.budget = min(1.0, credential.budget + 0.05)
+            if response.status_code == 429:
+                credential.throttled += 1
+                pause = parse_retry_after(headers.get("Retry-After")) or 1.0
+                credential.blocked_until = max(credential.blocked_until, self.clock() + pause)
+            elif response.status_code == 401:
+                credential.unauthorized += 1
+                others = [c for c in self.credentials if c is not credential and not c.disabled]
+                if others and not credential.disabled:
+                    credential.disabled = True
+                    logger.warning(f"Credential {credential.label} was rejected (401); sending its requests with the other credentials")
+                retry_elsewhere = bool(others)
+        return retry_elsewhere
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                c.label: {
+                    "requests": c.requests,
+                    "throttled": c.throttled,
+                    "unauthorized": c.unauthorized,
+                    "budget": round(c.budget, 3),
+                    "disabled": c.disabled,
+                }
+                for c in self.credentials
+            }
+
+
+def _header_float(headers, name):
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
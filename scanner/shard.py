@@ -0,0 +1,578 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Split the scan of one large organization into shards and merge them.
+
+The coordinator lists the organization's projects, deals them round-robin
+into `--shards` shards and writes one spec per shard to the shard directory
+(`<results-dir>/shards/<job-id>/` by default). A worker scans the projects
+of one spec as an ordinary scan with its own checkpoint, and reports back
+through `shard-N.status.json` next to the spec:
+
+    python shard_scan.py -o contoso -j nightly --shards 8 --local-workers 4
+    python shard_scan.py worker <shard-dir>/shard-5.json   # on another machine
+
+Workers started by the coordinator get the PATs through the environment;
+remote workers read them from AZURE_DEVOPS_PAT, AZURE_DEVOPS_ADDITIONAL_PATS
+and AZURE_DEVOPS_BEARER_TOKENS (comma separated), and need the shard
+directory on shared storage. Running the coordinator again with the same job
+ID keeps the shards that finished, resumes interrupted ones from their
+checkpoints and only merges once every shard has finished.
+
+Some results are only correct for the organization as a whole, so the merge
+recomputes them instead of concatenating: a shard records "all pipelines"
+grants of projects it does not scan as `<project>_*` markers, which are
+expanded from the merged definitions; resources seen by several shards
+(shared endpoints, variable groups, agent pools) are combined, after which
+`isCrossProject`, the definitions' resource permissions, committer
+statistics, pool queues and the organisation and per-project counts are
+derived again. Artifact feeds are scanned by shard 0 only.
+"""
+
+import json
+import logging
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+from scanner.batch import request_totals
+from scanner.cli import build_parser as build_scan_parser
+from scanner.cli import config_from_args
+from scanner.checkpoint import MANIFEST, checkpoint_dir
+from scanner.config import ScannerConfig
+from scanner.html_report import write_html_report
+from scanner.orchestrator import build_http_options, resource_counts, run_scan, setup_logging
+from scanner.output import write_scan_result
+from scanner.services.identity_resolution import IdentityResolutionService
+from scanner.services.deadline import section_status
+from scanner.services.http_ops import HttpOps
+from scanner.services.repositories import RepositoriesService
+from scanner.services.resources import ALL_PIPELINES, ResourcesService
+from scanner.services.runtime import ScanRuntimeState, build_runtime_indexes, ordered_dedupe
+from scanner.services.stats import StatsService
+from scanner.services.token_pool import basic_token
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WAIT_MINUTES = 0
+POLL_SECONDS = 2.0
+SECRET_FIELDS = ("pat_token", "additional_pat_tokens", "bearer_tokens")
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shard_scan.py")
+
+
+def _safe(name):
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", name)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as handle:
+        json.dump(data, handle, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def list_projects(config, http_ops=None):
+    """The organization's projects selected by `config.projects`, as the scan itself selects them.
+
+    Without `http_ops` a client is made for the two list calls and closed again.
+    """
+    own_client = http_ops is None
+    if own_client:
+        http_ops = HttpOps(
+            token=basic_token(config.pat_token), runtime_state=ScanRuntimeState(), logger=logger, **build_http_options(config)
+        )
+    try:
+        url = f"https://dev.azure.com/{config.organization}/_apis/projects?api-version=7.1-preview.4"
+        projects = http_ops.fetch_all(url) + http_ops.fetch_all(f"{url}&stateFilter=deleted")
+    finally:
+        if own_client:
+            http_ops.close()
+    if config.projects:
+        wanted = {str(project).lower() for project in config.projects}
+        projects = [
+            project
+            for project in projects
+            if str(project.get("id", "")).lower() in wanted or str(project.get("name", "")).lower() in wanted
+        ]
+    return sorted((project for project in projects if project.get("id")), key=lambda project: str(project.get("name", "")).lower())
+
+
+def split_projects(project_ids, shards):
+    """Deal `project_ids` round-robin into at most `shards` non-empty shards."""
+    shards = max(1, min(shards, len(project_ids)))
+    return [project_ids[index::shards] for index in range(shards)]
+
+
+def _spec_path(shard_dir, index):
+    return os.path.join(shard_dir, f"shard-{index}.json")
+
+
+def _status_path(spec_path):
+    return spec_path[: -len(".json")] + ".status.json"
+
+
+def write_shard_specs(config, scanner_version, shard_dir, shards):
+    """Write one spec per shard; returns the spec paths.
+
+    A shard whose spec is unchanged keeps its status, so it is not scanned
+    again, and resumes from its checkpoint if it was interrupted.
+    """
+    projects = list_projects(config)
+    wellformed = [project["id"] for project in projects if project.get("state", "").lower() == "wellformed"]
+    if not wellformed:
+        raise ValueError(f"No wellformed projects to scan in {config.organization}")
+    others = [project["id"] for project in projects if project["id"] not in set(wellformed)]
+    settings = {key: value for key, value in asdict(config).items() if key not in SECRET_FIELDS}
+    os.makedirs(shard_dir, exist_ok=True)
+    paths = []
+    for index, project_ids in enumerate(split_projects(wellformed, shards)):
+        shard_config = {
+            **settings,
+            "job_id": f"{config.job_id}-shard-{index}",
+            # Deleted projects have nothing to scan but are still reported; shard 0 lists them.
+            "projects": project_ids + (others if index == 0 else []),
+            "org_project_ids": wellformed,
+            "results_dir": os.path.abspath(os.path.join(shard_dir, f"shard-{index}")),
+            "skip_feeds": config.skip_feeds or index > 0,
+            # Identities are resolved once, on the merged result.
+            "resolve_identities": False,
+            "resume": False,
+        }
+        spec = {
+            "index": index,
+            "organization": config.organization,
+            "job_id": config.job_id,
+            "scanner_version": scanner_version,
+            "project_order": [project["id"] for project in projects],
+            "config": shard_config,
+        }
+        path = _spec_path(shard_dir, index)
+        previous = _read_json(path)
+        if previous is not None and previous.get("config", {}) | {"resume": False} == json.loads(json.dumps(shard_config)):
+            status = _read_json(_status_path(path))
+            manifest = checkpoint_dir(shard_config["results_dir"], shard_config["job_id"]) / MANIFEST
+            shard_config["resume"] = manifest.exists() and (status or {}).get("status") != "ok"
+        elif os.path.exists(_status_path(path)):
+            os.remove(_status_path(path))
+        _write_json(path, spec)
+        paths.append(path)
+    for stale in range(len(paths), shards):
+        for path in (_spec_path(shard_dir, stale), _status_path(_spec_path(shard_dir, stale))):
+            if os.path.exists(path):
+                os.remove(path)
+    return paths
+
+
+def _env_list(name):
+    return [value.strip() for value in os.environ.get(name, "").split(",") if value.strip()]
+
+
+def run_worker(spec_path):
+    """Scan the projects of one shard spec and write its status file; returns the exit code."""
+    spec = _read_json(spec_path)
+    if spec is None:
+        print(f"Error: cannot read shard spec {spec_path}", file=sys.stderr)
+        return 2
+    settings = spec["config"]
+    pat_token = os.environ.get("AZURE_DEVOPS_PAT") or ("replay" if settings.get("replay_dir") else None)
+    if not pat_token:
+        print("Error: set AZURE_DEVOPS_PAT for the shard worker", file=sys.stderr)
+        return 2
+    config = ScannerConfig(
+        **settings,
+        pat_token=pat_token,
+        additional_pat_tokens=_env_list("AZURE_DEVOPS_ADDITIONAL_PATS"),
+        bearer_tokens=_env_list("AZURE_DEVOPS_BEARER_TOKENS"),
+    )
+    os.makedirs(config.results_dir, exist_ok=True)
+    status_path = _status_path(spec_path)
+    status = {"index": spec["index"], "job_id": config.job_id, "status": "running", "host": socket.gethostname()}
+    _write_json(status_path, status)
+    started = time.monotonic()
+    try:
+        _, output_path = run_scan(config, spec["scanner_version"])
+    except Exception as err:
+        logger.error(f"Shard {spec['index']} failed: {err}", exc_info=True)
+        status.update({"status": "failed", "error": f"{type(err).__name__}: {err}"})
+    else:
+        status.update({"status": "ok", "output": output_path, "requests": request_totals(output_path)})
+    status["seconds"] = round(time.monotonic() - started, 3)
+    _write_json(status_path, status)
+    return 0 if status["status"] == "ok" else 1
+
+
+def _worker_env(config):
+    env = dict(os.environ)
+    env["AZURE_DEVOPS_PAT"] = config.pat_token
+    env["AZURE_DEVOPS_ADDITIONAL_PATS"] = ",".join(config.additional_pat_tokens or [])
+    env["AZURE_DEVOPS_BEARER_TOKENS"] = ",".join(config.bearer_tokens or [])
+    return env
+
+
+def run_shards(config, spec_paths, local_workers, wait_minutes):
+    """Run the pending shards here, `local_workers` at a time, or wait for remote workers.
+
+    With `local_workers=0` every pending shard is left to remote workers;
+    returns the final status of every shard, `missing` for those that did
+    not report within `wait_minutes`.
+    """
+    statuses = {path: _read_json(_status_path(path)) for path in spec_paths}
+    queue = [path for path in spec_paths if (statuses[path] or {}).get("status") != "ok"]
+    if len(queue) < len(spec_paths):
+        logger.info(f"{len(spec_paths) - len(queue)} of {len(spec_paths)} shards already finished")
+
+    if local_workers == 0:
+        for path in queue:
+            logger.info(f"Waiting for a worker to run: python shard_scan.py worker {path}")
+        deadline = time.monotonic() + wait_minutes * 60
+        while True:
+            statuses = {path: _read_json(_status_path(path)) for path in spec_paths}
+            waiting = [path for path in queue if (statuses[path] or {}).get("status") not in ("ok", "failed")]
+            if not waiting or time.monotonic() >= deadline:
+                break
+            time.sleep(POLL_SECONDS)
+        for path in waiting:
+            statuses[path] = {**(statuses[path] or {}), "status": "missing"}
+        return statuses
+
+    slots = local_workers or len(queue)
+    env = _worker_env(config)
+    running = {}
+    while queue or running:
+        while queue and len(running) < slots:
+            path = queue.pop(0)
+            if os.path.exists(_status_path(path)):
+                os.remove(_status_path(path))
+            running[path] = subprocess.Popen([sys.executable, WORKER_SCRIPT, "worker", path], env=env)
+        time.sleep(POLL_SECONDS)
+        for path, process in list(running.items()):
+            if process.poll() is None:
+                continue
+            running.pop(path)
+            status = _read_json(_status_path(path))
+            if not status or status.get("status") not in ("ok", "failed"):
+                status = {"status": "failed", "error": f"Worker exited with code {process.returncode}"}
+                _write_json(_status_path(path), status)
+            statuses[path] = status
+            logger.info(f"Shard {os.path.basename(path)}: {status['status']}")
+    return statuses
+
+
+class MergedScan:
+    """The parts of `AzureDevOpsManager` the services need to recompute derived results offline."""
+
+    def __init__(self, organization, projects):
+        self.organization = organization
+        self.projects = projects
+
+    def _build_runtime_indexes(self, definitions=None, builds=None):
+        return build_runtime_indexes(self.projects, definitions, builds)
+
+
+def _union_by_id(items, key="id"):
+    merged = {}
+    for item in items:
+        merged.setdefault(item.get(key), item)
+    return list(merged.values())
+
+
+def _merge_resource(base, other):
+    base["pipelinepermissions"] = ordered_dedupe(base.get("pipelinepermissions", []) + other.get("pipelinepermissions", []))
+    references = {ref.get("projectReference", {}).get("id"): ref for ref in base.get("serviceEndpointProjectReferences", [])}
+    for ref in other.get("serviceEndpointProjectReferences", []):
+        target = references.get(ref.get("projectReference", {}).get("id"))
+        if target is None:
+            continue
+        project_reference = target.setdefault("projectReference", {})
+        project_reference["pipelinepermissions"] = ordered_dedupe(
+            project_reference.get("pipelinepermissions", []) + ref.get("projectReference", {}).get("pipelinepermissions", [])
+        )
+    if "k_projects_refs" in base:
+        base["k_projects_refs"] = _union_by_id(base["k_projects_refs"] + other.get("k_projects_refs", []))
+
+
+def merge_protected_resources(inventories, project_rank):
+    """One inventory from the shards', a resource seen by several shards combined into one.
+
+    The copy found in the project that comes first is kept, as a single scan
+    would have found it there first; permissions are the union of all copies.
+    """
+    merged = {}
+    copies = {}
+    for inventory in inventories:
+        for resource_type, data in inventory.items():
+            merged.setdefault(resource_type, {**data, "protected_resources": []})
+            for entry in data.get("protected_resources", []):
+                copies.setdefault((resource_type, entry["resource"].get("id")), []).append(entry)
+    for (resource_type, _), entries in copies.items():
+        entries.sort(key=lambda entry: project_rank.get((entry["resource"].get("k_project") or {}).get("id"), len(project_rank)))
+        base = entries[0]
+        for entry in entries[1:]:
+            _merge_resource(base["resource"], entry["resource"])
+        merged[resource_type]["protected_resources"].append(base)
+
+    # Each shard only attached its own projects' queues to the organization's pools.
+    queues_by_pool = {}
+    for entry in merged.get("queue", {}).get("protected_resources", []):
+        queues_by_pool.setdefault(entry["resource"].get("pool", {}).get("id"), []).append(entry["resource"])
+    for entry in merged.get("pools", {}).get("protected_resources", []):
+        entry["resource"]["queues"] = queues_by_pool.get(entry["resource"]["id"], [])
+    return merged
+
+
+def expand_pipeline_markers(inventory, idx):
+    """Replace the `<project>_*` markers shards left by the project's merged definition keys,
+    and add the definitions and builds of other shards that use a repository."""
+
+    def expand(permissions):
+        expanded = []
+        for permission in permissions:
+            project_id, _, definition = str(permission).rpartition("_")
+            expanded.extend(idx.definition_keys_by_project_id.get(project_id, []) if definition == ALL_PIPELINES else [permission])
+        return ordered_dedupe(expanded)
+
+    for resource_type, data in inventory.items():
+        for entry in data.get("protected_resources", []):
+            resource = entry["resource"]
+            if "pipelinepermissions" not in resource:
+                continue
+            permissions = list(resource["pipelinepermissions"])
+            if resource_type == "repository":
+                repo_id = resource.get("id")
+                for build in idx.builds_by_repo_id.get(repo_id, []):
+                    project_id = build.get("k_project", {}).get("id")
+                    definition_id = build.get("definition", {}).get("id")
+                    if project_id and definition_id is not None:
+                        permissions.append(f"{project_id}_{definition_id}")
+                permissions.extend(definition["k_key"] for definition in idx.definitions_by_repo_id.get(repo_id, []) if definition.get("k_key"))
+            resource["pipelinepermissions"] = expand(permissions)
+            for ref in resource.get("serviceEndpointProjectReferences", []):
+                project_reference = ref.get("projectReference", {})
+                if "pipelinepermissions" in project_reference:
+                    project_reference["pipelinepermissions"] = expand(project_reference["pipelinepermissions"])
+    return inventory
+
+
+def _merge_truncation(shards):
+    summaries = [shard["scan_truncation"] for shard in shards if "scan_truncation" in shard]
+    if not summaries:
+        return None
+    skipped = {}
+    for summary in summaries:
+        for step, count in summary.get("skipped_steps", {}).items():
+            skipped[step] = skipped.get(step, 0) + count
+    merged = {
+        "truncated": any(summary.get("truncated") for summary in summaries),
+        "deadline_seconds": summaries[0].get("deadline_seconds"),
+        "elapsed_seconds": max(summary.get("elapsed_seconds", 0) for summary in summaries),
+        "skipped_steps": skipped,
+        "requests_refused": sum(summary.get("requests_refused", 0) for summary in summaries),
+    }
+    sections = {}
+    for summary in summaries:
+        for name, section in summary.get("sections", {}).items():
+            counts = sections.setdefault(name, {"budget_share": section["budget_share"], "started": 0, "skipped": 0})
+            counts["started"] += section["started"]
+            counts["skipped"] += section["skipped"]
+    if sections:
+        merged["sections"] = {name: {"status": section_status(counts), **counts} for name, counts in sections.items()}
+    return merged
+
+
+def merge_shard_results(config, scanner_version, shards, project_order, start_date):
+    """The scan result of the whole organization from the shards' results, in shard order."""
+    project_rank = {project_id: rank for rank, project_id in enumerate(project_order)}
+    projects = {}
+    for shard in shards:
+        projects.update(shard["projects"])
+    projects = dict(sorted(projects.items(), key=lambda item: project_rank.get(item[0], len(project_rank))))
+    view = MergedScan(config.organization, projects)
+    resources_service = ResourcesService(view, None, logger)
+
+    definitions = [definition for shard in shards for definition in shard["build_definitions"]]
+    builds = [build for shard in shards for build in shard["builds"]]
+    commits = [commit for shard in shards for commit in shard["commits"]]
+    build_service_accounts = _union_by_id([account for shard in shards for account in shard["build_service_accounts"]])
+    tasks = _union_by_id([task for shard in shards for task in shard["tasks"]])
+    artifacts = shards[0]["artifacts"]
+    # Shard 0 scanned every feed but only knows the names of its own projects.
+    for feed in artifacts.get("active", []) + artifacts.get("recyclebin", []):
+        project = feed.get("project")
+        if project and not feed.get("k_project"):
+            feed["k_project"] = resources_service.enrich_k_project(
+                project.get("id"),
+                f"https://dev.azure.com/{config.organization}/{project.get('name')}/_artifacts/feed/{feed.get('name')}",
+            )
+
+    idx = view._build_runtime_indexes(definitions, builds)
+    inventory = merge_protected_resources([shard["protected_resources"] for shard in shards], project_rank)
+    inventory = expand_pipeline_markers(inventory, idx)
+    inventory = resources_service.enrich_resource_protection_and_cross_project(inventory)
+    definitions = resources_service.get_enriched_build_definitions(definitions, inventory)
+
+    if config.skip_committer_stats:
+        committer_stats = []
+    else:
+        committer_stats = RepositoriesService(view, None, None, logger).get_committer_stats(commits, build_service_accounts)
+
+    language_stats = {}
+    for shard in shards:
+        language_stats.update(shard["stats"])
+    stats = StatsService(view).get_enriched_stats(language_stats, inventory, definitions, builds, commits, artifacts)
+
+    retries = [shard.get("deferred_retries", {}) for shard in shards]
+    result = {
+        "scanner_version": scanner_version,
+        "id": config.organization,
+        "scan_start": start_date,
+        "scan_end": datetime.now().isoformat(),
+        "organisation": {
+            **shards[0]["organisation"],
+            "partial_scan": True if config.projects else False,
+            "projects_filter": config.projects if config.projects else [],
+            "projectRefs": [
+                {"id": project["id"], "name": project["name"]}
+                for project in projects.values()
+                if "id" in project and "name" in project
+            ],
+            "resource_counts": resource_counts(projects, inventory, definitions, builds, commits, committer_stats, artifacts),
+        },
+        "stats": stats,
+        "projects": projects,
+        "protected_resources": inventory,
+        "build_definitions": definitions,
+        "builds": builds,
+        "tasks": tasks,
+        "commits": commits,
+        "committer_stats": committer_stats,
+        "build_service_accounts": build_service_accounts,
+        "artifacts": artifacts,
+        "deferred_retries": {
+            "deferred": sum(retry.get("deferred", 0) for retry in retries),
+            "recovered": sum(retry.get("recovered", 0) for retry in retries),
+            "incomplete": [entity for retry in retries for entity in retry.get("incomplete", [])],
+        },
+        "scan_stages": {f"shard-{index}": shard.get("scan_stages", {}) for index, shard in enumerate(shards)},
+    }
+    truncation = _merge_truncation(shards)
+    if truncation is not None:
+        result["scan_truncation"] = truncation
+    return result
+
+
+def coordinate(config, scanner_version, shards, shard_dir=None, local_workers=None, wait_minutes=DEFAULT_WAIT_MINUTES):
+    """Shard the scan, run or wait for the shards and write the merged result.
+
+    Returns `(result, output_path)`, or `(None, None)` when a shard failed or
+    did not report; the statuses are logged and the coordinator can be run
+    again with the same job ID to retry the missing shards.
+    """
+    results_dir = config.results_dir or os.getcwd()
+    shard_dir = os.path.abspath(shard_dir or os.path.join(results_dir, "shards", _safe(config.job_id)))
+    start_date = datetime.now().isoformat()
+    spec_paths = write_shard_specs(config, scanner_version, shard_dir, shards)
+    logger.info(f"Scanning {config.organization} in {len(spec_paths)} shards; specs in {shard_dir}")
+    statuses = run_shards(config, spec_paths, local_workers, wait_minutes)
+    unfinished = {path: status for path, status in statuses.items() if status.get("status") != "ok"}
+    if unfinished:
+        for path, status in unfinished.items():
+            logger.error(f"Shard {os.path.basename(path)} {status['status']}: {status.get('error', 'no status reported')}")
+        logger.error(f"{len(unfinished)} of {len(spec_paths)} shards did not finish; run the coordinator again with the same job ID")
+        return None, None
+
+    logger.info("Merging shard results...")
+    specs = [_read_json(path) for path in spec_paths]
+    shard_results = []
+    for path in spec_paths:
+        with open(statuses[path]["output"]) as handle:
+            shard_results.append(json.load(handle))
+    result = merge_shard_results(config, scanner_version, shard_results, specs[0]["project_order"], start_date)
+    result["shards"] = [
+        {
+            "index": spec["index"],
+            "job_id": spec["config"]["job_id"],
+            "projects": len(spec["config"]["projects"]),
+            "seconds": statuses[path].get("seconds"),
+            "requests": statuses[path].get("requests"),
+            "output": statuses[path]["output"],
+        }
+        for spec, path in zip(specs, spec_paths)
+    ]
+
+    if config.resolve_identities:
+        identity_service = IdentityResolutionService(enabled=True)
+        if identity_service.is_available:
+            result = identity_service.resolve_identities(result, resolve=config.identity_resolution_resolve)
+        else:
+            logger.warning("Identity resolution not available (laughing-lamp not installed)")
+
+    output_path = write_scan_result(result, results_dir=results_dir, job_id=config.job_id)
+    html_report_path = write_html_report(result, results_dir=results_dir, job_id=config.job_id, config=config)
+    logger.info(f"Sharded scan complete. Report: {html_report_path}")
+    return result, output_path
+
+
+def build_parser():
+    parser = build_scan_parser()
+    parser.description = "Scan one Azure DevOps organization in shards, locally or on several machines, and merge the results."
+    parser.add_argument("--shards", type=int, required=True, help="Number of shards the projects are split into")
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=None,
+        help="Shards scanned at the same time by worker processes on this machine; 0 leaves them all to remote workers (default: all shards at once)",
+    )
+    parser.add_argument("--shard-dir", default=None, help="Directory for the shard specs, statuses and results (default: <results-dir>/shards/<job-id>)")
+    parser.add_argument(
+        "--wait-minutes",
+        type=float,
+        default=DEFAULT_WAIT_MINUTES,
+        help="With --local-workers 0, how long to wait for the remote workers to report (default: 0, merge if they all have)",
+    )
+    return parser
+
+
+def main(scanner_version, argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["worker"]:
+        if len(argv) != 2:
+            print("Usage: shard_scan.py worker SHARD_SPEC", file=sys.stderr)
+            return 2
+        return run_worker(argv[1])
+    args = build_parser().parse_args(argv)
+    config = config_from_args(args)
+    results_dir = config.results_dir or os.getcwd()
+    os.makedirs(results_dir, exist_ok=True)
+    setup_logging(job_id=f"shards_{config.job_id}", results_dir=results_dir)
+    try:
+        result, _ = coordinate(
+            config,
+            scanner_version,
+            shards=args.shards,
+            shard_dir=args.shard_dir,
+            local_workers=args.local_workers,
+            wait_minutes=args.wait_minutes,
+        )
+    except ValueError as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 2
+    return 0 if result is not None else 1
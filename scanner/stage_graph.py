@@ -0,0 +1,165 @@
+#### Copyright Notice
+# SPDX-FileCopyrightText: 2025 Observes io LTD
+# SPDX-License-Identifier: LicenseRef-PolyForm-Internal-Use-1.0.0
+#
+# Copyright (c) 2025 Observes io LTD, Scotland, Company No. SC864704
+# Licensed under PolyForm Internal Use 1.0.0, see LICENSE or https://polyformproject.org/licenses/internal-use/1.0.0
+# Internal use only; additional clarifications in LICENSE-CLARIFICATIONS.md
+####
+
+"""Scan stages as a dependency graph.
+
+Each `Stage` names the values it reads (`inputs`) and the values it produces
+(`outputs`); its function is called with the inputs as keyword arguments and
+returns the outputs (a single value, or a tuple in `outputs` order).
+`StageGraph.run` starts every stage as soon as all of its inputs exist, so
+independent stages (tasks, feeds, protected-resource discovery, ...) overlap
+with the long pipeline collection instead of waiting their turn.
+
+A stage that mutates a value another stage also reads must be ordered by
+declaring the mutated value as an output under a new name and reading that
+name downstream.
+
+With a `checkpoint` (see `scanner.checkpoint`) every completed stage's
+outputs are saved, and on resume a stage is restored instead of run when it
+and every stage it depends on completed before.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable
+    inputs: tuple = ()
+    outputs: tuple = ()
+    description: str = ""
+
+
+class StageGraph:
+    def __init__(self, stages, max_workers=None, clock=time.monotonic, checkpoint=None):
+        self.stages = list(stages)
+        self.max_workers = max_workers or len(self.stages) or 1
+        self.clock = clock
+        self.checkpoint = checkpoint
+        self.timings = {}
+        self.restored = []
+        self._validate()
+
+    def _validate(self):
+        producers = {}
+        names = set()
+        for stage in self.stages:
+            if stage.name in names:
+                raise ValueError(f"Duplicate stage '{stage.name}'")
+            names.add(stage.name)
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"'{output}' is produced by both '{producers[output]}' and '{stage.name}'")
+                producers[output] = stage.name
+        self._producers = producers
+
+    def _check_inputs(self, initial):
+        available = set(initial) | set(self._producers)
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {', '.join(missing)}, which nothing produces")
+        # Every stage must become runnable; otherwise the graph has a cycle.
+        ready = set(initial)
+        remaining = list(self.stages)
+        while remaining:
+            runnable = [stage for stage in remaining if set(stage.inputs) <= ready]
+            if not runnable:
+                raise ValueError(f"Stage dependency cycle among {', '.join(stage.name for stage in remaining)}")
+            for stage in runnable:
+                ready.update(stage.outputs)
+                remaining.remove(stage)
+
+    def _call(self, stage, values, started):
+        began = self.clock()
+        if stage.description:
+            logger.info(stage.description)
+        result = stage.run(**{name: values[name] for name in stage.inputs})
+        seconds = self.clock() - began
+        if len(stage.outputs) == 1:
+            result = (result,)
+        elif not stage.outputs:
+            result = ()
+        self.timings[stage.name] = {"started": round(began - started, 3), "seconds": round(seconds, 3)}
+        logger.debug(f"Stage {stage.name} finished in {seconds:.2f}s")
+        outputs = dict(zip(stage.outputs, result))
+        if self.checkpoint is not None:
+            self.checkpoint.save(stage.name, outputs)
+        return outputs
+
+    def _restore(self, values, results):
+        """Load the outputs of checkpointed stages whose dependencies were all checkpointed too."""
+        restored = set()
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages:
+                producers = {self._producers[name] for name in stage.inputs if name in self._producers}
+                if stage.name not in restored and self.checkpoint.has(stage.name) and producers <= restored:
+                    restored.add(stage.name)
+                    changed = True
+        # Only outputs read by a stage that runs again, or by the caller, are loaded.
+        needed = set(results) if results is not None else set(self._producers)
+        for stage in self.stages:
+            if stage.name not in restored:
+                needed.update(stage.inputs)
+        for stage in self.stages:
+            if stage.name in restored:
+                if needed & set(stage.outputs):
+                    outputs = self.checkpoint.load(stage.name)
+                    values.update({name: outputs[name] for name in stage.outputs})
+                self.timings[stage.name] = {"started": 0.0, "seconds": 0.0, "restored": True}
+        self.restored = [stage.name for stage in self.stages if stage.name in restored]
+        if self.restored:
+            logger.info(f"Restored {len(self.restored)} completed stages from the checkpoint: {', '.join(self.restored)}")
+        return [stage for stage in self.stages if stage.name not in restored]
+
+    def run(self, initial=None, results=None):
+        """Run every stage once; returns all values, initial ones included.
+
+        `results` names the values the caller reads afterwards; stages restored
+        from a checkpoint only load those and the ones other stages still need.
+        The first stage that raises stops the run: stages not yet started are
+        not started, running ones are waited for, and the exception propagates.
+        """
+        values = dict(initial or {})
+        self._check_inputs(values)
+        started = self.clock()
+        pending = list(self.stages)
+        if self.checkpoint is not None:
+            pending = self._restore(values, results)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan-stage") as pool:
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                    pending.remove(stage)
+                    running[pool.submit(self._call, stage, dict(values), started)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        pending.clear()
+                        wait(running)
+                        raise error
+                    values.update(future.result())
+        return values
+
+    def summary(self):
+        """Per-stage start offset and duration in seconds, in start order."""
+        return dict(sorted(self.timings.items(), key=lambda item: item[1]["started"]))